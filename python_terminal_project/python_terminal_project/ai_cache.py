@@ -0,0 +1,179 @@
+"""
+Interpretation cache for natural language commands in the Python Command Terminal.
+"""
+
+import atexit
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from session import current_session
+
+Interpretation = Tuple[Optional[str], List[str]]
+
+
+class InterpretationCache:
+    """
+    LRU cache of natural language interpretations with learned corrections.
+
+    Learned entries come from the user confirming or teaching an
+    interpretation; they are never evicted and take priority over cached ones.
+    """
+
+    def __init__(self, cache_file: Optional[str] = "~/.terminal_ai_cache", max_size: int = 512):
+        self.cache_file = os.path.expanduser(cache_file) if cache_file else None
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, Interpretation]" = OrderedDict()
+        self.learned: Dict[str, Interpretation] = {}
+        self.hits = 0
+        self.misses = 0
+        self._loaded = False
+        self._dirty = False
+        if self.cache_file:
+            atexit.register(self.save)
+
+    @property
+    def last_phrase(self) -> Optional[str]:
+        """Phrase last looked up in the current session, for 'ai --confirm'."""
+        return current_session().last_phrase
+
+    @last_phrase.setter
+    def last_phrase(self, phrase: Optional[str]) -> None:
+        current_session().last_phrase = phrase
+
+    @staticmethod
+    def normalize(phrase: str) -> str:
+        """Normalize a phrase so trivially different spellings share an entry."""
+        return " ".join(phrase.lower().split())
+
+    def load(self) -> None:
+        """Load cached and learned interpretations from the cache file."""
+        self._loaded = True
+        if not self.cache_file:
+            return
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as f:
+                    data = json.load(f)
+                for phrase, (command, args) in data.get('learned', {}).items():
+                    self.learned[phrase] = (command, list(args))
+                for phrase, (command, args) in data.get('entries', [])[-self.max_size:]:
+                    # Older files also cached phrases that were not understood
+                    if command is not None:
+                        self.entries[phrase] = (command, list(args))
+        except Exception:
+            # A corrupt cache file is not worth failing over
+            self.entries.clear()
+            self.learned.clear()
+
+    def save(self) -> None:
+        """Save cached and learned interpretations to the cache file."""
+        if not self.cache_file or not self._dirty:
+            return
+        try:
+            data = {
+                'learned': {phrase: list(value) for phrase, value in self.learned.items()},
+                'entries': [[phrase, list(value)] for phrase, value in self.entries.items()]
+            }
+            # Write a sibling file and rename it over the cache, so a crash or
+            # a concurrent session never leaves a half-written file behind
+            temp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            try:
+                with open(temp_file, 'w') as f:
+                    json.dump(data, f)
+                os.replace(temp_file, self.cache_file)
+            except BaseException:
+                if os.path.exists(temp_file):
+                    os.unlink(temp_file)
+                raise
+            self._dirty = False
+        except Exception:
+            pass  # Silently fail if we can't save the cache
+
+    def get(self, phrase: str) -> Optional[Interpretation]:
+        """
+        Look up a phrase, checking learned corrections before cached results.
+
+        Args:
+            phrase: Natural language command
+
+        Returns:
+            Cached (command_name, arguments) tuple, or None on a miss
+        """
+        if not self._loaded:
+            self.load()
+
+        key = self.normalize(phrase)
+        self.last_phrase = key
+
+        if key in self.learned:
+            self.hits += 1
+            return self.learned[key]
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, phrase: str, interpretation: Interpretation) -> None:
+        """Store an interpretation, evicting the least recently used entry if full."""
+        if not self._loaded:
+            self.load()
+        key = self.normalize(phrase)
+        self.entries[key] = interpretation
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        self._dirty = True
+
+    def learn(self, phrase: str, command: str, args: List[str]) -> None:
+        """Remember a confirmed interpretation for a phrase."""
+        # Saving writes the whole file, so earlier sessions' entries must be loaded first
+        if not self._loaded:
+            self.load()
+        key = self.normalize(phrase)
+        self.learned[key] = (command, list(args))
+        self.entries.pop(key, None)
+        self._dirty = True
+
+    def forget(self, phrase: str) -> bool:
+        """Drop any cached or learned interpretation of a phrase."""
+        if not self._loaded:
+            self.load()
+        key = self.normalize(phrase)
+        found = self.learned.pop(key, None) is not None
+        found = self.entries.pop(key, None) is not None or found
+        if found:
+            self._dirty = True
+        return found
+
+    def confirm_last(self) -> Optional[Interpretation]:
+        """
+        Promote the most recently looked-up phrase to a learned correction.
+
+        Returns:
+            The confirmed interpretation, or None if there is nothing to confirm
+        """
+        if self.last_phrase is None:
+            return None
+        if not self._loaded:
+            self.load()
+        interpretation = self.learned.get(self.last_phrase) or self.entries.get(self.last_phrase)
+        if not interpretation or interpretation[0] is None:
+            return None
+        self.learn(self.last_phrase, interpretation[0], interpretation[1])
+        return interpretation
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'learned': len(self.learned),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -5,7 +5,14 @@ This module handles natural language command interpretation.
 
 import os
 import re
-from typing import List, Dict, Optional, Tuple
+from difflib import get_close_matches
+from typing import Callable, List, Dict, Optional, Tuple
+
+from ai_cache import InterpretationCache
+from intent_index import IntentIndex
+
+# Minimum cosine similarity for the fuzzy fallback to accept an intent
+FUZZY_MATCH_THRESHOLD = 0.35
 
 
 class AICommandProcessor:
@@ -22,6 +29,14 @@ class AICommandProcessor:
                     r'mkdir (.+)',
                     r'create (?:a |an )?directory (.+)'
                 ],
+                'examples': [
+                    'create a new folder called',
+                    'make a new directory named',
+                    'please create a folder',
+                    'new folder',
+                    'add a directory'
+                ],
+                'arguments': 'single',
                 'handler': self._handle_create_folder
             },
             'move_file': {
@@ -30,6 +45,13 @@ class AICommandProcessor:
                     r'mv (.+) (.+)',
                     r'move (.+) into (.+)'
                 ],
+                'examples': [
+                    'move the file to',
+                    'please move into',
+                    'relocate file to',
+                    'transfer the file into'
+                ],
+                'arguments': 'pair',
                 'handler': self._handle_move_file
             },
             'list_files': {
@@ -39,6 +61,14 @@ class AICommandProcessor:
                     r'what files are (?:in |at )(.+)',
                     r'show (?:me |)what\'s in (.+)'
                 ],
+                'examples': [
+                    'show me the files',
+                    'list all files',
+                    'display the files in',
+                    'what is in this folder',
+                    'list the directory contents'
+                ],
+                'arguments': 'optional',
                 'handler': self._handle_list_files
             },
             'change_directory': {
@@ -48,9 +78,49 @@ class AICommandProcessor:
                     r'change to (.+)',
                     r'navigate to (.+)'
                 ],
+                'examples': [
+                    'go into the folder',
+                    'switch to directory',
+                    'take me to',
+                    'open the folder',
+                    'change directory to'
+                ],
+                'arguments': 'single',
                 'handler': self._handle_change_directory
             }
         }
+        self._compile_matcher()
+        self._fuzzy_index = IntentIndex(
+            {name: config['examples'] for name, config in self.command_patterns.items()}
+        )
+        self._fuzzy_vocabulary = {
+            name: {word for phrase in config['examples'] for word in phrase.split()}
+            for name, config in self.command_patterns.items()
+        }
+
+    def _compile_matcher(self) -> None:
+        """
+        Merge every intent pattern into a single alternation regex.
+
+        Each pattern is wrapped in a named group so one ``match`` call both
+        finds the first pattern that fits (alternatives are tried in the
+        same order as ``command_patterns``) and tells us which one it was.
+        """
+        alternatives = []
+        self._dispatch: Dict[str, Tuple[Callable, int, int]] = {}
+        group_index = 0
+
+        for command_name, config in self.command_patterns.items():
+            for pattern in config['patterns']:
+                group_name = f"p{len(self._dispatch)}"
+                alternatives.append(f"(?P<{group_name}>{pattern})")
+                # Inner groups follow the wrapper group in the combined regex
+                first_group = group_index + 1
+                inner_groups = re.compile(pattern).groups
+                self._dispatch[group_name] = (config['handler'], first_group, inner_groups)
+                group_index += inner_groups + 1
+
+        self._matcher = re.compile("|".join(alternatives))
 
     def process_command(self, natural_command: str) -> Tuple[Optional[str], List[str]]:
         """
@@ -62,13 +132,81 @@ class AICommandProcessor:
         Returns:
             Tuple of (command_name, arguments) if recognized, (None, []) otherwise
         """
-        for command_name, config in self.command_patterns.items():
-            for pattern in config['patterns']:
-                match = re.match(pattern, natural_command.lower().strip())
-                if match:
-                    return config['handler'](match.groups())
+        normalized = natural_command.lower().strip()
+        match = self._matcher.match(normalized)
+        if not match:
+            return self._fuzzy_match(normalized)
+
+        handler, first_group, inner_groups = self._dispatch[match.lastgroup]
+        groups = match.groups()[first_group:first_group + inner_groups]
+        return handler(groups)
 
-        return None, []
+    def _fuzzy_match(self, normalized: str) -> Tuple[Optional[str], List[str]]:
+        """
+        Fall back to similarity search when none of the regexes match.
+
+        Args:
+            normalized: Lowercased, stripped natural language command
+
+        Returns:
+            Tuple of (command_name, arguments) if recognized, (None, []) otherwise
+        """
+        intent, _score = self._fuzzy_index.best_intent(normalized, FUZZY_MATCH_THRESHOLD)
+        if intent is None:
+            return None, []
+
+        config = self.command_patterns[intent]
+        groups = self._extract_arguments(
+            normalized.split(), self._fuzzy_vocabulary[intent], config['arguments']
+        )
+        if groups is None:
+            return None, []
+        return config['handler'](groups)
+
+    @staticmethod
+    def _extract_arguments(words: List[str], vocabulary: set, arguments: str) -> Optional[tuple]:
+        """
+        Pull command arguments out of a fuzzily matched phrase.
+
+        Arguments are taken to be the words following the last word that looks
+        like part of the intent's example phrases (allowing for typos).
+
+        Args:
+            words: Words of the normalized input
+            vocabulary: Words used in the intent's example phrases
+            arguments: 'single', 'optional' or 'pair'
+
+        Returns:
+            Tuple of argument strings, or None if required arguments are missing
+        """
+        def is_phrase_word(word: str) -> bool:
+            return word in vocabulary or bool(get_close_matches(word, vocabulary, n=1, cutoff=0.8))
+
+        def trailing_argument(segment: List[str]) -> str:
+            end = len(segment)
+            start = end
+            while start > 0 and not is_phrase_word(segment[start - 1]):
+                start -= 1
+            return " ".join(segment[start:end])
+
+        if arguments == 'pair':
+            connectives = [i for i, word in enumerate(words) if word in ('to', 'into')]
+            if not connectives:
+                return None
+            split_at = connectives[-1]
+            source = trailing_argument(words[:split_at])
+            destination_words = words[split_at + 1:]
+            if destination_words[:1] == ['the']:
+                destination_words = destination_words[1:]
+            destination = " ".join(destination_words)
+            if not source or not destination:
+                return None
+            return source, destination
+
+        argument = trailing_argument(words)
+        if arguments == 'optional':
+            return (argument,) if argument else ()
+        return (argument,) if argument else None
 
     def _handle_create_folder(self, groups: tuple) -> Tuple[str, List[str]]:
         """Handle folder creation commands."""
@@ -93,6 +231,13 @@ class AICommandProcessor:
         return 'cd', [directory]
 
 
+# Shared processor; its combined regex is compiled once at import time
+_processor = AICommandProcessor()
+
+# Cache of previous interpretations, persisted between sessions
+interpretation_cache = InterpretationCache()
+
+
 def interpret_natural_command(command: str) -> Tuple[Optional[str], List[str]]:
     """
     Interpret a natural language command and return terminal command equivalent.
@@ -103,5 +248,13 @@ def interpret_natural_command(command: str) -> Tuple[Optional[str], List[str]]:
     Returns:
         Tuple of (command_name, arguments) or (None, []) if not recognized
     """
-    processor = AICommandProcessor()
-    return processor.process_command(command)
+    cached = interpretation_cache.get(command)
+    if cached is not None:
+        return cached[0], list(cached[1])
+
+    command_name, args = _processor.process_command(command)
+    # Only cache phrases that were understood; misses would pile up in the
+    # file and keep returning None after the interpreter learns the phrase
+    if command_name is not None:
+        interpretation_cache.put(command, (command_name, list(args)))
+    return command_name, args
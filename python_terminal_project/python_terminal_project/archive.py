@@ -0,0 +1,925 @@
+"""
+Archive commands for the Python Command Terminal.
+This module implements 'tar', 'zip' and 'unzip':
+
+    tar -c[z][v]f ARCHIVE PATH...          create a tar archive (z: gzip it)
+    tar -x[v]f ARCHIVE [-C DIR] [NAME...]  extract into DIR (default: the working directory)
+    tar -t[v]f ARCHIVE [NAME...]           list members
+    zip [-r] [-v] ARCHIVE PATH...          create a zip archive
+    unzip [-l] [-v] ARCHIVE [-d DIR]       extract (or list) a zip archive
+
+Entries are streamed from the walker behind 'find' straight into the
+archive writer, so nothing is staged. Compression runs on a thread pool,
+since zlib releases the GIL while it works: a gzip stream is cut into
+blocks that are deflated in parallel and joined in order (each block primed
+with the end of the previous one, as pigz does), and zip members are read
+and deflated ahead of the writer. A gzip stream can only be inflated in
+order, so tar extraction decompresses on one thread and hands the file
+writes to the pool; zip members are independent, so unzip inflates them in
+parallel. Compressed tar archives (gzip, bzip2 or xz) are detected when
+reading, so -z is only needed when creating one.
+"""
+
+import os
+import stat
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Deque, Iterator, List, Optional, Tuple
+
+from cancel import check_cancelled, current_token, use_token
+from meminfo import format_bytes
+from output import is_terminal
+from session import current_session
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+# Threads compressing, decompressing and writing
+WORKERS = os.cpu_count() or 1
+
+# Bytes of a gzip stream deflated as one block
+BLOCK_SIZE = 1 << 20
+
+# History a deflate block can refer back to, carried over between blocks
+DICTIONARY_SIZE = 32 * 1024
+
+COMPRESS_LEVEL = 6
+
+# Bytes read or written at a time when streaming a file
+COPY_SIZE = 1 << 20
+
+# Files up to this size are read or written whole on the pool; larger ones
+# are streamed in COPY_SIZE chunks
+SMALL_FILE_LIMIT = 4 << 20
+
+# Most file data held in memory by queued work
+MAX_PENDING_BYTES = 64 << 20
+
+# Seconds between progress updates on a terminal
+PROGRESS_INTERVAL = 0.5
+
+TAR_USAGE = "tar: usage: tar -c[z][v]f ARCHIVE PATH... | -x[v]f ARCHIVE [-C DIR] [NAME...] | -t[v]f ARCHIVE [NAME...]"
+ZIP_USAGE = "zip: usage: zip [-r] [-v] ARCHIVE PATH..."
+UNZIP_USAGE = "unzip: usage: unzip [-l] [-v] ARCHIVE [-d DIR]"
+
+
+@contextmanager
+def open_pool() -> Iterator["ThreadPoolExecutor"]:
+    """Start the worker threads, dropping queued work if the command fails."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="archive")
+    # Futures that may still be queued (shutdown's cancel_futures needs 3.9)
+    submitted: Deque["Future"] = deque()
+    submit = executor.submit
+
+    def tracked_submit(*args, **kwargs) -> "Future":
+        while submitted and submitted[0].done():
+            submitted.popleft()
+        future = submit(*args, **kwargs)
+        submitted.append(future)
+        return future
+
+    executor.submit = tracked_submit
+    try:
+        yield executor
+    except BaseException:
+        for future in submitted:
+            future.cancel()
+        executor.shutdown(wait=True)
+        raise
+    executor.shutdown(wait=True)
+
+
+def _run_with_token(token, func, *args):
+    with use_token(token):
+        return func(*args)
+
+
+class WorkQueue:
+    """
+    Work submitted to a thread pool, collected in submission order.
+
+    Workers see the submitting command's cancellation token. Each item has
+    a size (usually the bytes it holds), and the queue reports itself full
+    once the total passes limit, so producers can wait for the oldest item
+    before reading further ahead.
+    """
+
+    def __init__(self, executor: "ThreadPoolExecutor", limit: int = MAX_PENDING_BYTES):
+        self.executor = executor
+        self.limit = limit
+        self.token = current_token()
+        self.pending: Deque[Tuple["Future", int]] = deque()
+        self.pending_size = 0
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def submit(self, size: int, func, *args) -> None:
+        self.pending.append((self.executor.submit(_run_with_token, self.token, func, *args), size))
+        self.pending_size += size
+
+    @property
+    def full(self) -> bool:
+        return self.pending_size > self.limit
+
+    @property
+    def ready(self) -> bool:
+        """Whether the oldest item has finished."""
+        return bool(self.pending) and self.pending[0][0].done()
+
+    def pop(self):
+        """Wait for the oldest item and return its result."""
+        future, size = self.pending.popleft()
+        self.pending_size -= size
+        return future.result()
+
+
+def deflate_block(data: bytes, dictionary: bytes, level: int) -> bytes:
+    """
+    Deflate one block of a stream, ending on a byte boundary.
+
+    Args:
+        data: Block contents
+        dictionary: Data preceding the block, which matches may refer to
+        level: zlib compression level
+
+    Returns:
+        Raw deflate data that later blocks can be appended to
+    """
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def deflate_whole(data: bytes, level: int) -> bytes:
+    """Deflate a complete stream (a small zip member) in one go."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class BlockDeflater:
+    """
+    Raw deflate compressor that deflates BLOCK_SIZE blocks on a thread pool.
+
+    It has the compress()/flush() interface of zlib's compressors. Blocks end
+    with a sync flush, so in order they form one valid deflate stream, and
+    each is primed with the last 32 KiB of the one before, so the result is
+    almost as small as a serial stream.
+    """
+
+    def __init__(self, executor: "ThreadPoolExecutor", level: int = COMPRESS_LEVEL):
+        self.level = level
+        # Enough blocks in flight to keep every worker busy
+        self.queue = WorkQueue(executor, 2 * WORKERS * BLOCK_SIZE)
+        self.buffer = bytearray()
+        self.dictionary = b''
+
+    def _submit(self, block: bytes) -> None:
+        self.queue.submit(len(block), deflate_block, block, self.dictionary, self.level)
+        self.dictionary = block[-DICTIONARY_SIZE:]
+
+    def _collect(self, everything: bool = False) -> bytes:
+        output = []
+        while self.queue and (everything or self.queue.full or self.queue.ready):
+            output.append(self.queue.pop())
+        return b''.join(output)
+
+    def compress(self, data) -> bytes:
+        self.buffer += data
+        whole = len(self.buffer) - len(self.buffer) % BLOCK_SIZE
+        for start in range(0, whole, BLOCK_SIZE):
+            self._submit(bytes(self.buffer[start:start + BLOCK_SIZE]))
+        del self.buffer[:whole]
+        return self._collect()
+
+    def flush(self) -> bytes:
+        if self.buffer:
+            self._submit(bytes(self.buffer))
+            self.buffer.clear()
+        # An empty final block ends the stream
+        end = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS).flush()
+        return self._collect(everything=True) + end
+
+
+class GzipWriter:
+    """
+    Writes a gzip stream to a binary file, deflating it with a BlockDeflater.
+
+    close() finishes the stream but leaves the underlying file open.
+    """
+
+    def __init__(self, fileobj, executor: "ThreadPoolExecutor", level: int = COMPRESS_LEVEL):
+        self.fileobj = fileobj
+        self.deflater = BlockDeflater(executor, level)
+        self.crc = 0
+        self.size = 0
+        # Magic, deflate, no flags, mtime, no extra flags, unknown OS
+        fileobj.write(b'\x1f\x8b\x08\x00' + struct.pack('<I', int(time.time())) + b'\x00\xff')
+
+    def write(self, data) -> int:
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self.fileobj.write(self.deflater.compress(data))
+        return len(data)
+
+    def close(self) -> None:
+        self.fileobj.write(self.deflater.flush())
+        self.fileobj.write(struct.pack('<II', self.crc, self.size & 0xffffffff))
+
+
+class Progress:
+    """
+    Counts the files and bytes an archive command has processed.
+
+    Workers may call add(); everything that prints runs on the command's own
+    thread, whose output may be redirected. On a terminal a progress line
+    with the current throughput is redrawn in place.
+    """
+
+    def __init__(self, command: str):
+        self.command = command
+        self.files = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self.shown = self.started
+        self.live = is_terminal(sys.stdout)
+        self.drawn = False
+        self._lock = threading.Lock()
+
+    def add(self, size: int, files: int = 1) -> None:
+        with self._lock:
+            self.bytes += size
+            self.files += files
+
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (f"{self.files} files, {format_bytes(self.bytes)} in {elapsed:.2f}s "
+                f"({format_bytes(self.bytes / elapsed)}/s)")
+
+    def _clear(self) -> None:
+        if self.drawn:
+            sys.stdout.write('\r\x1b[K')
+            self.drawn = False
+
+    def show(self) -> None:
+        """Redraw the progress line if PROGRESS_INTERVAL has passed."""
+        now = time.monotonic()
+        if not self.live or now - self.shown < PROGRESS_INTERVAL:
+            return
+        self.shown = now
+        sys.stdout.write(f"\r{self.command}: {self.summary()}\x1b[K")
+        sys.stdout.flush()
+        self.drawn = True
+
+    def line(self, text: str) -> None:
+        """Print a line (an entry name or an error) above the progress line."""
+        self._clear()
+        print(text)
+
+    def finish(self, archive_size: Optional[int] = None) -> None:
+        self._clear()
+        summary = f"{self.command}: {self.summary()}"
+        if archive_size is not None:
+            summary += f", archive {format_bytes(archive_size)}"
+        print(summary)
+
+
+def archive_name(path: str) -> str:
+    """Return the member name for a path: normalized, relative and without '..' prefixes."""
+    parts = [part for part in os.path.normpath(path).split(os.sep) if part not in ('', '..')]
+    return '/'.join(parts) or '.'
+
+
+def walk_paths(command: str, paths: List[str], skip: str, errors: List[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (full path, member name) for each path and everything below it.
+
+    Directories are yielded before their contents. Missing paths and
+    unreadable directories are printed and added to errors, and the walk
+    carries on.
+
+    Args:
+        command: Command name for error messages
+        paths: Paths as the user wrote them
+        skip: Full path never to yield (the archive being written)
+        errors: List collecting error messages
+    """
+    from commands_final import find_records
+    from records import ErrorRecord
+
+    session = current_session()
+    for path in paths:
+        full_root = session.resolve(path)
+        try:
+            is_dir = stat.S_ISDIR(os.lstat(full_root).st_mode)
+        except OSError:
+            errors.append(f"{command}: {path}: No such file or directory")
+            print(errors[-1])
+            continue
+        if full_root != skip:
+            yield full_root, archive_name(path)
+        if not is_dir:
+            continue
+
+        # find_records reports paths relative to the root as written
+        shown_root = path.rstrip(os.sep) or path
+        for record in find_records([path]):
+            if isinstance(record, ErrorRecord):
+                errors.append(f"{command}: {record.path}: {record.reason}")
+                print(errors[-1])
+                continue
+            full = full_root + record.path[len(shown_root):]
+            if full != skip:
+                yield full, archive_name(record.path)
+
+
+def selected(name: str, names: List[str]) -> bool:
+    """Check whether a member is one of names, or below one of them."""
+    name = name.rstrip('/')
+    return not names or any(name == wanted or name.startswith(wanted + '/') for wanted in names)
+
+
+def member_target(destination: str, name: str) -> Optional[str]:
+    """
+    Return where a member is extracted, or None if that is outside destination.
+
+    Leading slashes are dropped. The member's directory is resolved through
+    any symlinks already extracted, so links cannot lead writes elsewhere.
+    """
+    name = name.strip('/')
+    parent = os.path.realpath(os.path.join(destination, os.path.dirname(name)))
+    if parent != destination and not parent.startswith(destination.rstrip(os.sep) + os.sep):
+        return None
+    base = os.path.basename(name)
+    if base == '..':
+        return None
+    return os.path.join(parent, base) if base not in ('', '.') else parent
+
+
+def inside(destination: str, path: str) -> bool:
+    """Check whether path resolves to somewhere within destination."""
+    path = os.path.realpath(path)
+    return path == destination or path.startswith(destination.rstrip(os.sep) + os.sep)
+
+
+def _prepare(target: str) -> None:
+    """Create a file's parent directories and remove a symlink in its place."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.islink(target):
+        os.unlink(target)
+
+
+def _set_attributes(target: str, mode: Optional[int], mtime: Optional[float]) -> None:
+    if mode:
+        os.chmod(target, mode & 0o777)
+    if mtime is not None:
+        os.utime(target, (mtime, mtime))
+
+
+def write_file(name: str, target: str, data: bytes, mode: int, mtime: float,
+               progress: Progress) -> Optional[str]:
+    """
+    Write an extracted file whole (run on the pool).
+
+    Returns:
+        An error message, or None on success
+    """
+    try:
+        _prepare(target)
+        with open(target, 'wb') as f:
+            f.write(data)
+        _set_attributes(target, mode, mtime)
+    except OSError as e:
+        return f"{name}: {e.strerror}"
+    progress.add(len(data))
+    return None
+
+
+def copy_file(name: str, source, target: str, mode: Optional[int], mtime: Optional[float],
+              progress: Progress) -> Optional[str]:
+    """
+    Stream an extracted file to disk in COPY_SIZE chunks.
+
+    Returns:
+        An error message, or None on success
+    """
+    try:
+        _prepare(target)
+        with open(target, 'wb') as f:
+            while True:
+                check_cancelled()
+                chunk = source.read(COPY_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                progress.add(len(chunk), files=0)
+        _set_attributes(target, mode, mtime)
+    except OSError as e:
+        return f"{name}: {e.strerror}"
+    progress.add(0)
+    return None
+
+
+def create_tar(archive: str, paths: List[str], compress: bool, verbose: bool) -> int:
+    """Write a tar archive of paths, gzip-compressed on the pool if compress is set."""
+    import tarfile
+
+    full_archive = current_session().resolve(archive)
+    progress = Progress('tar')
+    errors: List[str] = []
+    with open_pool() as executor, open(full_archive, 'wb') as raw:
+        target = GzipWriter(raw, executor) if compress else raw
+        with tarfile.open(fileobj=target, mode='w|', bufsize=COPY_SIZE, format=tarfile.PAX_FORMAT) as tf:
+            tf.copybufsize = COPY_SIZE
+            for full, name in walk_paths('tar', paths, full_archive, errors):
+                check_cancelled()
+                try:
+                    info = tf.gettarinfo(full, name)
+                    if info is None:
+                        progress.line(f"tar: {name}: socket ignored")
+                        continue
+                    if info.isreg():
+                        with open(full, 'rb') as f:
+                            tf.addfile(info, f)
+                    else:
+                        tf.addfile(info)
+                except OSError as e:
+                    errors.append(f"tar: {name}: {e.strerror}")
+                    progress.line(errors[-1])
+                    continue
+                progress.add(info.size if info.isreg() else 0)
+                if verbose:
+                    progress.line(name + '/' if info.isdir() else name)
+                progress.show()
+        if compress:
+            target.close()
+    progress.finish(os.path.getsize(full_archive))
+    return 1 if errors else 0
+
+
+def extract_tar(archive: str, directory: str, names: List[str], verbose: bool) -> int:
+    """Extract a (possibly compressed) tar archive, writing files on the pool."""
+    import tarfile
+
+    session = current_session()
+    destination = os.path.realpath(session.resolve(directory))
+    progress = Progress('tar')
+    errors = 0
+
+    with open_pool() as executor, open(session.resolve(archive), 'rb') as raw, \
+            tarfile.open(fileobj=raw, mode='r:*') as tf:
+        writes = WorkQueue(executor)
+
+        def collect(everything: bool = False) -> None:
+            nonlocal errors
+            while writes and (everything or writes.full or writes.ready):
+                error = writes.pop()
+                if error:
+                    errors += 1
+                    progress.line(f"tar: {error}")
+
+        for member in tf:
+            check_cancelled()
+            if not selected(member.name, names):
+                continue
+            target = member_target(destination, member.name)
+            if target is None:
+                errors += 1
+                progress.line(f"tar: {member.name}: outside the destination, skipped")
+                continue
+            if verbose:
+                progress.line(member.name)
+
+            error = None
+            if member.isdir():
+                try:
+                    os.makedirs(target, exist_ok=True)
+                    progress.add(0)
+                except OSError as e:
+                    error = f"{member.name}: {e.strerror}"
+            elif member.isreg():
+                source = tf.extractfile(member)
+                if member.size <= SMALL_FILE_LIMIT:
+                    writes.submit(member.size, write_file, member.name, target, source.read(),
+                                  member.mode, member.mtime, progress)
+                else:
+                    error = copy_file(member.name, source, target, member.mode, member.mtime, progress)
+            elif member.issym() or member.islnk():
+                # Links are made once earlier writes are done, since a hard
+                # link's source or a write below a symlink may still be queued
+                collect(everything=True)
+                if member.issym():
+                    source_path = os.path.join(os.path.dirname(target), member.linkname)
+                else:
+                    source_path = os.path.join(destination, member.linkname)
+                if os.path.isabs(member.linkname) or not inside(destination, source_path):
+                    error = f"{member.name}: link to {member.linkname} leaves the destination, skipped"
+                else:
+                    try:
+                        _prepare(target)
+                        if os.path.lexists(target):
+                            os.unlink(target)
+                        if member.issym():
+                            os.symlink(member.linkname, target)
+                        else:
+                            os.link(source_path, target)
+                        progress.add(0)
+                    except OSError as e:
+                        error = f"{member.name}: {e.strerror}"
+            else:
+                error = f"{member.name}: special file skipped"
+
+            if error:
+                errors += 1
+                progress.line(f"tar: {error}")
+            collect()
+            progress.show()
+        collect(everything=True)
+
+    progress.finish()
+    return 1 if errors else 0
+
+
+def list_tar(archive: str, names: List[str], verbose: bool) -> int:
+    """List the members of a (possibly compressed) tar archive."""
+    import tarfile
+
+    with open(current_session().resolve(archive), 'rb') as raw, \
+            tarfile.open(fileobj=raw, mode='r:*') as tf:
+        for member in tf:
+            check_cancelled()
+            if not selected(member.name, names):
+                continue
+            name = member.name + '/' if member.isdir() else member.name
+            if verbose:
+                modified = time.strftime('%Y-%m-%d %H:%M', time.localtime(member.mtime))
+                print(f"{stat.filemode(member.mode | tarfile_type(member))} "
+                      f"{member.uname or member.uid}/{member.gname or member.gid} "
+                      f"{member.size:>10} {modified} {name}")
+            else:
+                print(name)
+    return 0
+
+
+def tarfile_type(member) -> int:
+    """Return the stat file-type bits for a tar member."""
+    if member.isdir():
+        return stat.S_IFDIR
+    if member.issym():
+        return stat.S_IFLNK
+    return stat.S_IFREG
+
+
+def handle_tar(args: List[str]) -> int:
+    """
+    Handle the 'tar' command (see the module docstring for usage).
+
+    The first argument may be a flag bundle without a dash, as in
+    'tar czf out.tgz src'.
+
+    Args:
+        args: Flags, the archive and paths or member names
+
+    Returns:
+        Exit status: 0 on success, 1 if any entry failed, 2 on usage errors
+    """
+    import tarfile
+
+    mode = archive = None
+    directory = '.'
+    compress = verbose = False
+    names: List[str] = []
+    index = 0
+    try:
+        while index < len(args):
+            arg = args[index]
+            index += 1
+            if arg in ('-C', '--directory'):
+                directory = args[index]
+                index += 1
+            elif arg.startswith('-') and len(arg) > 1 or index == 1:
+                for letter in arg.lstrip('-'):
+                    if letter in 'cxt':
+                        if mode is not None and mode != letter:
+                            print("tar: only one of -c, -x and -t may be given")
+                            return 2
+                        mode = letter
+                    elif letter == 'z':
+                        compress = True
+                    elif letter == 'v':
+                        verbose = True
+                    elif letter == 'f':
+                        archive = args[index]
+                        index += 1
+                    else:
+                        print(f"tar: unknown option -{letter}")
+                        print(TAR_USAGE)
+                        return 2
+            else:
+                names.append(arg)
+    except IndexError:
+        print(f"tar: {args[index - 1]}: missing value")
+        print(TAR_USAGE)
+        return 2
+
+    if mode is None or archive is None:
+        print(TAR_USAGE)
+        return 2
+    try:
+        if mode == 'c':
+            if not names:
+                print("tar: refusing to create an empty archive")
+                return 2
+            return create_tar(archive, names, compress, verbose)
+        names = [archive_name(name) for name in names]
+        if mode == 'x':
+            return extract_tar(archive, directory, names, verbose)
+        return list_tar(archive, names, verbose)
+    except FileNotFoundError as e:
+        print(f"tar: {e.filename}: No such file or directory")
+    except tarfile.TarError as e:
+        print(f"tar: {archive}: {e}")
+    except OSError as e:
+        print(f"tar: {archive}: {e.strerror}")
+    return 1
+
+
+# Type of the compressor zipfile's member writer uses for deflated members
+_ZLIB_COMPRESSOR = type(zlib.compressobj())
+
+
+class Precompressed:
+    """
+    Stands in for a zip member's compressor when its data was deflated on the
+    pool: the member writer still computes the CRC and size from the raw data
+    written, and gets the deflated data back when it flushes.
+    """
+
+    def __init__(self, compressed: bytes):
+        self.compressed = compressed
+
+    def compress(self, data) -> bytes:
+        return b''
+
+    def flush(self) -> bytes:
+        return self.compressed
+
+
+def read_member(info, full: str):
+    """
+    Read and deflate a small file for a zip member (run on the pool).
+
+    Returns:
+        (info, data, deflated data), or (info, None, error) on failure
+    """
+    try:
+        with open(full, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return info, None, e.strerror
+    return info, data, deflate_whole(data, COMPRESS_LEVEL)
+
+
+def write_member(zf, info, compressor, chunks: Iterator[bytes]) -> None:
+    """
+    Write a zip member, compressing it with the given compressor.
+
+    zipfile has no public way to supply compressed data. Its member writer
+    (CPython 3.8 to 3.13) keeps a zlib compressor in _compressor and only
+    calls compress() and flush() on it, so that is swapped for ours. If a
+    zipfile version does not have it, zipfile deflates the member itself.
+    """
+    with zf.open(info, 'w') as member:
+        if isinstance(getattr(member, '_compressor', None), _ZLIB_COMPRESSOR):
+            member._compressor = compressor
+        for chunk in chunks:
+            member.write(chunk)
+
+
+def read_chunks(f) -> Iterator[bytes]:
+    while True:
+        check_cancelled()
+        chunk = f.read(COPY_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def create_zip(archive: str, paths: List[str], verbose: bool) -> int:
+    """Write a zip archive of paths, deflating members on the pool."""
+    import zipfile
+
+    full_archive = current_session().resolve(archive)
+    progress = Progress('zip')
+    errors: List[str] = []
+    with open_pool() as executor, zipfile.ZipFile(full_archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        reads = WorkQueue(executor)
+
+        def collect(everything: bool = False) -> None:
+            while reads and (everything or reads.full or reads.ready):
+                info, data, compressed = reads.pop()
+                if data is None:
+                    errors.append(f"zip: {info.filename}: {compressed}")
+                    progress.line(errors[-1])
+                    continue
+                write_member(zf, info, Precompressed(compressed), [data])
+                progress.add(len(data))
+                if verbose:
+                    progress.line(f"  adding: {info.filename}")
+
+        for full, name in walk_paths('zip', paths, full_archive, errors):
+            check_cancelled()
+            if name == '.':
+                continue
+            try:
+                info = zipfile.ZipInfo.from_file(full, name)
+                if info.is_dir():
+                    zf.writestr(info, b'')
+                    progress.add(0)
+                elif info.file_size <= SMALL_FILE_LIMIT:
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    reads.submit(info.file_size, read_member, info, full)
+                    collect()
+                    progress.show()
+                    continue
+                else:
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    with open(full, 'rb') as f:
+                        write_member(zf, info, BlockDeflater(executor), read_chunks(f))
+                    progress.add(info.file_size)
+            except OSError as e:
+                errors.append(f"zip: {name}: {e.strerror}")
+                progress.line(errors[-1])
+                continue
+            if verbose:
+                progress.line(f"  adding: {info.filename}")
+            collect()
+            progress.show()
+        collect(everything=True)
+    progress.finish(os.path.getsize(full_archive))
+    return 1 if errors else 0
+
+
+def extract_member(zf, info, target: str, progress: Progress) -> Optional[str]:
+    """
+    Inflate one zip member to disk (run on the pool).
+
+    Returns:
+        An error message, or None on success
+    """
+    import zipfile
+
+    mtime = time.mktime(info.date_time + (0, 0, -1))
+    try:
+        with zf.open(info) as source:
+            return copy_file(info.filename, source, target, info.external_attr >> 16, mtime, progress)
+    except (zipfile.BadZipFile, OSError) as e:
+        return f"{info.filename}: {e}"
+
+
+def extract_zip(archive: str, directory: str, verbose: bool) -> int:
+    """Extract a zip archive, inflating members in parallel."""
+    import zipfile
+
+    session = current_session()
+    destination = os.path.realpath(session.resolve(directory))
+    full_archive = session.resolve(archive)
+    progress = Progress('unzip')
+    errors = 0
+
+    # The archive file is opened here and passed in, so members opened on
+    # different threads share it without zipfile closing it under them
+    with open(full_archive, 'rb') as raw, zipfile.ZipFile(raw) as zf, open_pool() as executor:
+        extracts = WorkQueue(executor, limit=2 * WORKERS)
+
+        def collect(everything: bool = False) -> None:
+            nonlocal errors
+            while extracts and (everything or extracts.full or extracts.ready):
+                error = extracts.pop()
+                if error:
+                    errors += 1
+                    progress.line(f"unzip: {error}")
+
+        for info in zf.infolist():
+            check_cancelled()
+            target = member_target(destination, info.filename)
+            if target is None:
+                errors += 1
+                progress.line(f"unzip: {info.filename}: outside the destination, skipped")
+                continue
+            if verbose:
+                progress.line(f"  inflating: {info.filename}")
+            if info.is_dir():
+                try:
+                    os.makedirs(target, exist_ok=True)
+                    progress.add(0)
+                except OSError as e:
+                    errors += 1
+                    progress.line(f"unzip: {info.filename}: {e.strerror}")
+            else:
+                extracts.submit(1, extract_member, zf, info, target, progress)
+            collect()
+            progress.show()
+        collect(everything=True)
+
+    progress.finish(os.path.getsize(full_archive))
+    return 1 if errors else 0
+
+
+def list_zip(archive: str) -> int:
+    """List the members of a zip archive in the style of 'unzip -l'."""
+    import zipfile
+
+    with zipfile.ZipFile(current_session().resolve(archive)) as zf:
+        infos = zf.infolist()
+    print("  Length      Date    Time    Name")
+    print("---------  ---------- -----   ----")
+    for info in infos:
+        year, month, day, hour, minute, _ = info.date_time
+        print(f"{info.file_size:>9}  {year:04}-{month:02}-{day:02} {hour:02}:{minute:02}   {info.filename}")
+    print("---------                     -------")
+    total = sum(info.file_size for info in infos)
+    print(f"{total:>9}                     {len(infos)} file{'s' if len(infos) != 1 else ''}")
+    return 0
+
+
+def handle_zip(args: List[str]) -> int:
+    """
+    Handle the 'zip' command (see the module docstring for usage).
+
+    Directories are always added with their contents; -r is accepted for
+    familiarity. An existing archive is replaced.
+
+    Args:
+        args: Options, the archive and the paths to add
+
+    Returns:
+        Exit status: 0 on success, 1 if any entry failed, 2 on usage errors
+    """
+    verbose = '-v' in args
+    positional = [arg for arg in args if arg not in ('-r', '-v')]
+    if len(positional) < 2 or any(arg.startswith('-') for arg in positional):
+        print(ZIP_USAGE)
+        return 2
+    try:
+        return create_zip(positional[0], positional[1:], verbose)
+    except OSError as e:
+        print(f"zip: {positional[0]}: {e.strerror}")
+        return 1
+
+
+def handle_unzip(args: List[str]) -> int:
+    """
+    Handle the 'unzip' command (see the module docstring for usage).
+
+    Args:
+        args: Options and the archive
+
+    Returns:
+        Exit status: 0 on success, 1 on errors, 2 on usage errors
+    """
+    import zipfile
+
+    listing = verbose = False
+    directory = '.'
+    archive = None
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        index += 1
+        if arg == '-l':
+            listing = True
+        elif arg == '-v':
+            verbose = True
+        elif arg == '-d' and index < len(args):
+            directory = args[index]
+            index += 1
+        elif archive is None and not arg.startswith('-'):
+            archive = arg
+        else:
+            print(UNZIP_USAGE)
+            return 2
+    if archive is None:
+        print(UNZIP_USAGE)
+        return 2
+
+    try:
+        if listing:
+            return list_zip(archive)
+        return extract_zip(archive, directory, verbose)
+    except FileNotFoundError:
+        print(f"unzip: {archive}: No such file or directory")
+    except zipfile.BadZipFile as e:
+        print(f"unzip: {archive}: {e}")
+    except OSError as e:
+        print(f"unzip: {archive}: {e.strerror}")
+    return 1
@@ -0,0 +1,8 @@
+"""
+Benchmarks for the Python Command Terminal.
+This package times the terminal's hot paths against synthetic filesystem and
+history fixtures at several scales. Run it from the project directory:
+
+    python -m benchmarks --scales 1k,100k --save baseline.json
+    python -m benchmarks --scales 1k,100k --baseline baseline.json
+"""
@@ -0,0 +1,64 @@
+"""
+Command-line entry point: python -m benchmarks [options]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import Fixtures  # noqa: E402
+from benchmarks.suite import CASES, Result, compare, parse_scale, run_suite, save_baseline  # noqa: E402
+
+
+def print_result(result: Result) -> None:
+    print(f"{result.name:<14} {result.scale:>10,} {result.ops_per_sec:>14,.0f} "
+          f"{result.seconds * 1000:>10.1f} {result.peak_bytes / 1e6:>10.2f}", flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Time the terminal's hot paths.")
+    parser.add_argument("--scales", default="1k,100k",
+                        help="comma-separated entry counts, e.g. 1k,100k,1m (default: 1k,100k)")
+    parser.add_argument("--only", help="comma-separated case names to run")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "pct-bench-fixtures"),
+                        help="directory for generated fixtures (reused between runs)")
+    parser.add_argument("--save", metavar="FILE", help="write results as a baseline")
+    parser.add_argument("--baseline", metavar="FILE", help="fail if results regress from this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown or memory growth (default: 0.2)")
+    options = parser.parse_args(argv)
+
+    cases = CASES
+    if options.only:
+        wanted = set(options.only.split(','))
+        cases = [case for case in CASES if case.name in wanted]
+        unknown = wanted - {case.name for case in cases}
+        if unknown:
+            parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+    scales = [parse_scale(scale) for scale in options.scales.split(',')]
+
+    print(f"{'case':<14} {'entries':>10} {'ops/s':>14} {'best ms':>10} {'peak MB':>10}")
+    results = run_suite(cases, scales, Fixtures(options.fixtures), options.repeat, print_result)
+
+    if options.save:
+        save_baseline(results, options.save)
+        print(f"\nBaseline written to {options.save}")
+    if options.baseline:
+        regressions = compare(results, options.baseline, options.tolerance)
+        if regressions:
+            print(f"\nREGRESSIONS against {options.baseline}:", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            return 1
+        print(f"\nNo regressions against {options.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Synthetic fixtures for the benchmarks.
+This module generates directory trees and history files quickly, using
+fd-relative syscalls, and keeps read-only fixtures between runs.
+"""
+
+import os
+import shutil
+
+# Commands cycled through when generating history files
+HISTORY_COMMANDS = (
+    "ls", "cd src", "pwd", "ls -C build", "mkdir out{1..3}", "rm -r out*",
+    "find . -name '*.py' | count", "sysinfo", "history", "ai show me files",
+)
+
+
+def make_tree(root: str, entries: int, fanout: int = 0, file_size: int = 0) -> None:
+    """
+    Create a tree holding the given number of files.
+
+    Files are spread over leaf directories of fanout files each, which are
+    nested fanout per level, e.g. entries=1_000_000 and fanout=100 gives
+    d00/d00/f00 ... d99/d99/f99. A fanout of 0 puts every file in root.
+
+    Args:
+        root: Directory to create (must not exist)
+        entries: Number of files
+        fanout: Entries per directory, or 0 for a flat directory
+        file_size: Bytes written to each file
+    """
+    os.makedirs(root)
+    data = b"x" * file_size
+
+    if fanout <= 0:
+        _fill_directory(root, 0, entries, data)
+        return
+
+    leaves = -(-entries // fanout)
+    depth = 1
+    while fanout ** depth < leaves:
+        depth += 1
+    width = len(str(fanout - 1))
+
+    for leaf in range(leaves):
+        digits = []
+        remainder = leaf
+        for _ in range(depth):
+            remainder, digit = divmod(remainder, fanout)
+            digits.append(f"d{digit:0{width}d}")
+        directory = os.path.join(root, *reversed(digits))
+        os.makedirs(directory, exist_ok=True)
+        first = leaf * fanout
+        _fill_directory(directory, first, min(fanout, entries - first), data)
+
+
+def _fill_directory(directory: str, first: int, count: int, data: bytes) -> None:
+    """Create count files in directory relative to its fd."""
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    dir_fd = os.open(directory, os.O_RDONLY) if os.open in os.supports_dir_fd else None
+    try:
+        for index in range(first, first + count):
+            name = f"f{index}.txt"
+            if dir_fd is not None:
+                fd = os.open(name, flags, 0o644, dir_fd=dir_fd)
+            else:
+                fd = os.open(os.path.join(directory, name), flags, 0o644)
+            if data:
+                os.write(fd, data)
+            os.close(fd)
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+
+
+def make_history(path: str, lines: int) -> None:
+    """Write a history file with the given number of commands."""
+    with open(path, 'w', buffering=1 << 20) as f:
+        for index in range(lines):
+            f.write(f"{HISTORY_COMMANDS[index % len(HISTORY_COMMANDS)]} #{index}\n")
+
+
+class Fixtures:
+    """
+    Fixture directory manager.
+
+    Read-only fixtures are named after their parameters and reused across
+    runs; scratch fixtures for destructive benchmarks are recreated each time.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _cached(self, name: str, build) -> str:
+        path = os.path.join(self.cache_dir, name)
+        marker = path + ".done"
+        if not os.path.exists(marker):
+            if os.path.lexists(path):
+                self._remove(path)
+            build(path)
+            open(marker, 'w').close()
+        return path
+
+    def tree(self, entries: int, fanout: int = 0, file_size: int = 0) -> str:
+        """Return a cached tree (see make_tree)."""
+        return self._cached(
+            f"tree-{entries}-{fanout}-{file_size}",
+            lambda path: make_tree(path, entries, fanout, file_size)
+        )
+
+    def history(self, lines: int) -> str:
+        """Return a cached history file with the given number of lines."""
+        return self._cached(f"history-{lines}", lambda path: make_history(path, lines))
+
+    def scratch_tree(self, entries: int, fanout: int = 0, file_size: int = 0) -> str:
+        """Create a fresh tree that the benchmark may destroy."""
+        path = os.path.join(self.cache_dir, "scratch")
+        if os.path.lexists(path):
+            self._remove(path)
+        make_tree(path, entries, fanout, file_size)
+        return path
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.unlink(path)
+
+    def clear(self) -> None:
+        """Remove all fixtures."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
@@ -0,0 +1,215 @@
+"""
+Benchmark cases and runner.
+This module times each hot path at the requested scales, measures peak
+Python memory with tracemalloc, and compares results against a baseline.
+"""
+
+import collections
+import gc
+import io
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from benchmarks.fixtures import Fixtures
+
+# Default fan-out for tree fixtures
+TREE_FANOUT = 100
+
+# Peak memory below this many bytes is treated as noise when comparing
+MEMORY_SLACK = 1 << 16
+
+# Phrases for the natural language benchmark: regex hits, fuzzy matches and misses
+AI_PHRASES = (
+    "create folder reports", "show me files", "go to Documents", "list files in src",
+    "please make a new directory called build", "what is in this folder",
+    "move notes.txt to archive", "tell me a joke",
+)
+
+
+class Case(NamedTuple):
+    """
+    A benchmark. setup(scale, fixtures) runs untimed before each repetition
+    and returns the state passed to the timed run(state).
+    """
+    name: str
+    setup: Callable[[int, Fixtures], object]
+    run: Callable[[object], object]
+
+
+class Result(NamedTuple):
+    """Timing of one case at one scale. ops is the number of entries processed."""
+    name: str
+    scale: int
+    ops: int
+    seconds: float
+    ops_per_sec: float
+    peak_bytes: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.scale}"
+
+
+class _NullOutput(io.TextIOBase):
+    """Discards handler output."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def _quiet(handler: Callable, args: List[str]) -> object:
+    from capture import redirect_thread_output
+    with redirect_thread_output(_NullOutput()):
+        return handler(args)
+
+
+def _consume(iterator: Iterable) -> None:
+    collections.deque(iterator, maxlen=0)
+
+
+def _run_ls(path: str) -> None:
+    from commands_final import list_directory_contents
+    list_directory_contents(path)
+
+
+def _run_find(path: str) -> None:
+    from commands_final import stream_find
+    _consume(stream_find([path], iter(())))
+
+
+def _run_history(path: str) -> None:
+    from history_windows import CommandHistory
+    CommandHistory(history_file=path)
+
+
+def _setup_ai(scale: int, fixtures: Fixtures) -> tuple:
+    from ai_commands import AICommandProcessor
+    return AICommandProcessor(), [AI_PHRASES[i % len(AI_PHRASES)] for i in range(scale)]
+
+
+def _run_ai(state: tuple) -> None:
+    processor, phrases = state
+    for phrase in phrases:
+        processor.process_command(phrase)
+
+
+def _run_rm(path: str) -> None:
+    from commands_final import handle_rm
+    if not _quiet(handle_rm, ['-r', path]):
+        raise RuntimeError(f"rm failed for {path}")
+
+
+def _setup_braces(scale: int, fixtures: Fixtures) -> str:
+    return f"mkdir d{{1..{scale}}}"
+
+
+def _run_braces(line: str) -> None:
+    from cmdline import expand, parse
+    parse.cache_clear()
+    _consume(expand(parse(line)[0]))
+
+
+CASES: List[Case] = [
+    Case("ls", lambda scale, fixtures: fixtures.tree(scale), _run_ls),
+    Case("find", lambda scale, fixtures: fixtures.tree(scale, TREE_FANOUT), _run_find),
+    Case("history_load", lambda scale, fixtures: fixtures.history(scale), _run_history),
+    Case("ai_process", _setup_ai, _run_ai),
+    Case("rm", lambda scale, fixtures: fixtures.scratch_tree(scale, TREE_FANOUT), _run_rm),
+    Case("brace_expand", _setup_braces, _run_braces),
+]
+
+
+def parse_scale(text: str) -> int:
+    """Parse a scale such as '1000', '100k' or '1m'."""
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def run_case(case: Case, scale: int, fixtures: Fixtures, repeat: int = 3) -> Result:
+    """
+    Time a case: the best of repeat runs, then one run under tracemalloc.
+
+    Returns:
+        The case's result
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        state = case.setup(scale, fixtures)
+        gc.collect()
+        start = time.perf_counter()
+        case.run(state)
+        best = min(best, time.perf_counter() - start)
+
+    state = case.setup(scale, fixtures)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(case.name, scale, scale, best, scale / best if best else float('inf'), peak)
+
+
+def run_suite(cases: Iterable[Case], scales: Iterable[int], fixtures: Fixtures,
+              repeat: int = 3, report: Optional[Callable[[Result], None]] = None) -> List[Result]:
+    """Run every case at every scale, reporting each result as it completes."""
+    results = []
+    for scale in scales:
+        for case in cases:
+            result = run_case(case, scale, fixtures, repeat)
+            results.append(result)
+            if report:
+                report(result)
+    return results
+
+
+def save_baseline(results: Iterable[Result], path: str) -> None:
+    """Write results as a baseline JSON file."""
+    data = {
+        result.key: {"ops_per_sec": result.ops_per_sec, "peak_bytes": result.peak_bytes}
+        for result in results
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: Iterable[Result], baseline_path: str, tolerance: float) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results: Current results
+        baseline_path: Baseline written by save_baseline
+        tolerance: Allowed fractional slowdown or memory growth, e.g. 0.2
+
+    Returns:
+        One message per regression
+    """
+    with open(baseline_path) as f:
+        baseline: Dict[str, Dict[str, float]] = json.load(f)
+
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.key)
+        if expected is None:
+            continue
+        floor = expected["ops_per_sec"] * (1 - tolerance)
+        if result.ops_per_sec < floor:
+            regressions.append(
+                f"{result.key}: {result.ops_per_sec:,.0f} ops/s, "
+                f"baseline {expected['ops_per_sec']:,.0f} ops/s "
+                f"({result.ops_per_sec / expected['ops_per_sec'] - 1:+.0%})"
+            )
+        ceiling = expected["peak_bytes"] * (1 + tolerance) + MEMORY_SLACK
+        if result.peak_bytes > ceiling:
+            regressions.append(
+                f"{result.key}: peak {result.peak_bytes / 1e6:.1f} MB, "
+                f"baseline {expected['peak_bytes'] / 1e6:.1f} MB"
+            )
+    return regressions
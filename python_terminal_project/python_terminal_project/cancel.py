@@ -0,0 +1,197 @@
+"""
+Cooperative cancellation for the Python Command Terminal.
+This module runs commands in worker threads that can be interrupted or timed out.
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+from capture import install, redirect_thread_output
+
+# Exit statuses for cancelled commands (match POSIX shells and GNU timeout)
+INTERRUPTED_STATUS = 130
+TIMED_OUT_STATUS = 124
+
+# How long a cancelled command gets to notice before it is abandoned
+CANCEL_GRACE_PERIOD = 2.0
+
+# How often the waiting thread checks for cancellation
+POLL_INTERVAL = 0.1
+
+
+class CommandCancelled(BaseException):
+    """
+    Raised inside a command when it has been cancelled.
+
+    Derives from BaseException, like KeyboardInterrupt, so handlers' broad
+    'except Exception' clauses do not swallow it.
+    """
+
+    def __init__(self, reason: str = "interrupted", status: int = INTERRUPTED_STATUS,
+                 abandoned: bool = False):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.abandoned = abandoned
+
+
+class CancellationToken:
+    """
+    Flag that long-running loops check to stop early.
+
+    A token is cancelled explicitly, when its deadline passes, or when its
+    parent token is cancelled.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CancellationToken"] = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.parent = parent
+        self._event = threading.Event()
+        self._reason: Optional[CommandCancelled] = None
+
+    def cancel(self, reason: str = "interrupted", status: int = INTERRUPTED_STATUS) -> None:
+        """Request cancellation."""
+        if self._reason is None:
+            self._reason = CommandCancelled(reason, status)
+        self._event.set()
+
+    def reason(self) -> Optional[CommandCancelled]:
+        """Return the cancellation reason, or None if not cancelled."""
+        if self._reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("timed out", TIMED_OUT_STATUS)
+        if self._reason is None and self.parent is not None:
+            return self.parent.reason()
+        return self._reason
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason() is not None
+
+    def check(self) -> None:
+        """Raise CommandCancelled if the token has been cancelled."""
+        reason = self.reason()
+        if reason is not None:
+            raise CommandCancelled(reason.reason, reason.status)
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep, waking early and raising if the token is cancelled."""
+        end = time.monotonic() + seconds
+        while True:
+            self.check()
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return
+            self._event.wait(min(remaining, POLL_INTERVAL))
+
+
+class _GatedOutput:
+    """Output target that can be closed so an abandoned command stops printing."""
+
+    def __init__(self, target):
+        self.target = target
+        self.open = True
+
+    def write(self, text: str) -> int:
+        if self.open:
+            return self.target.write(text)
+        return len(text)
+
+    def flush(self) -> None:
+        if self.open:
+            self.target.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.target, name)
+
+
+# Token that is never cancelled, used outside of run_cancellable
+_NEVER_CANCELLED = CancellationToken()
+_local = threading.local()
+
+
+def current_token() -> CancellationToken:
+    """Return the cancellation token of the command running in this thread."""
+    return getattr(_local, 'token', None) or _NEVER_CANCELLED
+
+
+def check_cancelled() -> None:
+    """Raise CommandCancelled if the current command has been cancelled."""
+    current_token().check()
+
+
+def cancellable_sleep(seconds: float) -> None:
+    """Sleep in a way the current command's cancellation can interrupt."""
+    current_token().sleep(seconds)
+
+
+@contextlib.contextmanager
+def use_token(token: CancellationToken) -> Iterator[CancellationToken]:
+    """Make token the current cancellation token for this thread."""
+    previous = getattr(_local, 'token', None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def run_cancellable(func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+    """
+    Run func in a worker thread, keeping the calling thread responsive.
+
+    Ctrl-C in the calling thread, or the timeout expiring, cancels the
+    worker's token. If the worker does not stop within CANCEL_GRACE_PERIOD
+    (for example, it is stuck in a syscall on a hung mount) it is abandoned
+    and its further output is discarded.
+
+    Args:
+        func: Function to run
+        *args: Arguments for func
+        timeout: Optional time limit in seconds
+
+    Returns:
+        Whatever func returns
+
+    Raises:
+        CommandCancelled: If the command was interrupted or timed out
+    """
+    token = CancellationToken(timeout, parent=getattr(_local, 'token', None))
+    output = _GatedOutput(install().target)
+    outcome: dict = {}
+    done = threading.Event()
+
+    def worker() -> None:
+        with redirect_thread_output(output), use_token(token):
+            try:
+                outcome['result'] = func(*args)
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+
+    # The worker inherits the caller's context (and with it the current session)
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(worker,), name="command", daemon=True)
+    thread.start()
+
+    # Wait on an event rather than Thread.join, which is not safe to interrupt
+    cancelled_at = None
+    while not done.is_set():
+        try:
+            done.wait(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            token.cancel("interrupted", INTERRUPTED_STATUS)
+
+        if cancelled_at is None and token.cancelled:
+            cancelled_at = time.monotonic()
+        if cancelled_at is not None and time.monotonic() - cancelled_at > CANCEL_GRACE_PERIOD:
+            output.open = False
+            reason = token.reason()
+            raise CommandCancelled(reason.reason, reason.status, abandoned=True)
+
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
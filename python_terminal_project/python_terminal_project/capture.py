@@ -0,0 +1,86 @@
+"""
+Per-thread output capture for the Python Command Terminal.
+This module routes sys.stdout writes to a thread-specific target, so handlers
+that print can run concurrently without contextlib.redirect_stdout.
+"""
+
+import contextlib
+import io
+import sys
+import threading
+from typing import Callable, Iterator, List, TextIO
+
+
+class ThreadLocalStdout(io.TextIOBase):
+    """
+    Stand-in for sys.stdout that routes writes per thread.
+    """
+
+    def __init__(self, default: TextIO):
+        self.default = default
+        self._local = threading.local()
+
+    @property
+    def target(self) -> TextIO:
+        """Stream that writes from the current thread go to."""
+        return getattr(self._local, 'target', None) or self.default
+
+    def write(self, text: str) -> int:
+        return self.target.write(text)
+
+    def flush(self) -> None:
+        self.target.flush()
+
+    def isatty(self) -> bool:
+        return self.target.isatty()
+
+    def fileno(self) -> int:
+        return self.target.fileno()
+
+    @property
+    def encoding(self) -> str:
+        return getattr(self.default, 'encoding', 'utf-8')
+
+    @property
+    def errors(self) -> str:
+        return getattr(self.default, 'errors', 'strict')
+
+
+def install() -> ThreadLocalStdout:
+    """Install the per-thread proxy as sys.stdout if it is not already."""
+    if not isinstance(sys.stdout, ThreadLocalStdout):
+        sys.stdout = ThreadLocalStdout(sys.stdout)
+    return sys.stdout
+
+
+@contextlib.contextmanager
+def redirect_thread_output(target: TextIO) -> Iterator[TextIO]:
+    """
+    Send everything the current thread prints to target.
+
+    Other threads keep writing to their own destinations.
+    """
+    proxy = install()
+    previous = getattr(proxy._local, 'target', None)
+    proxy._local.target = target
+    try:
+        yield target
+    finally:
+        proxy._local.target = previous
+
+
+def capture_output(handler: Callable, args: List[str]) -> str:
+    """
+    Run a printing handler and return what it printed.
+
+    Args:
+        handler: Command handler
+        args: Command arguments
+
+    Returns:
+        Captured output text
+    """
+    buffer = io.StringIO()
+    with redirect_thread_output(buffer):
+        handler(args)
+    return buffer.getvalue()
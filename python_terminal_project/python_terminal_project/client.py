@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Thin client for the Python Command Terminal daemon (see server.py).
+This module imports only the standard library pieces it needs, so it starts fast.
+"""
+
+import json
+import os
+import socket
+import sys
+from typing import Iterable, List, Optional
+
+
+def default_socket_path() -> str:
+    """Return the per-user default socket path (must match server.py)."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return os.path.join(runtime_dir, f"pct-{os.getuid()}.sock")
+
+
+class TerminalClient:
+    """
+    Connection to a running terminal daemon.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path or default_socket_path())
+        self.reader = self.sock.makefile('rb')
+        # Start the remote session in our working directory
+        self._send({"cwd": os.getcwd()})
+
+    def _send(self, frame: dict) -> None:
+        self.sock.sendall(json.dumps(frame).encode() + b"\n")
+
+    def run(self, line: str, out=None) -> int:
+        """
+        Run a command line remotely, streaming its output.
+
+        Args:
+            line: Command line to run
+            out: Stream to write output to (defaults to sys.stdout)
+
+        Returns:
+            Exit status of the command
+        """
+        out = out or sys.stdout
+        self._send({"line": line})
+        for raw in self.reader:
+            frame = json.loads(raw)
+            if 'out' in frame:
+                out.write(frame['out'])
+            elif 'status' in frame:
+                return frame['status']
+        raise ConnectionError("server closed the connection")
+
+    def close(self) -> None:
+        self.reader.close()
+        self.sock.close()
+
+
+def run_lines(client: TerminalClient, lines: Iterable[str], stop_on_error: bool) -> int:
+    """Run lines over one connection, returning the last exit status."""
+    status = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.split()[0].lower() in ('exit', 'quit'):
+            break
+        status = client.run(line)
+        if status and stop_on_error:
+            break
+    return status
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point: pct-client [--socket PATH] [-e] [-c COMMANDS | SCRIPT]
+
+    Without -c or a script, commands are read from stdin (or a prompt when
+    stdin is a terminal).
+    """
+    args = list(sys.argv[1:] if argv is None else argv)
+    socket_path = None
+    command = None
+    stop_on_error = False
+    script = None
+
+    while args:
+        arg = args.pop(0)
+        if arg == '--socket' and args:
+            socket_path = args.pop(0)
+        elif arg == '-c' and args:
+            command = args.pop(0)
+        elif arg in ('-e', '--errexit'):
+            stop_on_error = True
+        else:
+            script = arg
+
+    try:
+        client = TerminalClient(socket_path)
+    except OSError as e:
+        print(f"pct-client: cannot connect to server: {e.strerror or e}", file=sys.stderr)
+        return 1
+
+    try:
+        if command is not None:
+            return run_lines(client, command.splitlines(), stop_on_error)
+        if script and script != '-':
+            with open(script, 'r') as f:
+                return run_lines(client, f, stop_on_error)
+        if not sys.stdin.isatty():
+            return run_lines(client, sys.stdin, stop_on_error)
+
+        status = 0
+        while True:
+            try:
+                line = input("[pct]> ")
+            except EOFError:
+                print()
+                return status
+            except KeyboardInterrupt:
+                print()
+                continue
+            if line.strip().lower() in ('exit', 'quit'):
+                return status
+            if line.strip():
+                status = client.run(line)
+    except (ConnectionError, BrokenPipeError):
+        print("pct-client: lost connection to server", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
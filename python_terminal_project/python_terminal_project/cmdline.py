@@ -0,0 +1,457 @@
+"""
+Command-line parsing for the Python Command Terminal.
+This module splits command lines into words and operators, honouring quotes,
+backslash escapes and $VARIABLES, and expands {a,b} / {1..10} braces and
+*, ? and [...] wildcards.
+
+Parsing is cached per line, so scripts and loops that repeat lines skip the
+lexer; variables, braces and wildcards are expanded each time a line runs.
+Expansion is done with generators, so nested braces never build
+intermediate lists, but the words handed to a command are a list; a line
+that expands to more than MAX_EXPANDED_WORDS words is rejected.
+"""
+
+import fnmatch
+import functools
+import itertools
+import os
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# Number of distinct command lines whose parse is kept
+PARSE_CACHE_SIZE = 1024
+
+# Most words a command line may expand to, so '{1..100000000}' fails fast
+# instead of exhausting memory
+MAX_EXPANDED_WORDS = 100_000
+
+# Characters that make an unquoted word a wildcard pattern
+GLOB_CHARACTERS = frozenset('*?[')
+
+# Characters that end an unquoted word
+_WORD_BREAKS = frozenset(' \t\n;&|>')
+
+_VARIABLE_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_NUMERIC_RANGE = re.compile(r'^([-+]?\d+)\.\.([-+]?\d+)(?:\.\.([-+]?\d+))?$')
+_LETTER_RANGE = re.compile(r'^([A-Za-z])\.\.([A-Za-z])(?:\.\.([-+]?\d+))?$')
+_GLOB_ESCAPE = re.compile(r'([*?[])')
+
+# Word segment kinds
+LITERAL = 'literal'    # unquoted text: braces and wildcards apply
+QUOTED = 'quoted'      # quoted or escaped text, taken as is
+VARIABLE = 'variable'  # $NAME, replaced by its value taken as is
+
+
+class ParseError(Exception):
+    """Raised for malformed command lines, such as an unterminated quote."""
+
+
+class Operator(str):
+    """A shell operator ('|', '>', '>>', ';' or '&'), distinct from a quoted word."""
+
+
+class Word(NamedTuple):
+    """A word that needs expansion, as (kind, text) segments."""
+    segments: Tuple[Tuple[str, str], ...]
+
+
+Token = Union[str, Word, Operator]
+
+PIPE = Operator('|')
+REDIRECT = Operator('>')
+APPEND = Operator('>>')
+SEPARATOR = Operator(';')
+BACKGROUND = Operator('&')
+
+
+def _make_word(segments: List[Tuple[str, str]]) -> Union[str, Word]:
+    """Collapse a word that needs no expansion to a plain string."""
+    if all(kind == QUOTED for kind, _ in segments):
+        return ''.join(text for _, text in segments)
+    if len(segments) == 1 and segments[0][0] == LITERAL:
+        text = segments[0][1]
+        if '{' not in text and not GLOB_CHARACTERS.intersection(text):
+            return text
+    return Word(tuple(segments))
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse(line: str) -> Tuple[Tuple[Token, ...], Tuple[Tuple[int, int], ...]]:
+    """
+    Lex a command line.
+
+    Args:
+        line: Command line
+
+    Returns:
+        Tuple of (tokens, statement_spans). Tokens are plain strings for words
+        that need no expansion, Word for the rest, and Operator. Each span is
+        the (start, end) offsets of a statement, which ends after ';', '&' or
+        a newline.
+
+    Raises:
+        ParseError: If a quote is not terminated, a variable is malformed or
+            the line uses '&&' or '||'
+    """
+    tokens: List[Token] = []
+    spans: List[Tuple[int, int]] = []
+    statement_start = 0
+    segments: List[Tuple[str, str]] = []
+    literal: List[str] = []
+    in_word = False
+    i, length = 0, len(line)
+
+    def end_literal() -> None:
+        if literal:
+            segments.append((LITERAL, ''.join(literal)))
+            literal.clear()
+
+    def end_word() -> None:
+        nonlocal in_word
+        end_literal()
+        if in_word:
+            tokens.append(_make_word(segments[:]))
+            segments.clear()
+            in_word = False
+
+    def end_statement(end: int) -> None:
+        nonlocal statement_start
+        if line[statement_start:end].strip():
+            spans.append((statement_start, end))
+        statement_start = end
+
+    while i < length:
+        char = line[i]
+
+        if char == '>' and in_word and literal and literal[-1] == '=':
+            # '=>' (as in 'ai --learn PHRASE => COMMAND') is a word, not a redirect
+            literal.append(char)
+            i += 1
+            continue
+
+        if char in _WORD_BREAKS:
+            end_word()
+            if char in ' \t':
+                i += 1
+            elif char == '\n':
+                end_statement(i)
+                i += 1
+                statement_start = i
+            elif char in '&|' and line.startswith(char * 2, i):
+                # Not implemented yet; lexing them as two operators would
+                # quietly background or pipe the first command
+                raise ParseError(f"'{char * 2}' is not supported; use ';' to run commands in sequence")
+            elif char == '>' and line.startswith('>>', i):
+                tokens.append(APPEND)
+                i += 2
+            else:
+                operator = {'|': PIPE, '>': REDIRECT, ';': SEPARATOR, '&': BACKGROUND}[char]
+                tokens.append(operator)
+                i += 1
+                if operator is SEPARATOR:
+                    end_statement(i - 1)
+                    statement_start = i
+                elif operator is BACKGROUND:
+                    end_statement(i)
+            continue
+
+        if char == '#' and not in_word:
+            # Comment to the end of the line
+            newline = line.find('\n', i)
+            i = length if newline < 0 else newline
+            continue
+
+        in_word = True
+        if char == "'":
+            end = line.find("'", i + 1)
+            if end < 0:
+                raise ParseError("unterminated single quote")
+            end_literal()
+            segments.append((QUOTED, line[i + 1:end]))
+            i = end + 1
+        elif char == '"':
+            end_literal()
+            i = _parse_double_quoted(line, i + 1, segments)
+        elif char == '\\':
+            end_literal()
+            if i + 1 < length and line[i + 1] != '\n':
+                segments.append((QUOTED, line[i + 1]))
+            i += 2
+        elif char == '$':
+            name, i = _parse_variable(line, i)
+            if name is None:
+                literal.append('$')
+            else:
+                end_literal()
+                segments.append((VARIABLE, name))
+        else:
+            literal.append(char)
+            i += 1
+
+    end_word()
+    end_statement(length)
+    return tuple(tokens), tuple(spans)
+
+
+def _parse_double_quoted(line: str, i: int, segments: List[Tuple[str, str]]) -> int:
+    """Parse the inside of a double-quoted string starting at i; return the index after it."""
+    text: List[str] = []
+    while i < len(line):
+        char = line[i]
+        if char == '"':
+            # Keep empty quotes as an (empty) argument
+            segments.append((QUOTED, ''.join(text)))
+            return i + 1
+        if char == '\\' and i + 1 < len(line) and line[i + 1] in '"\\$`':
+            text.append(line[i + 1])
+            i += 2
+        elif char == '$':
+            name, i = _parse_variable(line, i)
+            if name is None:
+                text.append('$')
+            else:
+                segments.append((QUOTED, ''.join(text)))
+                text.clear()
+                segments.append((VARIABLE, name))
+        else:
+            text.append(char)
+            i += 1
+    raise ParseError("unterminated double quote")
+
+
+def _parse_variable(line: str, i: int) -> Tuple[Optional[str], int]:
+    """
+    Parse $NAME or ${NAME} at i.
+
+    Returns:
+        Tuple of (name, next_index); name is None if '$' is not a variable
+    """
+    if line.startswith('${', i):
+        end = line.find('}', i + 2)
+        if end < 0:
+            raise ParseError("unterminated ${")
+        name = line[i + 2:end]
+        if not _VARIABLE_NAME.fullmatch(name):
+            raise ParseError(f"bad substitution: ${{{name}}}")
+        return name, end + 1
+    match = _VARIABLE_NAME.match(line, i + 1)
+    if match is None:
+        return None, i + 1
+    return match.group(), match.end()
+
+
+def split_statements(line: str) -> List[str]:
+    """
+    Split a command line into statements at unquoted ';', '&' and newlines.
+
+    A statement ending in '&' keeps it, so it still runs in the background.
+
+    Raises:
+        ParseError: If the line is malformed
+    """
+    _, spans = parse(line)
+    return [line[start:end].strip() for start, end in spans]
+
+
+def tokenize(line: str) -> List[Union[str, Operator]]:
+    """
+    Parse and expand a command line into words and operators.
+
+    Raises:
+        ParseError: If the line is malformed or expands to more than
+            MAX_EXPANDED_WORDS words
+    """
+    tokens, _ = parse(line)
+    words = list(itertools.islice(expand(tokens), MAX_EXPANDED_WORDS + 1))
+    if len(words) > MAX_EXPANDED_WORDS:
+        raise ParseError(f"expansion produces more than {MAX_EXPANDED_WORDS} words")
+    return words
+
+
+def expand(tokens: Iterable[Token]) -> Iterator[Union[str, Operator]]:
+    """Expand parsed tokens, lazily, into words and operators."""
+    for token in tokens:
+        if isinstance(token, Word):
+            yield from expand_word(token)
+        else:
+            yield token
+
+
+def expand_word(word: Word) -> Iterator[str]:
+    """
+    Expand one word: braces first, then variables, then wildcards.
+
+    A wildcard that matches nothing is kept as typed. An unquoted word that
+    expands to nothing (such as an unset variable) is dropped.
+    """
+    quoted = any(kind == QUOTED for kind, _ in word.segments)
+
+    for texts in _segment_combinations(word.segments, 0):
+        value: List[str] = []
+        pattern: List[str] = []
+        magic = False
+        for (kind, _), text in zip(word.segments, texts):
+            if kind == VARIABLE:
+                text = os.environ.get(text, '')
+            if kind == LITERAL:
+                magic = magic or not GLOB_CHARACTERS.isdisjoint(text)
+                pattern.append(text)
+            else:
+                pattern.append(_GLOB_ESCAPE.sub(r'[\1]', text))
+            value.append(text)
+
+        text = ''.join(value)
+        if magic:
+            matched = False
+            for path in glob(''.join(pattern)):
+                matched = True
+                yield path
+            if matched:
+                continue
+        if text or quoted:
+            yield text
+
+
+def _segment_combinations(segments: Tuple[Tuple[str, str], ...], index: int) -> Iterator[Tuple[str, ...]]:
+    """Lazily yield every combination of the segments' brace expansions."""
+    if index == len(segments):
+        yield ()
+        return
+    kind, text = segments[index]
+    for head in (expand_braces(text) if kind == LITERAL else (text,)):
+        for tail in _segment_combinations(segments, index + 1):
+            yield (head,) + tail
+
+
+def expand_braces(text: str) -> Iterator[str]:
+    """
+    Lazily expand brace expressions in unquoted text.
+
+    Supports lists ({a,b,c}), numeric ranges with optional step and zero
+    padding ({1..10}, {01..100..5}) and letter ranges ({a..z}). Braces nest.
+    Text without a valid brace expression is yielded unchanged.
+    """
+    found = _find_brace(text)
+    if found is None:
+        yield text
+        return
+    start, end, alternatives = found
+    prefix, suffix = text[:start], text[end + 1:]
+    for alternative in alternatives:
+        for head in expand_braces(alternative):
+            for tail in expand_braces(suffix):
+                yield prefix + head + tail
+
+
+def _find_brace(text: str) -> Optional[Tuple[int, int, Iterable[str]]]:
+    """Find the first expandable brace expression: (start, end, alternatives)."""
+    search_from = 0
+    while True:
+        start = text.find('{', search_from)
+        if start < 0:
+            return None
+
+        depth = 0
+        commas = []
+        end = None
+        for i in range(start, len(text)):
+            if text[i] == '{':
+                depth += 1
+            elif text[i] == '}':
+                depth -= 1
+                if depth == 0:
+                    end = i
+                    break
+            elif text[i] == ',' and depth == 1:
+                commas.append(i)
+        if end is None:
+            return None
+
+        body = text[start + 1:end]
+        if commas:
+            bounds = [start] + commas + [end]
+            return start, end, [text[a + 1:b] for a, b in zip(bounds, bounds[1:])]
+        sequence = _range_sequence(body)
+        if sequence is not None:
+            return start, end, sequence
+        search_from = start + 1
+
+
+def _range_sequence(body: str) -> Optional[Iterator[str]]:
+    """Return a generator for a {x..y[..step]} range body, or None."""
+    match = _NUMERIC_RANGE.match(body)
+    if match:
+        first, last = int(match.group(1)), int(match.group(2))
+        step = abs(int(match.group(3) or 1)) or 1
+        # Zero-pad to the widest endpoint if either is written with a leading zero
+        padded = any(re.match(r'^[-+]?0\d', bound) for bound in match.group(1, 2))
+        width = max(len(match.group(1)), len(match.group(2))) if padded else 0
+        stop, step = (last + 1, step) if first <= last else (last - 1, -step)
+        return (str(n).zfill(width) for n in range(first, stop, step))
+
+    match = _LETTER_RANGE.match(body)
+    if match:
+        first, last = ord(match.group(1)), ord(match.group(2))
+        step = abs(int(match.group(3) or 1)) or 1
+        stop, step = (last + 1, step) if first <= last else (last - 1, -step)
+        return (chr(n) for n in range(first, stop, step))
+    return None
+
+
+def glob(pattern: str) -> Iterator[str]:
+    """
+    Lazily yield paths matching a wildcard pattern, relative to the session's
+    working directory and in sorted order per directory.
+
+    Each directory named by a wildcard component is read with one scandir
+    call. Hidden entries only match components that start with '.'.
+    """
+    if pattern.startswith(os.sep):
+        return _glob(os.sep, pattern.lstrip(os.sep).split(os.sep))
+    return _glob('', pattern.split(os.sep))
+
+
+def _glob(prefix: str, parts: List[str]) -> Iterator[str]:
+    from metrics import count_op
+    from session import current_session
+
+    part, rest = parts[0], parts[1:]
+    if not part:
+        # Trailing separator: the prefix itself (already known to be a directory)
+        if not rest:
+            yield prefix
+        else:
+            yield from _glob(prefix, rest)
+        return
+
+    session = current_session()
+    if GLOB_CHARACTERS.isdisjoint(part):
+        path = prefix + part
+        if rest:
+            yield from _glob(path + os.sep, rest)
+        elif os.path.lexists(session.resolve(path)):
+            yield path
+        return
+
+    count_op('scandir')
+    try:
+        with os.scandir(session.resolve(prefix or '.')) as items:
+            names = sorted(
+                item.name for item in items
+                if (not item.name.startswith('.') or part.startswith('.'))
+                and (not rest or item.is_dir())
+                and fnmatch.fnmatch(item.name, part)
+            )
+    except OSError:
+        return
+
+    for name in names:
+        if rest:
+            yield from _glob(prefix + name + os.sep, rest)
+        else:
+            yield prefix + name
+
+
+def cache_info():
+    """Return hit/miss statistics of the parse cache."""
+    return parse.cache_info()
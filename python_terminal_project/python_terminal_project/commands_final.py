@@ -4,12 +4,27 @@ This module contains all the command implementations.
 """
 
 import os
-import datetime
-import platform
-import psutil
-from typing import List, Callable, Dict, Any
-from history_windows import show_history, add_to_history
-from ai_commands import interpret_natural_command
+import fnmatch
+import time
+from typing import List, Callable, Dict, Any, Iterator, NamedTuple
+from history_windows import show_history, add_to_history, iter_history, iter_history_entries
+from cancel import check_cancelled
+import metrics
+from metrics import count_op
+from records import (
+    DirectoryRecord, ErrorRecord, FileRecord, HistoryRecord, JobRecord, PathRecord,
+    iter_file_records, path_error, sysinfo_record
+)
+from session import current_session
+from jobs import Job, current_jobs, parse_job_id
+from output import OutputWriter, format_columns, terminal_width
+from pipestatus import set_stage_status
+from registry import (
+    COMPLETE_DIR, COMPLETE_JOB, COMPLETE_PATH, KIND_CPU, RETURNS_BOOL, RETURNS_STATUS, registry
+)
+
+# Options of the 'ai' command, offered as completions
+AI_OPTIONS = ('--confirm', '--learn', '--forget', '--stats')
 
 
 def get_human_readable_size(size_bytes: int) -> str:
@@ -29,70 +44,101 @@ def get_human_readable_size(size_bytes: int) -> str:
     return f"{size_bytes:.1f} PB"
 
 
-def list_directory_contents(path: str = ".") -> List[str]:
+def format_directory_entry(record: FileRecord) -> str:
     """
-    List contents of a directory with file details.
+    Format a single directory entry with its type, size and modification time.
 
     Args:
-        path: Directory path to list (default: current directory)
+        record: Entry from iter_file_records
 
     Returns:
-        List of formatted file/directory entries
+        Formatted entry line
     """
-    try:
-        entries = []
-        with os.scandir(path) as items:
-            for item in items:
-                # Get file stats
-                stat = item.stat()
+    # Format file size
+    size = get_human_readable_size(record.size)
+
+    # Format modification time
+    mod_time_str = time.strftime("%b %d %H:%M", time.localtime(record.mtime))
 
-                # Format file size
-                size = get_human_readable_size(stat.st_size)
+    # Determine if it's a directory
+    item_type = "d" if record.type == "dir" else "-"
 
-                # Format modification time
-                mod_time = datetime.datetime.fromtimestamp(stat.st_mtime)
-                mod_time_str = mod_time.strftime("%b %d %H:%M")
+    # Format: permissions type size mod_time name
+    return f"{item_type} {size:>8} {mod_time_str} {record.name}"
 
-                # Determine if it's a directory
-                item_type = "d" if item.is_dir() else "-"
 
-                # Format: permissions type size mod_time name
-                entry = f"{item_type} {size:>8} {mod_time_str} {item.name}"
-                entries.append(entry)
+def iter_directory_entries(path: str = ".") -> Iterator[str]:
+    """
+    Lazily yield formatted entries of a directory in scandir order.
+
+    Args:
+        path: Directory path to list (default: current directory)
+
+    Yields:
+        Formatted file/directory entries
+
+    Raises:
+        OSError: If the directory cannot be read
+    """
+    for record in iter_file_records(path):
+        yield format_directory_entry(record)
+
+
+def list_directory_contents(path: str = ".") -> List[str]:
+    """
+    List contents of a directory with file details.
+
+    Args:
+        path: Directory path to list (default: current directory)
 
-        return sorted(entries)
+    Returns:
+        List of formatted file/directory entries
+    """
+    try:
+        return sorted(iter_directory_entries(path))
     except PermissionError:
         return ["Error: Permission denied"]
     except FileNotFoundError:
         return ["Error: Directory not found"]
 
 
+@registry.command('ls', completion=COMPLETE_DIR, help="List directory contents (-C for names in columns)")
 def handle_ls(args: List[str]) -> None:
     """
     Handle the 'ls' command.
 
     Args:
-        args: Command arguments
+        args: Command arguments (-C lists names only, in columns)
     """
-    # Default to current directory
-    target_path = "."
+    columns = '-C' in args
+    paths = [arg for arg in args if not arg.startswith('-')]
 
-    # Check if a path was provided
-    if args and len(args) > 0:
-        target_path = args[0]
+    # Default to current directory
+    target_path = paths[0] if paths else "."
 
     # Get directory contents
-    contents = list_directory_contents(target_path)
+    full_path = current_session().resolve(target_path)
+    if columns:
+        try:
+            with os.scandir(full_path) as items:
+                names = sorted(item.name for item in items)
+            contents = format_columns(names, terminal_width() - 2)
+        except OSError as e:
+            print(f"ls: {target_path}: {e.strerror}")
+            return
+    else:
+        contents = list_directory_contents(full_path)
 
     # Display results
     if contents:
-        print(f"Contents of {os.path.abspath(target_path)}:")
-        for item in contents:
-            print(f"  {item}")
+        print(f"Contents of {full_path}:")
+        with OutputWriter() as out:
+            out.write_lines(f"  {item}" for item in contents)
     else:
         print("Directory is empty")
 
 
+@registry.command('cd', returns=RETURNS_BOOL, completion=COMPLETE_DIR, help="Change directory")
 def handle_cd(args: List[str]) -> bool:
     """
     Handle the 'cd' command.
@@ -110,7 +156,7 @@ def handle_cd(args: List[str]) -> bool:
     target_dir = args[0]
 
     try:
-        os.chdir(target_dir)
+        current_session().chdir(target_dir)
         return True
     except FileNotFoundError:
         print(f"cd: {target_dir}: No such file or directory")
@@ -123,6 +169,7 @@ def handle_cd(args: List[str]) -> bool:
         return False
 
 
+@registry.command('pwd', help="Show current working directory")
 def handle_pwd(args: List[str]) -> None:
     """
     Handle the 'pwd' command to show current working directory.
@@ -130,9 +177,10 @@ def handle_pwd(args: List[str]) -> None:
     Args:
         args: Command arguments (ignored)
     """
-    print(os.getcwd())
+    print(current_session().cwd)
 
 
+@registry.command('sysinfo', help="Show system information")
 def handle_sysinfo(args: List[str]) -> None:
     """
     Handle the 'sysinfo' command to display system information.
@@ -140,26 +188,24 @@ def handle_sysinfo(args: List[str]) -> None:
     Args:
         args: Command arguments (ignored)
     """
+    info = sysinfo_record()
     print("System Information:")
-    print(f"  Platform: {platform.system()} {platform.release()}")
-    print(f"  Machine: {platform.machine()}")
+    print(f"  Platform: {info.system} {info.release}")
+    print(f"  Machine: {info.machine}")
 
-    # CPU information
-    try:
-        cpu_percent = psutil.cpu_percent(interval=1)
-        print(f"  CPU Usage: {cpu_percent}%")
-    except Exception as e:
-        print(f"  CPU Usage: Unable to get CPU info ({e})")
+    if info.cpu_percent is not None:
+        print(f"  CPU Usage: {info.cpu_percent}%")
+    else:
+        print("  CPU Usage: Unable to get CPU info")
 
-    # Memory information
-    try:
-        memory = psutil.virtual_memory()
-        print(f"  Memory: {get_human_readable_size(memory.used)} / {get_human_readable_size(memory.total)}")
-        print(f"  Memory Usage: {memory.percent}%")
-    except Exception as e:
-        print(f"  Memory: Unable to get memory info ({e})")
+    if info.memory_total is not None:
+        print(f"  Memory: {get_human_readable_size(info.memory_used)} / {get_human_readable_size(info.memory_total)}")
+        print(f"  Memory Usage: {info.memory_percent}%")
+    else:
+        print("  Memory: Unable to get memory info")
 
 
+@registry.command('mkdir', returns=RETURNS_BOOL, completion=COMPLETE_PATH, help="Create directory")
 def handle_mkdir(args: List[str]) -> bool:
     """
     Handle the 'mkdir' command to create directories.
@@ -175,8 +221,9 @@ def handle_mkdir(args: List[str]) -> bool:
         return False
 
     for dir_name in args:
+        check_cancelled()
         try:
-            os.makedirs(dir_name, exist_ok=True)
+            current_session().mkdir(dir_name)
             print(f"Created directory: {dir_name}")
         except PermissionError:
             print(f"mkdir: {dir_name}: Permission denied")
@@ -188,6 +235,8 @@ def handle_mkdir(args: List[str]) -> bool:
     return True
 
 
+@registry.command('rm', returns=RETURNS_BOOL, completion=COMPLETE_PATH,
+                  help="Remove files/directories (use -r for directories)")
 def handle_rm(args: List[str]) -> bool:
     """
     Handle the 'rm' command to remove files/directories.
@@ -205,18 +254,20 @@ def handle_rm(args: List[str]) -> bool:
     recursive = '-r' in args
     targets = [arg for arg in args if arg != '-r']
 
+    session = current_session()
     for target in targets:
+        check_cancelled()
         try:
-            if os.path.isdir(target):
+            # A symlink is removed itself, never the directory it points to
+            if session.isdir(target, follow_symlinks=False):
                 if recursive:
-                    import shutil
-                    shutil.rmtree(target)
+                    session.remove_tree(target)
                     print(f"Removed directory: {target}")
                 else:
                     print(f"rm: {target}: is a directory (use -r to remove directories)")
                     return False
             else:
-                os.remove(target)
+                session.unlink(target)
                 print(f"Removed file: {target}")
         except FileNotFoundError:
             print(f"rm: {target}: No such file or directory")
@@ -231,6 +282,7 @@ def handle_rm(args: List[str]) -> bool:
     return True
 
 
+@registry.command('exit', aliases=('quit',), help="Exit the terminal")
 def handle_exit(args: List[str]) -> bool:
     """
     Handle the 'exit' command to quit the terminal.
@@ -245,6 +297,7 @@ def handle_exit(args: List[str]) -> bool:
     return True
 
 
+@registry.command('help', help="Show this help message")
 def handle_help(args: List[str]) -> None:
     """
     Handle the 'help' command to show available commands.
@@ -253,22 +306,30 @@ def handle_help(args: List[str]) -> None:
         args: Command arguments (ignored)
     """
     print("Available commands:")
-    print("  ls       - List directory contents")
-    print("  cd       - Change directory")
-    print("  pwd      - Show current working directory")
-    print("  mkdir    - Create directory")
-    print("  rm       - Remove files/directories (use -r for directories)")
-    print("  sysinfo  - Show system information")
-    print("  history  - Show command history")
-    print("  help     - Show this help message")
-    print("  exit     - Exit the terminal")
-    print("  quit     - Exit the terminal")
+    for line in registry.help_lines():
+        print(line)
+    print("\nStream commands, pipelines and redirection:")
+    print("  find     - List files below a directory (-name PATTERN, -type f|d)")
+    print("  cat      - Print files")
+    print("  timeout  - Run a command with a time limit: timeout 5 ls /mnt/slow")
+    print("  time     - Report a command's wall, CPU time and memory: time find . | count")
+    print("  parallel - Run a command over many arguments: parallel -j 8 mkdir ::: a b c")
+    print("             -k keeps input order; -u interleaves output line by line")
+    print("  ls | grep log | head 10      - Filters: grep, head, tail, sort, uniq, count")
+    print("  find . -name '*.py' > files.txt   - '>' overwrites, '>>' appends")
+    print("  rm -r build &                - Run a command in the background")
+    print("  ls --json                    - JSON Lines output (also --format=jsonl)")
+    print("  rm *.log; mkdir dir{1..10}   - Wildcards, braces, \"quotes\" and $VARIABLES")
+    print("  git status | head 5          - Other commands run programs found on PATH")
     print("\nYou can also use natural language commands:")
     print("  'create folder test' instead of 'mkdir test'")
     print("  'show me files' instead of 'ls'")
     print("  'go to Documents' instead of 'cd Documents'")
+    print("Use 'ai --confirm' to remember the last interpretation, or")
+    print("'ai --learn <phrase> => <command>' to teach a new one.")
 
 
+@registry.command('history', help="Show command history")
 def handle_history(args: List[str]) -> None:
     """
     Handle the 'history' command to show command history.
@@ -279,16 +340,28 @@ def handle_history(args: List[str]) -> None:
     show_history()
 
 
-def handle_ai_command(args: List[str]) -> None:
+@registry.command('ai', returns=RETURNS_STATUS, completion=AI_OPTIONS,
+                  help="Run a natural language command: ai show me files")
+def handle_ai_command(args: List[str]) -> int:
     """
     Handle natural language commands.
 
     Args:
         args: Command arguments (the natural language input)
+
+    Returns:
+        Exit status of the interpreted command, or 1 if it was not understood
     """
     if not args:
         print("Please provide a natural language command.")
-        return
+        return 1
+
+    if args[0].startswith('--'):
+        handle_ai_option(args[0], args[1:])
+        return 0
+
+    # The AI processor compiles its patterns and index on first use
+    from ai_commands import interpret_natural_command
 
     natural_input = " ".join(args)
     command, cmd_args = interpret_natural_command(natural_input)
@@ -296,34 +369,398 @@ def handle_ai_command(args: List[str]) -> None:
     if command:
         print(f"Interpreted as: {command} {' '.join(cmd_args)}")
         # Execute the interpreted command
-        if command in COMMAND_HANDLERS:
-            handler = COMMAND_HANDLERS[command]
-            if command in ['cd', 'mkdir', 'rm', 'exit']:
-                result = handler(cmd_args)
-                if command == 'exit' and result:
-                    return
-                elif command in ['cd', 'mkdir', 'rm'] and not result:
-                    return
+        if command in registry:
+            return registry.run(command, cmd_args)
+        print(f"Unknown command: {command}")
+        return 1
+
+    print("Sorry, I couldn't understand that command.")
+    print("Try: 'create folder test', 'show me files', 'go to Documents'")
+    return 1
+
+
+def ls_records(args: List[str]) -> Iterator[NamedTuple]:
+    """
+    Yield a FileRecord per entry of a directory, sorted by name.
+
+    With -U entries are produced in directory order as they are read, so a
+    downstream consumer can stop the scan early. A failure to read the
+    directory is yielded as an ErrorRecord.
+
+    Args:
+        args: Command arguments
+    """
+    unsorted = '-U' in args
+    paths = [arg for arg in args if not arg.startswith('-')]
+    target_path = paths[0] if paths else "."
+
+    try:
+        records = iter_file_records(current_session().resolve(target_path))
+        yield from (records if unsorted else sorted(records, key=lambda record: record.name))
+    except FileNotFoundError:
+        yield path_error("ls", target_path, "No such file or directory")
+    except PermissionError:
+        yield path_error("ls", target_path, "Permission denied")
+    except NotADirectoryError:
+        yield path_error("ls", target_path, "Not a directory")
+
+
+def stream_ls(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """
+    Stream form of 'ls' for pipelines: yields entries without a header.
+
+    Args:
+        args: Command arguments (-U streams entries unsorted)
+        lines: Upstream input (ignored)
+    """
+    entries = format_records(ls_records(args + ['-U']), format_directory_entry)
+    yield from (entries if '-U' in args else sorted(entries))
+
+
+def find_records(args: List[str]) -> Iterator[NamedTuple]:
+    """
+    Yield a PathRecord per path below a directory, walking it lazily.
+
+    Usage: find [path] [-name PATTERN] [-type f|d]
+
+    Paths are reported relative to the root as the user wrote it. Unreadable
+    directories are yielded as ErrorRecords and the walk continues.
+
+    Args:
+        args: Command arguments
+    """
+    root = "."
+    name_pattern = None
+    entry_type = None
+
+    i = 0
+    while i < len(args):
+        if args[i] == '-name' and i + 1 < len(args):
+            name_pattern = args[i + 1]
+            i += 2
+        elif args[i] == '-type' and i + 1 < len(args):
+            entry_type = args[i + 1]
+            i += 2
+        else:
+            root = args[i]
+            i += 1
+
+    # Walk the resolved path but report paths the way the user wrote them
+    full_root = current_session().resolve(root)
+    shown_root = root.rstrip(os.sep) or root
+    pending = [full_root]
+    while pending:
+        directory = pending.pop()
+        shown = shown_root + directory[len(full_root):]
+        count_op('scandir')
+        try:
+            with os.scandir(directory) as items:
+                for item in items:
+                    check_cancelled()
+                    is_dir = item.is_dir(follow_symlinks=False)
+                    if is_dir:
+                        pending.append(item.path)
+                    if entry_type == 'f' and is_dir or entry_type == 'd' and not is_dir:
+                        continue
+                    if name_pattern and not fnmatch.fnmatch(item.name, name_pattern):
+                        continue
+                    yield PathRecord(os.path.join(shown, item.name), "dir" if is_dir else "file")
+        except FileNotFoundError:
+            # Subdirectories removed while walking are skipped silently
+            if directory == full_root:
+                yield path_error("find", shown, "No such file or directory")
+        except PermissionError:
+            yield path_error("find", shown, "Permission denied")
+        except NotADirectoryError:
+            yield path_error("find", shown, "Not a directory")
+
+
+def stream_find(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """
+    Stream the paths below a directory, walking it lazily.
+
+    Usage: find [path] [-name PATTERN] [-type f|d]
+
+    Args:
+        args: Command arguments
+        lines: Upstream input (ignored)
+    """
+    return format_records(find_records(args), lambda record: record.path)
+
+
+def pwd_records(args: List[str]) -> Iterator[NamedTuple]:
+    """Yield the session's working directory as a DirectoryRecord."""
+    yield DirectoryRecord(current_session().cwd)
+
+
+def stream_pwd(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """Stream form of 'pwd' for pipelines."""
+    yield current_session().cwd
+
+
+def history_records(args: List[str]) -> Iterator[NamedTuple]:
+    """Yield a HistoryRecord per recent command."""
+    for index, command in iter_history_entries():
+        yield HistoryRecord(index, command)
+
+
+def stream_history(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """Stream form of 'history' for pipelines: yields numbered entries."""
+    yield from iter_history()
+
+
+def sysinfo_records(args: List[str]) -> Iterator[NamedTuple]:
+    """Yield a single SysInfoRecord."""
+    yield sysinfo_record()
+
+
+def format_records(records: Iterator[NamedTuple], formatter: Callable[[Any], str]) -> Iterator[str]:
+    """
+    Render records as text lines for display.
+
+    ErrorRecords are printed as they arrive rather than passed downstream,
+    matching how errors from the text forms of commands behave, and fail
+    the pipeline stage.
+
+    Args:
+        records: Records from a *_records function
+        formatter: Turns one record into a line
+    """
+    for record in records:
+        if isinstance(record, ErrorRecord):
+            print(record.error)
+            set_stage_status(1)
+        else:
+            yield formatter(record)
+
+
+def report_job(job: Job) -> None:
+    """Print a finished job's remaining output and its completion notice."""
+    output = job.unread_output()
+    if output:
+        print(output, end="" if output.endswith("\n") else "\n")
+    print(f"[{job.job_id}] {job.state():<8} {job.command_line}")
+    job.reported = True
+
+
+def report_finished_jobs() -> None:
+    """Report background jobs that finished since the last report."""
+    for job in current_jobs().finished_unreported():
+        report_job(job)
+
+
+@registry.command('jobs', help="List background jobs")
+def handle_jobs(args: List[str]) -> None:
+    """
+    Handle the 'jobs' command to list background jobs.
+
+    Args:
+        args: Command arguments (ignored)
+    """
+    if not current_jobs().jobs:
+        print("No background jobs.")
+        return
+
+    for job in jobs_records(args):
+        print(f"[{job.job_id}] {job.state:<8} {job.elapsed:8.2f}s  {job.executor:<7}  {job.command}")
+
+
+def jobs_records(args: List[str]) -> Iterator[NamedTuple]:
+    """
+    Yield a JobRecord per background job.
+
+    Finished jobs are forgotten once they have all been listed.
+    """
+    for job in list(current_jobs().jobs.values()):
+        yield JobRecord(
+            job.job_id,
+            job.state(),
+            job.elapsed,
+            "process" if job.in_process else "thread",
+            job.command_line,
+            None if job.running else job.status
+        )
+    current_jobs().forget_finished()
+
+
+@registry.command('fg', completion=COMPLETE_JOB, help="Show a background job's output until it finishes")
+def handle_fg(args: List[str]) -> None:
+    """
+    Handle the 'fg' command to attach to a background job's output.
+
+    Args:
+        args: Optional job id (defaults to the most recent job)
+    """
+    job_id = parse_job_id(args[0]) if args else None
+    job = current_jobs().get(job_id)
+    if job is None:
+        print(f"fg: {args[0] if args else 'current'}: no such job")
+        return
+
+    print(job.command_line)
+    try:
+        while True:
+            output = job.unread_output()
+            if output:
+                print(output, end="", flush=True)
+            if not job.running:
+                break
+            current_jobs().wait([job], timeout=0.05)
+    except KeyboardInterrupt:
+        print(f"\n[{job.job_id}] still running in the background")
+        return
+
+    output = job.unread_output()
+    if output:
+        print(output, end="")
+    job.reported = True
+    if job.status:
+        print(f"[{job.job_id}] {job.state()}")
+
+
+@registry.command('wait', completion=COMPLETE_JOB, help="Wait for background jobs to finish")
+def handle_wait(args: List[str]) -> None:
+    """
+    Handle the 'wait' command to block until background jobs finish.
+
+    Args:
+        args: Job ids to wait for (defaults to all jobs)
+    """
+    if args:
+        jobs = []
+        for spec in args:
+            job_id = parse_job_id(spec)
+            job = current_jobs().get(job_id) if job_id is not None else None
+            if job is None:
+                print(f"wait: {spec}: no such job")
             else:
-                handler(cmd_args)
+                jobs.append(job)
+    else:
+        jobs = list(current_jobs().jobs.values())
+
+    current_jobs().wait(jobs)
+    for job in jobs:
+        if not job.reported:
+            report_job(job)
+
+
+@registry.command('stats', completion=('--reset',),
+                  help="Show per-command latency percentiles and syscall counts (--reset to clear)")
+def handle_stats(args: List[str]) -> None:
+    """
+    Handle the 'stats' command to show timings of commands run so far.
+
+    Args:
+        args: Optional --reset to clear the statistics
+    """
+    if '--reset' in args:
+        metrics.reset()
+        print("Statistics cleared.")
+        return
+
+    rows = list(stats_records(args))
+    if not rows:
+        print("No commands measured yet.")
+        return
+
+    print(f"{'COMMAND':<10} {'CALLS':>6} {'TOTAL ms':>10} {'P50 ms':>9} {'P95 ms':>9} "
+          f"{'P99 ms':>9} {'MAX ms':>9}  SYSCALLS")
+    for row in rows:
+        ops = ' '.join(f"{name}={count}" for name, count in sorted(row.ops.items()))
+        print(f"{row.command:<10} {row.calls:>6} {row.total_ns / 1e6:>10.2f} {row.p50_ns / 1e6:>9.3f} "
+              f"{row.p95_ns / 1e6:>9.3f} {row.p99_ns / 1e6:>9.3f} {row.max_ns / 1e6:>9.3f}  {ops}")
+
+
+def stats_records(args: List[str]) -> Iterator[NamedTuple]:
+    """Yield a StatsRecord per measured command, busiest first."""
+    yield from metrics.snapshot()
+
+
+registry.lazy('profile', 'profiler:handle_profile', returns=RETURNS_STATUS,
+              help="Profile a command: profile [-s] [-n N] [-o FILE] ls /big (-s samples stacks)")
+
+registry.lazy('hash', 'external:handle_hash', completion=(),
+              help="Show where programs were found on PATH (hash -r forgets them)")
+
+registry.lazy('watch', 'watcher:handle_watch', returns=RETURNS_STATUS,
+              help="Re-run a command: watch -n 2 sysinfo, watch --on-change DIR ls DIR")
+
+registry.lazy('less', 'pager:handle_less', returns=RETURNS_STATUS, aliases=('view',),
+              completion=COMPLETE_PATH, help="Page through a file or output: less big.log, ls | less")
+
+registry.lazy('mem', 'meminfo:handle_mem', returns=RETURNS_STATUS,
+              completion=('start', 'snapshot', 'top', 'diff', 'stop'),
+              help="Show memory use; mem start|snapshot|top|diff|stop traces allocations")
+
+registry.lazy('tar', 'archive:handle_tar', returns=RETURNS_STATUS, completion=COMPLETE_PATH,
+              help="Create, extract or list tar archives: tar czf out.tgz src, tar xf out.tgz -C dest")
+
+registry.lazy('zip', 'archive:handle_zip', returns=RETURNS_STATUS, completion=COMPLETE_PATH,
+              help="Create a zip archive: zip out.zip src")
+
+registry.lazy('unzip', 'archive:handle_unzip', returns=RETURNS_STATUS, completion=COMPLETE_PATH,
+              help="Extract or list a zip archive: unzip out.zip -d dest, unzip -l out.zip")
+
+registry.lazy('wc', 'wordcount:handle_wc', returns=RETURNS_STATUS, kind=KIND_CPU, completion=COMPLETE_PATH,
+              help="Count lines, words and bytes: wc big.log, wc -l -r src, cat f | wc -l")
+
+
+def handle_ai_option(option: str, args: List[str]) -> None:
+    """
+    Handle 'ai' options that manage the interpretation cache.
+
+    Args:
+        option: One of --confirm, --learn, --forget or --stats
+        args: Remaining arguments for the option
+    """
+    from ai_commands import interpretation_cache
+
+    if option == '--confirm':
+        confirmed = interpretation_cache.confirm_last()
+        if confirmed:
+            print(f"Learned: '{interpretation_cache.last_phrase}' -> {confirmed[0]} {' '.join(confirmed[1])}")
+        else:
+            print("ai: nothing to confirm")
+    elif option == '--learn':
+        if '=>' not in args:
+            print("ai: usage: ai --learn <phrase> => <command> [args...]")
+            return
+        split_at = args.index('=>')
+        phrase, target = args[:split_at], args[split_at + 1:]
+        if not phrase or not target:
+            print("ai: usage: ai --learn <phrase> => <command> [args...]")
+            return
+        interpretation_cache.learn(" ".join(phrase), target[0], target[1:])
+        print(f"Learned: '{' '.join(phrase)}' -> {' '.join(target)}")
+    elif option == '--forget':
+        if interpretation_cache.forget(" ".join(args)):
+            print(f"Forgot: '{' '.join(args)}'")
         else:
-            print(f"Unknown command: {command}")
+            print(f"ai: no cached interpretation for '{' '.join(args)}'")
+    elif option == '--stats':
+        stats = interpretation_cache.stats()
+        print("AI Interpretation Cache:")
+        print(f"  Cached entries: {stats['entries']}")
+        print(f"  Learned phrases: {stats['learned']}")
+        print(f"  Hits: {stats['hits']}")
+        print(f"  Misses: {stats['misses']}")
+        print(f"  Hit rate: {stats['hit_rate']:.1%}")
     else:
-        print("Sorry, I couldn't understand that command.")
-        print("Try: 'create folder test', 'show me files', 'go to Documents'")
-
-
-# Command registry
-COMMAND_HANDLERS: Dict[str, Callable] = {
-    'ls': handle_ls,
-    'cd': handle_cd,
-    'pwd': handle_pwd,
-    'mkdir': handle_mkdir,
-    'rm': handle_rm,
-    'sysinfo': handle_sysinfo,
-    'exit': handle_exit,
-    'quit': handle_exit,
-    'help': handle_help,
-    'history': handle_history,
-    'ai': handle_ai_command
+        print(f"ai: unknown option {option}")
+        print("Options: --confirm, --learn <phrase> => <command>, --forget <phrase>, --stats")
+
+
+# Command handlers by name (see registry.py for registration and metadata)
+COMMAND_HANDLERS = registry
+
+# Structured (record) forms of commands, used for --json output and as a
+# Python API. Each takes the command's arguments and yields NamedTuple records.
+RECORD_HANDLERS: Dict[str, Callable[[List[str]], Iterator[NamedTuple]]] = {
+    'ls': ls_records,
+    'find': find_records,
+    'pwd': pwd_records,
+    'sysinfo': sysinfo_records,
+    'history': history_records,
+    'jobs': jobs_records,
+    'stats': stats_records
 }
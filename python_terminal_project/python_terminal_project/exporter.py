@@ -0,0 +1,207 @@
+"""
+Metrics endpoint for the Python Command Terminal.
+This module serves command and host metrics over HTTP in the OpenMetrics
+text format, for Prometheus-compatible scrapers:
+
+    pct --metrics-port 9464        # then scrape http://127.0.0.1:9464/metrics
+
+The endpoint is opt-in and binds to localhost only. A background thread
+rebuilds the exposition every REFRESH_INTERVAL seconds (sampling host CPU
+over that interval, as 'sysinfo' does), and scrapes are answered from the
+last rendered copy, so they never wait on psutil or on running commands.
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Optional, Tuple
+
+import metrics
+from records import sysinfo_record
+
+# Address the endpoint listens on
+METRICS_HOST = '127.0.0.1'
+
+# Seconds between refreshes of the served metrics
+REFRESH_INTERVAL = 5.0
+
+# Latency histogram bucket bounds, in seconds
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the exposition format."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def metric_family(name: str, kind: str, help_text: str,
+                  samples: List[Tuple[str, str, object]]) -> Iterator[str]:
+    """
+    Yield the lines of one metric family.
+
+    Args:
+        name: Family name
+        kind: counter, gauge or histogram
+        help_text: Description
+        samples: (suffix, labels, value) tuples; labels are preformatted
+    """
+    yield f"# TYPE {name} {kind}"
+    yield f"# HELP {name} {help_text}"
+    for suffix, labels, value in samples:
+        yield f"{name}{suffix}{{{labels}}} {value}" if labels else f"{name}{suffix} {value}"
+
+
+def command_lines() -> Iterator[str]:
+    """Yield command dispatch counters, syscall counters and latency histograms."""
+    rows = metrics.snapshot()
+    yield from metric_family('pct_commands', 'counter', "Commands dispatched.", [
+        ('_total', f'command="{escape_label(row.command)}"', row.calls) for row in rows
+    ])
+    yield from metric_family('pct_command_syscalls', 'counter', "Filesystem calls made by commands.", [
+        ('_total', f'command="{escape_label(row.command)}",op="{op}"', count)
+        for row in rows for op, count in sorted(row.ops.items())
+    ])
+
+    bounds = [int(seconds * 1e9) for seconds in LATENCY_BUCKETS]
+    samples = []
+    for command, cumulative, count, total in metrics.histogram_snapshot(bounds):
+        label = f'command="{escape_label(command)}"'
+        for seconds, below in zip(LATENCY_BUCKETS, cumulative):
+            samples.append(('_bucket', f'{label},le="{seconds}"', below))
+        samples.append(('_bucket', f'{label},le="+Inf"', count))
+        samples.append(('_count', label, count))
+        samples.append(('_sum', label, total / 1e9))
+    yield from metric_family('pct_command_duration_seconds', 'histogram',
+                             "Command latency.", samples)
+
+
+def cache_lines() -> Iterator[str]:
+    """Yield hit and miss counters of the parse and AI interpretation caches."""
+    caches = []
+    cmdline = sys.modules.get('cmdline')
+    if cmdline is not None:
+        info = cmdline.cache_info()
+        caches.append(('parse', info.hits, info.misses, info.currsize))
+    ai_commands = sys.modules.get('ai_commands')
+    if ai_commands is not None:
+        stats = ai_commands.interpretation_cache.stats()
+        caches.append(('ai_interpretation', stats['hits'], stats['misses'], stats['entries']))
+
+    yield from metric_family('pct_cache_hits', 'counter', "Cache hits.", [
+        ('_total', f'cache="{name}"', hits) for name, hits, _, _ in caches
+    ])
+    yield from metric_family('pct_cache_misses', 'counter', "Cache misses.", [
+        ('_total', f'cache="{name}"', misses) for name, _, misses, _ in caches
+    ])
+    yield from metric_family('pct_cache_entries', 'gauge', "Entries held in a cache.", [
+        ('', f'cache="{name}"', entries) for name, _, _, entries in caches
+    ])
+
+
+def host_lines(info) -> Iterator[str]:
+    """Yield host gauges from a SysInfoRecord, skipping values psutil could not read."""
+    gauges = (
+        ('pct_host_cpu_percent', "Host CPU usage over the last refresh interval.", info.cpu_percent),
+        ('pct_host_memory_used_bytes', "Host memory in use.", info.memory_used),
+        ('pct_host_memory_total_bytes', "Host memory size.", info.memory_total),
+    )
+    for name, help_text, value in gauges:
+        if value is not None:
+            yield from metric_family(name, 'gauge', help_text, [('', '', value)])
+
+    try:
+        import psutil
+        rss = psutil.Process().memory_info().rss
+    except Exception:
+        return
+    yield from metric_family('pct_process_resident_memory_bytes', 'gauge',
+                             "Resident memory of the terminal process.", [('', '', rss)])
+
+
+def render(info=None) -> bytes:
+    """Render all metrics as an OpenMetrics exposition."""
+    lines = list(command_lines())
+    lines.extend(cache_lines())
+    if info is not None:
+        lines.extend(host_lines(info))
+    lines.append('# EOF')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class MetricsExporter:
+    """
+    Serves the latest rendered metrics from a localhost HTTP server.
+
+    Both the HTTP server and the refresher run on daemon threads.
+    """
+
+    def __init__(self, port: int, host: str = METRICS_HOST, interval: float = REFRESH_INTERVAL):
+        self.interval = interval
+        self.payload = render()
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = exporter.payload
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                # Request logs would interleave with the terminal's output
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def start(self) -> None:
+        threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+        threading.Thread(target=self._refresh, name="metrics-refresh", daemon=True).start()
+
+    def _refresh(self) -> None:
+        while True:
+            try:
+                # Sampling CPU over the interval doubles as the wait between refreshes
+                info = sysinfo_record(sample_seconds=self.interval)
+            except Exception:
+                info = None
+                time.sleep(self.interval)
+            self.payload = render(info)
+
+
+# The running exporter, if one was started
+exporter: Optional[MetricsExporter] = None
+
+
+def start_exporter(port: int) -> Optional[MetricsExporter]:
+    """
+    Start serving metrics on localhost.
+
+    Args:
+        port: TCP port (0 picks a free one)
+
+    Returns:
+        The exporter, or None if the port could not be bound
+    """
+    global exporter
+    try:
+        exporter = MetricsExporter(port)
+    except OSError as e:
+        print(f"pct: cannot serve metrics on {METRICS_HOST}:{port}: {e.strerror}", file=sys.stderr)
+        return None
+    exporter.start()
+    host, port = exporter.address
+    print(f"Serving metrics on http://{host}:{port}/metrics", file=sys.stderr)
+    return exporter
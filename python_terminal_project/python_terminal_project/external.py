@@ -0,0 +1,401 @@
+"""
+External programs for the Python Command Terminal.
+This module runs programs found on PATH when a command is not built in, and
+keeps a 'hash' table of where they were found.
+
+Lookups use a listing of each PATH directory (one scandir per directory)
+instead of probing every directory for every command. The listings are
+revalidated by comparing directory mtimes at most every PATH_CHECK_INTERVAL
+seconds, and only directories that changed are listed again.
+
+Children are started with os.posix_spawn when the session's working
+directory is the process's, and otherwise with subprocess (which also uses
+vfork or posix_spawn internally where it can). Their output is streamed in
+chunks as it arrives. When the terminal itself is on a TTY and the command
+is not redirected, the child inherits the terminal so interactive programs
+work.
+"""
+
+import codecs
+import contextvars
+import os
+import select
+import signal
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from cancel import CommandCancelled, current_token
+from metrics import count_op
+from output import is_terminal
+from pipestatus import set_stage_status
+from session import current_session
+
+if TYPE_CHECKING:
+    import subprocess
+
+# Seconds between checks of PATH directory mtimes
+PATH_CHECK_INTERVAL = 1.0
+
+# Bytes read from a child's output at a time
+READ_SIZE = 1 << 16
+
+# How long a cancelled child gets to exit after SIGTERM before SIGKILL
+KILL_GRACE_PERIOD = 1.0
+
+# Longest wait between checks for a child's exit or cancellation
+POLL_INTERVAL = 0.1
+
+# Signals Python ignores that children should get back at their defaults
+_RESET_SIGNALS = tuple(getattr(signal, name) for name in ('SIGPIPE', 'SIGXFSZ') if hasattr(signal, name))
+
+
+class PathCache:
+    """
+    Where commands were found on PATH, like a shell's 'hash' table.
+    """
+
+    def __init__(self):
+        self.path_value: Optional[str] = None
+        self.listings: Dict[str, Tuple[int, FrozenSet[str]]] = {}
+        self.found: Dict[str, Optional[str]] = {}
+        self.checked = 0.0
+        self._lock = threading.Lock()
+
+    def directories(self) -> List[str]:
+        return [directory or '.' for directory in (self.path_value or '').split(os.pathsep)]
+
+    def clear(self) -> None:
+        """Forget all lookups and listings."""
+        with self._lock:
+            self.listings.clear()
+            self.found.clear()
+            self.path_value = None
+
+    def _listing(self, directory: str) -> FrozenSet[str]:
+        entry = self.listings.get(directory)
+        if entry is None:
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+                count_op('stat')
+                with os.scandir(directory) as items:
+                    names = frozenset(item.name for item in items)
+                count_op('scandir')
+            except OSError:
+                mtime, names = 0, frozenset()
+            entry = self.listings[directory] = (mtime, names)
+        return entry[1]
+
+    def _revalidate(self) -> None:
+        """Drop listings of changed directories, and lookups if anything changed."""
+        path_value = os.environ.get('PATH', os.defpath)
+        if path_value != self.path_value:
+            self.path_value = path_value
+            self.listings.clear()
+            self.found.clear()
+            self.checked = time.monotonic()
+            return
+        if time.monotonic() - self.checked < PATH_CHECK_INTERVAL:
+            return
+
+        changed = False
+        for directory, (mtime, _) in list(self.listings.items()):
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                current = 0
+            count_op('stat')
+            if current != mtime:
+                del self.listings[directory]
+                changed = True
+        if changed:
+            self.found.clear()
+        self.checked = time.monotonic()
+
+    def lookup(self, name: str) -> Optional[str]:
+        """
+        Find an executable by name.
+
+        Args:
+            name: Command name, or a path containing a separator
+
+        Returns:
+            Absolute path of the executable, or None if not found
+        """
+        if os.sep in name or (os.altsep and os.altsep in name):
+            path = current_session().resolve(name)
+            return path if is_executable(path) else None
+
+        with self._lock:
+            self._revalidate()
+            if name in self.found:
+                return self.found[name]
+            path = None
+            for directory in self.directories():
+                if name in self._listing(directory):
+                    candidate = os.path.join(directory, name)
+                    if is_executable(candidate):
+                        path = os.path.abspath(candidate)
+                        break
+            # Misses are remembered too, so a mistyped name is not searched again
+            self.found[name] = path
+            return path
+
+    def entries(self) -> List[Tuple[str, str]]:
+        """Return (name, path) pairs of commands found so far."""
+        with self._lock:
+            return sorted((name, path) for name, path in self.found.items() if path)
+
+
+def is_executable(path: str) -> bool:
+    """Check whether path is an executable file."""
+    count_op('stat')
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+# Process-wide PATH lookup table
+path_cache = PathCache()
+
+
+class Child:
+    """A started external program."""
+
+    def __init__(self, pid: int, process: Optional["subprocess.Popen"] = None):
+        self.pid = pid
+        self.process = process
+        self.status: Optional[int] = None
+
+    def poll(self) -> Optional[int]:
+        """
+        Return the exit status if the child has exited, else None.
+
+        Children killed by a signal report 128 + the signal number, as in
+        POSIX shells.
+        """
+        if self.status is None:
+            if self.process is not None:
+                code = self.process.poll()
+            else:
+                pid, wait_status = os.waitpid(self.pid, os.WNOHANG)
+                if not pid:
+                    code = None
+                elif os.WIFSIGNALED(wait_status):
+                    code = -os.WTERMSIG(wait_status)
+                else:
+                    code = os.WEXITSTATUS(wait_status)
+            if code is not None:
+                self.status = 128 - code if code < 0 else code
+        return self.status
+
+    def wait(self) -> int:
+        """Wait for the child to exit, killing it if the command is cancelled."""
+        token = current_token()
+        delay = 0.001
+        while self.poll() is None:
+            if token.cancelled:
+                self.kill()
+                token.check()
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_INTERVAL)
+        return self.status
+
+    def kill(self) -> None:
+        """Terminate the child, escalating to SIGKILL if it does not exit."""
+        if self.poll() is not None:
+            return
+        try:
+            os.kill(self.pid, signal.SIGTERM)
+            deadline = time.monotonic() + KILL_GRACE_PERIOD
+            while self.poll() is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            if self.poll() is None:
+                os.kill(self.pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+                while self.poll() is None:
+                    time.sleep(0.01)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+
+
+def spawn(path: str, argv: List[str], stdin: Optional[int], stdout: Optional[int]) -> Child:
+    """
+    Start a program in the session's working directory.
+
+    Args:
+        path: Executable path
+        argv: Arguments including argv[0]
+        stdin: File descriptor for the child's stdin, or None to inherit
+        stdout: File descriptor for the child's stdout, or None to inherit
+
+    Returns:
+        The started child
+    """
+    cwd = current_session().cwd
+    if hasattr(os, 'posix_spawn') and cwd == os.getcwd():
+        file_actions = []
+        if stdin is not None:
+            file_actions.append((os.POSIX_SPAWN_DUP2, stdin, 0))
+        if stdout is not None:
+            file_actions.append((os.POSIX_SPAWN_DUP2, stdout, 1))
+        pid = os.posix_spawn(path, argv, os.environ, file_actions=file_actions,
+                             setsigdef=_RESET_SIGNALS)
+        return Child(pid)
+
+    import subprocess
+    process = subprocess.Popen(argv, executable=path, cwd=cwd, stdin=stdin, stdout=stdout)
+    return Child(process.pid, process)
+
+
+def iter_output(child: Child, fd: int) -> Iterator[str]:
+    """
+    Yield a child's output text as it arrives, until it closes its stdout.
+
+    Closing the iterator early, or cancelling the command, kills the child.
+    """
+    token = current_token()
+    decoder = codecs.getincrementaldecoder(getattr(sys.stdout, 'encoding', None) or 'utf-8')('replace')
+    finished = False
+    try:
+        while True:
+            if token.cancelled:
+                token.check()
+            if os.name == 'posix':
+                ready, _, _ = select.select([fd], [], [], POLL_INTERVAL)
+                if not ready:
+                    continue
+            data = os.read(fd, READ_SIZE)
+            if not data:
+                finished = True
+                tail = decoder.decode(b'', final=True)
+                if tail:
+                    yield tail
+                return
+            text = decoder.decode(data)
+            if text:
+                yield text
+    finally:
+        os.close(fd)
+        if not finished:
+            child.kill()
+
+
+def iter_lines(chunks: Iterator[str]) -> Iterator[str]:
+    """Split streamed text into lines without their newlines."""
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + chunk).split('\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def run_external(argv: List[str]) -> Optional[int]:
+    """
+    Run an external program, streaming its output to sys.stdout.
+
+    Args:
+        argv: Program name and arguments
+
+    Returns:
+        The program's exit status, or None if it was not found
+    """
+    path = path_cache.lookup(argv[0])
+    if path is None:
+        return None
+
+    sys.stdout.flush()
+    interactive = is_terminal(sys.stdout) and is_terminal(sys.stdin)
+    devnull = None if interactive else os.open(os.devnull, os.O_RDONLY)
+    try:
+        if interactive:
+            # The child writes straight to the terminal and can read from it
+            child = spawn(path, argv, None, None)
+        else:
+            read_fd, write_fd = os.pipe()
+            try:
+                child = spawn(path, argv, devnull, write_fd)
+            except BaseException:
+                os.close(read_fd)
+                raise
+            finally:
+                os.close(write_fd)
+            for text in iter_output(child, read_fd):
+                sys.stdout.write(text)
+    except OSError as e:
+        print(f"{argv[0]}: {e.strerror}")
+        return 126
+    finally:
+        if devnull is not None:
+            os.close(devnull)
+    return child.wait()
+
+
+def stream_external(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """
+    Run an external program as a pipeline stage.
+
+    The stage's input lines are written to the program's stdin from a helper
+    thread while its output is read here, so neither side can fill a pipe
+    and block the other.
+
+    Args:
+        args: Program name and arguments
+        lines: Input lines from the previous stage
+    """
+    path = path_cache.lookup(args[0])
+    if path is None:
+        raise FileNotFoundError(args[0])
+
+    stdin_read, stdin_write = os.pipe()
+    stdout_read, stdout_write = os.pipe()
+    try:
+        child = spawn(path, args, stdin_read, stdout_write)
+    except BaseException:
+        os.close(stdin_write)
+        os.close(stdout_read)
+        raise
+    finally:
+        os.close(stdin_read)
+        os.close(stdout_write)
+
+    encoding = getattr(sys.stdout, 'encoding', None) or 'utf-8'
+
+    def feed() -> None:
+        try:
+            with open(stdin_write, 'w', encoding=encoding, errors='replace') as f:
+                for line in lines:
+                    f.write(line + '\n')
+        except (BrokenPipeError, OSError):
+            pass  # The program stopped reading
+
+    feeder = threading.Thread(target=contextvars.copy_context().run, args=(feed,),
+                              name="pipeline-feed", daemon=True)
+    feeder.start()
+    try:
+        yield from iter_lines(iter_output(child, stdout_read))
+        set_stage_status(child.wait())
+    except CommandCancelled:
+        child.kill()
+        raise
+
+
+def handle_hash(args: List[str]) -> None:
+    """
+    Handle the 'hash' command: list or forget remembered program locations.
+
+    Args:
+        args: -r to forget all locations, or names to look up now
+    """
+    if args == ['-r']:
+        path_cache.clear()
+        return
+    for name in args:
+        if path_cache.lookup(name) is None:
+            print(f"hash: {name}: not found")
+    entries = path_cache.entries()
+    if not args:
+        if not entries:
+            print("hash: hash table empty")
+        for name, path in entries:
+            print(f"{name}\t{path}")
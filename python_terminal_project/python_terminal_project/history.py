@@ -4,7 +4,6 @@ Command history and auto-completion functionality for the Python Command Termina
 
 import os
 from typing import List, Optional
-import readline
 import atexit
 
 
@@ -57,6 +56,8 @@ class CommandHistory:
     def setup_readline(self) -> None:
         """Setup readline for command completion and history."""
         try:
+            import readline
+
             # Enable history
             for command in self.history:
                 readline.add_history(command)
@@ -101,20 +102,28 @@ class CommandHistory:
             print(f"{i:3d}  {command}")
 
 
-# Global history instance
-command_history = CommandHistory()
+# Global history instance, loaded on first use so startup does not read the file
+_command_history: Optional[CommandHistory] = None
+
+
+def get_command_history() -> CommandHistory:
+    """Return the global history, loading it on first use."""
+    global _command_history
+    if _command_history is None:
+        _command_history = CommandHistory()
+    return _command_history
 
 
 def add_to_history(command: str) -> None:
     """Add a command to the global history."""
-    command_history.add_command(command)
+    get_command_history().add_command(command)
 
 
 def get_history() -> List[str]:
     """Get the command history."""
-    return command_history.get_history()
+    return get_command_history().get_history()
 
 
 def show_history() -> None:
     """Show the command history."""
-    command_history.show_history()
+    get_command_history().show_history()
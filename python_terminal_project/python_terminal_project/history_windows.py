@@ -3,7 +3,10 @@ Command history functionality for Windows (without readline dependency).
 """
 
 import os
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
+
+from output import write_lines
+from session import current_session
 
 
 class CommandHistory:
@@ -11,14 +14,16 @@ class CommandHistory:
     Manages command history for the terminal (Windows-compatible version).
     """
 
-    def __init__(self, history_file: str = ".terminal_history"):
-        self.history_file = os.path.expanduser(history_file)
+    def __init__(self, history_file: Optional[str] = ".terminal_history"):
+        self.history_file = os.path.expanduser(history_file) if history_file else None
         self.history: List[str] = []
         self.max_history_size = 1000
         self.load_history()
 
     def load_history(self) -> None:
         """Load command history from file."""
+        if not self.history_file:
+            return
         try:
             if os.path.exists(self.history_file):
                 with open(self.history_file, 'r') as f:
@@ -28,6 +33,8 @@ class CommandHistory:
 
     def save_history(self) -> None:
         """Save command history to file."""
+        if not self.history_file:
+            return
         try:
             # Keep only the last max_history_size commands
             recent_history = self.history[-self.max_history_size:]
@@ -57,24 +64,66 @@ class CommandHistory:
             return
 
         print("Command History:")
-        for i, command in enumerate(self.history[-20:], 1):  # Show last 20 commands
-            print(f"{i:3d}  {command}")
+        write_lines(self.iter_history())
+
+    def iter_history(self, limit: int = 20) -> Iterator[str]:
+        """
+        Yield numbered history lines.
 
+        Args:
+            limit: Number of most recent commands to yield
+        """
+        for i, command in self.iter_entries(limit):
+            yield f"{i:3d}  {command}"
 
-# Global history instance
-command_history = CommandHistory()
+    def iter_entries(self, limit: int = 20) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (number, command) pairs for the most recent commands.
+
+        Args:
+            limit: Number of most recent commands to yield
+        """
+        return enumerate(self.history[-limit:], 1)
+
+
+# Global history instance, loaded on first use so startup does not read the file
+_command_history: Optional[CommandHistory] = None
+
+
+def get_command_history() -> CommandHistory:
+    """
+    Return the current session's history if it keeps its own, otherwise the
+    global history, loading it on first use.
+    """
+    global _command_history
+    session_history = current_session().history
+    if session_history is not None:
+        return session_history
+    if _command_history is None:
+        _command_history = CommandHistory()
+    return _command_history
 
 
 def add_to_history(command: str) -> None:
-    """Add a command to the global history."""
-    command_history.add_command(command)
+    """Add a command to the current history."""
+    get_command_history().add_command(command)
 
 
 def get_history() -> List[str]:
     """Get the command history."""
-    return command_history.get_history()
+    return get_command_history().get_history()
 
 
 def show_history() -> None:
     """Show the command history."""
-    command_history.show_history()
+    get_command_history().show_history()
+
+
+def iter_history(limit: int = 20) -> Iterator[str]:
+    """Yield numbered lines of the command history."""
+    return get_command_history().iter_history(limit)
+
+
+def iter_history_entries(limit: int = 20) -> Iterator[Tuple[int, str]]:
+    """Yield (number, command) pairs from the command history."""
+    return get_command_history().iter_entries(limit)
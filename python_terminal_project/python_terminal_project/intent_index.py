@@ -0,0 +1,118 @@
+"""
+Offline fuzzy intent matching for the Python Command Terminal.
+This module scores natural language input against example phrases using
+character n-gram TF-IDF vectors, with no network access or model downloads.
+"""
+
+import math
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+
+def char_ngrams(text: str, size: int = 3) -> Counter:
+    """
+    Split text into overlapping character n-grams.
+
+    Words are padded with spaces so prefixes and suffixes get their own
+    n-grams, which keeps short words like 'cd' or 'ls' distinguishable.
+
+    Args:
+        text: Input text (expected to be lowercased already)
+        size: Length of each n-gram
+
+    Returns:
+        Counter mapping each n-gram to its frequency
+    """
+    padded = f" {' '.join(text.split())} "
+    return Counter(padded[i:i + size] for i in range(len(padded) - size + 1))
+
+
+class IntentIndex:
+    """
+    TF-IDF index of example phrases, stored as a precomputed sparse matrix.
+
+    The matrix is kept column-wise: every n-gram maps to a pair of arrays
+    holding the example rows it appears in and the normalized weights. Scoring
+    a query is a single sparse matrix-vector product over the query's n-grams.
+    """
+
+    def __init__(self, examples: Dict[str, List[str]], ngram_size: int = 3):
+        self.ngram_size = ngram_size
+        self.row_intents: List[str] = []
+        row_ngrams: List[Counter] = []
+
+        for intent, phrases in examples.items():
+            for phrase in phrases:
+                self.row_intents.append(intent)
+                row_ngrams.append(char_ngrams(phrase.lower(), ngram_size))
+
+        # Inverse document frequency, smoothed so unseen-ish n-grams still count
+        document_count = len(row_ngrams)
+        document_frequency = Counter(gram for grams in row_ngrams for gram in grams)
+        self.idf: Dict[str, float] = {
+            gram: math.log((1 + document_count) / (1 + freq)) + 1.0
+            for gram, freq in document_frequency.items()
+        }
+
+        # Build the column-oriented sparse matrix of L2-normalized weights
+        self.columns: Dict[str, Tuple[array, array]] = {}
+        for row, grams in enumerate(row_ngrams):
+            weights = {gram: count * self.idf[gram] for gram, count in grams.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            for gram, weight in weights.items():
+                rows, values = self.columns.setdefault(gram, (array('i'), array('d')))
+                rows.append(row)
+                values.append(weight / norm)
+
+    def scores(self, text: str) -> List[float]:
+        """
+        Compute cosine similarity between text and every example phrase.
+
+        Args:
+            text: Natural language input
+
+        Returns:
+            List of similarity scores, one per example row
+        """
+        totals = [0.0] * len(self.row_intents)
+        grams = char_ngrams(text.lower(), self.ngram_size)
+
+        query = {gram: count * self.idf[gram] for gram, count in grams.items() if gram in self.idf}
+        # Unknown n-grams still contribute to the query norm so that long,
+        # unrelated input does not score highly on a few shared n-grams
+        norm = math.sqrt(
+            sum(weight * weight for weight in query.values())
+            + sum(count * count for gram, count in grams.items() if gram not in self.idf)
+        )
+        if not query or norm == 0:
+            return totals
+
+        for gram, weight in query.items():
+            rows, values = self.columns[gram]
+            weight /= norm
+            for row, value in zip(rows, values):
+                totals[row] += weight * value
+
+        return totals
+
+    def best_intent(self, text: str, threshold: float = 0.3) -> Tuple[Optional[str], float]:
+        """
+        Find the intent whose example phrase is most similar to text.
+
+        Args:
+            text: Natural language input
+            threshold: Minimum similarity required to accept a match
+
+        Returns:
+            Tuple of (intent_name, score), or (None, score) below the threshold
+        """
+        totals = self.scores(text)
+        if not totals:
+            return None, 0.0
+
+        best_row = max(range(len(totals)), key=totals.__getitem__)
+        best_score = totals[best_row]
+        if best_score < threshold:
+            return None, best_score
+        return self.row_intents[best_row], best_score
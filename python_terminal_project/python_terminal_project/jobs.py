@@ -0,0 +1,232 @@
+"""
+Background job control for the Python Command Terminal.
+This module runs commands submitted with a trailing '&' on managed executors.
+
+Jobs run on a thread pool unless their command is registered with
+kind=KIND_CPU (such as 'wc'), in which case they run in a worker process so
+they do not hold the GIL against the prompt.
+"""
+
+import io
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from capture import redirect_thread_output
+from session import Session, current_session, use_session
+
+if TYPE_CHECKING:
+    # concurrent.futures pulls in logging and multiprocessing; it is only
+    # imported once the first background job starts
+    from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+# Worker counts for the job executors
+MAX_THREAD_WORKERS = 8
+MAX_PROCESS_WORKERS = None  # Defaults to the number of CPUs
+
+# multiprocessing start method for CPU-bound jobs (None: the platform's
+# default). Workers import the terminal's modules afresh under 'spawn', so
+# jobs must not depend on state set up at the prompt.
+PROCESS_START_METHOD: Optional[str] = None
+
+Runner = Callable[[str], int]
+
+
+class JobOutput(io.TextIOBase):
+    """
+    Thread-safe, append-only output buffer for a background job.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._chunks.append(text)
+        return len(text)
+
+    def read_from(self, position: int) -> Tuple[str, int]:
+        """
+        Return output written since position.
+
+        Args:
+            position: Number of chunks already read
+
+        Returns:
+            Tuple of (new_text, new_position)
+        """
+        with self._lock:
+            chunks = self._chunks[position:]
+            return "".join(chunks), position + len(chunks)
+
+
+# Executors shared by every session's jobs, started on first use
+_thread_pool: Optional["ThreadPoolExecutor"] = None
+_process_pool: Optional["ProcessPoolExecutor"] = None
+
+
+def _threads() -> "ThreadPoolExecutor":
+    global _thread_pool
+    if _thread_pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _thread_pool = ThreadPoolExecutor(MAX_THREAD_WORKERS, thread_name_prefix="job")
+    return _thread_pool
+
+
+def _processes() -> "ProcessPoolExecutor":
+    global _process_pool
+    if _process_pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        context = multiprocessing.get_context(PROCESS_START_METHOD)
+        _process_pool = ProcessPoolExecutor(MAX_PROCESS_WORKERS, mp_context=context)
+    return _process_pool
+
+
+def _run_captured(runner: Runner, command_line: str, cwd: str) -> Tuple[int, str]:
+    """Run a command in a worker process and return its status and output."""
+    output = JobOutput()
+    session = Session(cwd)
+    try:
+        with redirect_thread_output(output), use_session(session):
+            status = runner(command_line)
+    finally:
+        session.close()
+    return status, output.read_from(0)[0]
+
+
+class Job:
+    """
+    A command running in the background.
+    """
+
+    def __init__(self, job_id: int, command_line: str, in_process: bool):
+        self.job_id = job_id
+        self.command_line = command_line
+        self.in_process = in_process
+        self.output = JobOutput()
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.status: Optional[int] = None
+        self.future: Optional["Future"] = None
+        self.read_position = 0
+        self.reported = False
+
+    @property
+    def running(self) -> bool:
+        return self.finished is None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds the job has been running (or ran for)."""
+        return (self.finished or time.monotonic()) - self.started
+
+    def state(self) -> str:
+        """Describe the job state the way 'jobs' shows it."""
+        if self.running:
+            return "Running"
+        return "Done" if self.status == 0 else f"Exit {self.status}"
+
+    def unread_output(self) -> str:
+        """Return output that has not been shown to the user yet."""
+        text, self.read_position = self.output.read_from(self.read_position)
+        return text
+
+
+class JobManager:
+    """
+    Tracks one session's background jobs.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[int, Job] = {}
+        self._next_id = 1
+
+    def submit(self, command_line: str, runner: Runner, cpu_bound: bool = False) -> Job:
+        """
+        Start a command in the background.
+
+        Args:
+            command_line: Command line to run
+            runner: Function that runs a command line and returns its status
+            cpu_bound: Run in a worker process instead of a thread
+
+        Returns:
+            The new job
+        """
+        job = Job(self._next_id, command_line, cpu_bound)
+        self._next_id += 1
+        self.jobs[job.job_id] = job
+
+        # Jobs get their own session starting in the current directory, so a
+        # later 'cd' at the prompt does not affect them
+        cwd = current_session().cwd
+        if cpu_bound:
+            job.future = _processes().submit(_run_captured, runner, command_line, cwd)
+        else:
+            job.future = _threads().submit(self._run_in_thread, job, runner, cwd)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    @staticmethod
+    def _run_in_thread(job: Job, runner: Runner, cwd: str) -> int:
+        session = Session(cwd)
+        try:
+            with redirect_thread_output(job.output), use_session(session):
+                return runner(job.command_line)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _finish(job: Job, future: "Future") -> None:
+        try:
+            result = future.result()
+            if job.in_process:
+                job.status, text = result
+                job.output.write(text)
+            else:
+                job.status = result
+        except Exception as e:
+            job.output.write(f"An error occurred: {e}\n")
+            job.status = 1
+        job.finished = time.monotonic()
+
+    def get(self, job_id: Optional[int] = None) -> Optional[Job]:
+        """Return a job by id, or the most recent job if no id is given."""
+        if job_id is None:
+            return self.jobs[max(self.jobs)] if self.jobs else None
+        return self.jobs.get(job_id)
+
+    def wait(self, jobs: List[Job], timeout: Optional[float] = None) -> None:
+        """Block until the given jobs finish."""
+        futures = [job.future for job in jobs if job.future is not None]
+        if futures:
+            from concurrent.futures import wait as wait_futures
+            wait_futures(futures, timeout)
+        # Done callbacks may still be running right after the futures resolve
+        while any(job.running and job.future.done() for job in jobs):
+            time.sleep(0.001)
+
+    def finished_unreported(self) -> List[Job]:
+        """Return finished jobs the user has not been told about yet."""
+        return [job for job in self.jobs.values() if not job.running and not job.reported]
+
+    def forget_finished(self) -> None:
+        """Drop finished jobs that have already been reported."""
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if not job.running and job.reported]:
+            del self.jobs[job_id]
+
+
+def current_jobs() -> JobManager:
+    """Return the background jobs of the session commands run in."""
+    return current_session().jobs
+
+
+def parse_job_id(spec: str) -> Optional[int]:
+    """Parse a job reference such as '2' or '%2'."""
+    try:
+        return int(spec.lstrip('%'))
+    except ValueError:
+        return None
@@ -0,0 +1,242 @@
+"""
+Memory introspection for the Python Command Terminal.
+This module implements the 'mem' command, which reports the terminal's
+resident memory and the size of its in-process caches, and drives
+tracemalloc to find allocation sites and leaks:
+
+    mem                      RSS, traced memory and cache sizes
+    mem start [FRAMES]       start tracing allocations
+    mem snapshot [NAME]      take a named snapshot
+    mem top [-n N] [NAME]    largest allocation sites now, or in a snapshot
+    mem diff [-n N] [A [B]]  growth from snapshot A (default: the last) to B or now
+    mem stop                 stop tracing and drop snapshots
+
+Snapshots are only kept until tracing stops, since each one holds a copy
+of every live allocation's traceback.
+"""
+
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from output import write_lines
+
+# Number of allocation sites listed by default
+DEFAULT_TOP = 10
+
+USAGE = "mem: usage: mem [start [FRAMES] | snapshot [NAME] | top [-n N] [NAME] | diff [-n N] [A [B]] | stop]"
+
+# Snapshots by name, in the order they were taken
+snapshots: Dict[str, "tracemalloc.Snapshot"] = {}
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count with a binary unit, keeping its sign."""
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(size) < 1024 or unit == 'GiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def cache_sizes() -> Iterator[Tuple[str, int, Optional[int]]]:
+    """
+    Yield the terminal's in-process caches that are currently loaded.
+
+    Caches whose modules have not been imported are skipped rather than
+    loaded just to be measured.
+
+    Returns:
+        (name, entries, approximate bytes or None) tuples
+    """
+    history_module = sys.modules.get('history_windows')
+    history = history_module and history_module._command_history
+    if history is not None:
+        size = sys.getsizeof(history.history) + sum(map(sys.getsizeof, history.history))
+        yield 'history', len(history.history), size
+
+    cmdline = sys.modules.get('cmdline')
+    if cmdline is not None:
+        yield 'parse cache', cmdline.cache_info().currsize, None
+
+    ai_commands = sys.modules.get('ai_commands')
+    if ai_commands is not None:
+        yield 'ai interpretations', ai_commands.interpretation_cache.stats()['entries'], None
+
+    metrics = sys.modules.get('metrics')
+    if metrics is not None:
+        histograms = list(metrics.command_stats.values())
+        yield 'command stats', len(histograms), sum(
+            stats.latency.counts.buffer_info()[1] * stats.latency.counts.itemsize for stats in histograms)
+
+
+def memory_lines() -> Iterator[str]:
+    """Yield the lines of the plain 'mem' report."""
+    import tracemalloc
+
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        yield f"Resident memory: {format_bytes(info.rss)} (virtual {format_bytes(info.vms)})"
+    except ImportError:
+        yield "Resident memory: unavailable (psutil is not installed)"
+
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        yield (f"Traced Python memory: {format_bytes(current)} (peak {format_bytes(peak)}), "
+               f"{tracemalloc.get_traceback_limit()} frame(s) per allocation, "
+               f"tracing overhead {format_bytes(tracemalloc.get_tracemalloc_memory())}")
+        if snapshots:
+            yield f"Snapshots: {', '.join(snapshots)}"
+    else:
+        yield "Allocation tracing is off ('mem start' to enable)"
+
+    caches = list(cache_sizes())
+    if caches:
+        yield "Caches:"
+        for name, entries, size in caches:
+            suffix = f", {format_bytes(size)}" if size is not None else ""
+            yield f"  {name:<20} {entries:>8} entries{suffix}"
+
+
+def current_snapshot() -> "tracemalloc.Snapshot":
+    """Take a tracemalloc snapshot without the tracer's own allocations."""
+    import tracemalloc
+
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def take_snapshot(name: Optional[str] = None) -> str:
+    """
+    Take a snapshot and keep it for 'mem top' and 'mem diff'.
+
+    Returns:
+        The snapshot's name (numbered automatically if none is given)
+    """
+    snapshot = current_snapshot()
+    if name is None:
+        number = len(snapshots) + 1
+        while str(number) in snapshots:
+            number += 1
+        name = str(number)
+    snapshots[name] = snapshot
+    return name
+
+
+def parse_count(args: List[str]) -> Tuple[int, List[str]]:
+    """
+    Take a leading '-n N' from the arguments.
+
+    Raises:
+        ValueError: If N is missing or not a positive number
+    """
+    if args and args[0] == '-n':
+        if len(args) < 2 or not args[1].isdigit() or int(args[1]) < 1:
+            raise ValueError("-n needs a positive number")
+        return int(args[1]), args[2:]
+    return DEFAULT_TOP, args
+
+
+def stat_line(stat) -> str:
+    """Describe one tracemalloc statistic by its innermost frame."""
+    frame = stat.traceback[0]
+    return f"{format_bytes(stat.size):>11} {stat.count:>8}  {frame.filename}:{frame.lineno}"
+
+
+def diff_line(stat) -> str:
+    """Describe one tracemalloc statistic difference."""
+    frame = stat.traceback[0]
+    return (f"{format_bytes(stat.size_diff):>11} {stat.count_diff:>+8}  "
+            f"{format_bytes(stat.size):>11}  {frame.filename}:{frame.lineno}")
+
+
+def handle_mem(args: List[str]) -> int:
+    """
+    Handle the 'mem' command (see the module docstring for subcommands).
+
+    Args:
+        args: Subcommand and its arguments
+
+    Returns:
+        0 on success, 1 on failure, 2 on a usage error
+    """
+    import tracemalloc
+
+    if not args:
+        write_lines(memory_lines())
+        return 0
+
+    action, args = args[0], args[1:]
+    if action == 'start':
+        frames = int(args[0]) if args and args[0].isdigit() else 1
+        if tracemalloc.is_tracing():
+            print("mem: tracing is already on")
+            return 1
+        tracemalloc.start(frames)
+        print(f"Tracing allocations ({frames} frame(s) each). Take snapshots with 'mem snapshot'.")
+        return 0
+
+    if action == 'stop':
+        tracemalloc.stop()
+        snapshots.clear()
+        print("Tracing stopped; snapshots dropped.")
+        return 0
+
+    if action not in ('snapshot', 'top', 'diff'):
+        print(USAGE)
+        return 2
+    if not tracemalloc.is_tracing():
+        print("mem: tracing is off; run 'mem start' first")
+        return 1
+
+    if action == 'snapshot':
+        name = take_snapshot(args[0] if args else None)
+        current, _ = tracemalloc.get_traced_memory()
+        print(f"Snapshot {name}: {format_bytes(current)} traced")
+        return 0
+
+    try:
+        count, args = parse_count(args)
+    except ValueError as e:
+        print(f"mem: {e}")
+        return 2
+
+    if action == 'top':
+        if args:
+            snapshot = snapshots.get(args[0])
+            if snapshot is None:
+                print(f"mem: {args[0]}: no such snapshot")
+                return 1
+        else:
+            snapshot = current_snapshot()
+        stats = snapshot.statistics('lineno')
+        total = sum(stat.size for stat in stats)
+        print(f"{'SIZE':>11} {'BLOCKS':>8}  ALLOCATED AT  (total {format_bytes(total)})")
+        write_lines(stat_line(stat) for stat in stats[:count])
+        return 0
+
+    # diff: two named snapshots, or a snapshot (the last by default) against now
+    if len(args) >= 2:
+        missing = [name for name in args[:2] if name not in snapshots]
+        if missing:
+            print(f"mem: {missing[0]}: no such snapshot")
+            return 1
+        old, new = snapshots[args[0]], snapshots[args[1]]
+    elif snapshots:
+        old_name = args[0] if args else list(snapshots)[-1]
+        if old_name not in snapshots:
+            print(f"mem: {old_name}: no such snapshot")
+            return 1
+        old, new = snapshots[old_name], current_snapshot()
+    else:
+        print("mem: no snapshot to compare against; run 'mem snapshot' first")
+        return 1
+
+    stats = new.compare_to(old, 'lineno')
+    growth = sum(stat.size_diff for stat in stats)
+    print(f"{'GROWTH':>11} {'BLOCKS':>8}  {'NOW':>11}  ALLOCATED AT  (net {format_bytes(growth)})")
+    write_lines(diff_line(stat) for stat in stats[:count])
+    return 0
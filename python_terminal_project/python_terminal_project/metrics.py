@@ -0,0 +1,248 @@
+"""
+Command instrumentation for the Python Command Terminal.
+This module times every command with monotonic nanosecond clocks, counts the
+filesystem syscalls each command makes, and keeps per-command latency
+histograms for the 'stats' command.
+
+Histograms use fixed log-linear buckets (as in HdrHistogram): values below
+2**HISTOGRAM_BITS nanoseconds get exact buckets, and each power of two above
+that is split into 2**(HISTOGRAM_BITS - 1) buckets. Percentiles report the
+middle of a bucket, so their relative error is at most 2**-HISTOGRAM_BITS
+(about 3%). Recording a value is a few integer operations and an array
+increment.
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+from array import array
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from records import StatsRecord
+
+# Precision of histogram buckets (see module docstring)
+HISTOGRAM_BITS = 5
+
+# Largest value a histogram tracks exactly; larger values land in the last bucket
+HISTOGRAM_MAX_NS = 1 << 46  # about 19.5 hours
+
+_HALF = 1 << (HISTOGRAM_BITS - 1)
+_BUCKETS = (HISTOGRAM_MAX_NS.bit_length() - HISTOGRAM_BITS + 2) * _HALF
+
+
+def bucket_index(value: int) -> int:
+    """Return the histogram bucket for a value in nanoseconds."""
+    shift = value.bit_length() - HISTOGRAM_BITS
+    if shift <= 0:
+        return value
+    return min(shift * _HALF + (value >> shift), _BUCKETS - 1)
+
+
+def bucket_value(index: int) -> int:
+    """Return the lowest value that falls in a bucket."""
+    if index < (1 << HISTOGRAM_BITS):
+        return index
+    shift = index // _HALF - 1
+    return (index - shift * _HALF) << shift
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram in nanoseconds.
+    """
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8 * _BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> int:
+        """
+        Return the value at a percentile, to bucket precision.
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            Middle of the bucket holding that rank, in nanoseconds
+        """
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                middle = (bucket_value(index) + bucket_value(index + 1) - 1) // 2
+                return min(middle, self.max)
+        return self.max
+
+    def cumulative(self, bounds: Sequence[int]) -> List[int]:
+        """
+        Count the values at or below each bound, to bucket precision.
+
+        Args:
+            bounds: Ascending bounds in nanoseconds
+
+        Returns:
+            One cumulative count per bound
+        """
+        totals = []
+        seen = 0
+        start = 0
+        for bound in bounds:
+            end = bucket_index(bound) + 1
+            if end > start:
+                seen += sum(self.counts[start:end])
+                start = end
+            totals.append(seen)
+        return totals
+
+
+class CommandStats:
+    """Latency histogram and syscall counts for one command name."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.ops: Dict[str, int] = defaultdict(int)
+
+
+class OpCounts:
+    """
+    Syscall counts of one running command.
+
+    Worker threads started by the command share this object, so each thread
+    counts into its own dict without locking; the dicts are summed when the
+    command finishes.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._per_thread: List[Dict[str, int]] = []
+        self._lock = threading.Lock()
+
+    def add(self, operation: str, count: int) -> None:
+        ops = getattr(self._local, 'ops', None)
+        if ops is None:
+            ops = self._local.ops = defaultdict(int)
+            with self._lock:
+                self._per_thread.append(ops)
+        ops[operation] += count
+
+    def totals(self) -> Dict[str, int]:
+        """Sum the counts of every thread."""
+        totals: Dict[str, int] = defaultdict(int)
+        with self._lock:
+            per_thread = list(self._per_thread)
+        for ops in per_thread:
+            # dict() copies atomically, even if that thread is still counting
+            for operation, count in dict(ops).items():
+                totals[operation] += count
+        return totals
+
+
+# Per-command statistics for this process
+command_stats: Dict[str, CommandStats] = {}
+_lock = threading.Lock()
+
+# Syscall counters of the command running in this context, if any
+_current_ops: "contextvars.ContextVar[Optional[OpCounts]]" = contextvars.ContextVar(
+    'current_ops', default=None
+)
+
+
+def count_op(operation: str, count: int = 1) -> None:
+    """
+    Count filesystem operations against the command running in this context.
+
+    Args:
+        operation: Operation name, such as 'stat' or 'unlink'
+        count: Number of operations
+    """
+    ops = _current_ops.get()
+    if ops is not None and count:
+        ops.add(operation, count)
+
+
+@contextlib.contextmanager
+def measure(command: str) -> Iterator[None]:
+    """
+    Time the enclosed command and collect its syscall counts under command.
+
+    Nested measurements (such as a command run by 'ai') are attributed to the
+    outermost command only.
+    """
+    if _current_ops.get() is not None:
+        yield
+        return
+
+    ops = OpCounts()
+    reset_token = _current_ops.set(ops)
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter_ns() - start
+        _current_ops.reset(reset_token)
+        totals = ops.totals()
+        with _lock:
+            stats = command_stats.get(command)
+            if stats is None:
+                stats = command_stats[command] = CommandStats()
+            stats.latency.record(elapsed)
+            for operation, count in totals.items():
+                stats.ops[operation] += count
+
+
+def reset() -> None:
+    """Forget all collected statistics."""
+    with _lock:
+        command_stats.clear()
+
+
+def snapshot() -> List["StatsRecord"]:
+    """
+    Return a consistent summary of every command's statistics.
+
+    Returns:
+        One record per command, sorted by total time descending
+    """
+    from records import StatsRecord
+
+    with _lock:
+        rows = [
+            StatsRecord(command, stats.latency.count, stats.latency.total,
+                        stats.latency.percentile(50), stats.latency.percentile(95),
+                        stats.latency.percentile(99), stats.latency.max, dict(stats.ops))
+            for command, stats in command_stats.items()
+        ]
+    rows.sort(key=lambda row: -row.total_ns)
+    return rows
+
+
+def histogram_snapshot(bounds: Sequence[int]) -> List[Tuple[str, List[int], int, int]]:
+    """
+    Return every command's latency histogram reduced to fixed bounds.
+
+    Args:
+        bounds: Ascending bucket bounds in nanoseconds
+
+    Returns:
+        (command, cumulative counts per bound, count, total ns) tuples
+    """
+    with _lock:
+        return [
+            (command, stats.latency.cumulative(bounds), stats.latency.count, stats.latency.total)
+            for command, stats in command_stats.items()
+        ]
@@ -0,0 +1,129 @@
+"""
+Buffered output for the Python Command Terminal.
+This module batches handler output into large writes, so listing a huge
+directory costs a few writes rather than one encode and write per line.
+"""
+
+import sys
+import time
+from typing import Iterable, List, Optional, TextIO
+
+from cancel import check_cancelled
+
+# Buffered text is written out once it reaches this many characters
+OUTPUT_BUFFER_SIZE = 1 << 16
+
+# ... or once this many seconds have passed since the last write, so slow
+# producers still show progress. Terminals get a shorter interval.
+PIPE_FLUSH_INTERVAL = 0.5
+TTY_FLUSH_INTERVAL = 0.05
+
+# Spaces between columns in multi-column layout
+COLUMN_GAP = 2
+
+
+class OutputWriter:
+    """
+    Collects output lines and writes them to a stream in large chunks.
+
+    The stream defaults to sys.stdout as seen by the creating thread, so
+    per-thread capture and redirection keep working. Use as a context
+    manager to flush on exit.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, buffer_size: int = OUTPUT_BUFFER_SIZE):
+        self.stream = stream if stream is not None else sys.stdout
+        self.buffer_size = buffer_size
+        self.tty = is_terminal(self.stream)
+        self.flush_interval = TTY_FLUSH_INTERVAL if self.tty else PIPE_FLUSH_INTERVAL
+        self.chunks: List[str] = []
+        self.size = 0
+        self.last_write = time.monotonic()
+
+    def write_line(self, line: str) -> None:
+        """Buffer one line (without its newline)."""
+        self.chunks.append(line)
+        self.size += len(line) + 1
+        if self.size >= self.buffer_size or time.monotonic() - self.last_write >= self.flush_interval:
+            self.flush()
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        """Buffer many lines, writing whenever the buffer fills."""
+        for line in lines:
+            self.write_line(line)
+
+    def flush(self) -> None:
+        """Write out buffered lines, checking for cancellation between chunks."""
+        if self.chunks:
+            check_cancelled()
+            self.chunks.append('')
+            self.stream.write('\n'.join(self.chunks))
+            self.chunks = []
+            self.size = 0
+        self.last_write = time.monotonic()
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # Whatever was produced before an error or cancellation is still shown
+        if self.chunks:
+            self.chunks.append('')
+            self.stream.write('\n'.join(self.chunks))
+            self.chunks = []
+
+
+def is_terminal(stream: TextIO) -> bool:
+    """Check whether a stream is attached to a terminal."""
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def terminal_width(default: int = 80) -> int:
+    """Return the terminal width in columns."""
+    import shutil
+    return shutil.get_terminal_size((default, 24)).columns
+
+
+def format_columns(names: List[str], width: Optional[int] = None) -> List[str]:
+    """
+    Lay out names in columns, filled top to bottom like 'ls -C'.
+
+    All columns share the width of the longest name, so the layout is a
+    single pass over the names.
+
+    Args:
+        names: Names to lay out
+        width: Line width (defaults to the terminal width)
+
+    Returns:
+        Output lines
+    """
+    if not names:
+        return []
+    width = width or terminal_width()
+    column_width = max(map(len, names)) + COLUMN_GAP
+    columns = max(1, (width + COLUMN_GAP) // column_width)
+    rows = -(-len(names) // columns)
+
+    lines = []
+    for row in range(rows):
+        cells = names[row::rows]
+        lines.append(''.join(name.ljust(column_width) for name in cells[:-1]) + cells[-1])
+    return lines
+
+
+def write_lines(lines: Iterable[str], stream: Optional[TextIO] = None) -> None:
+    """Write lines through a buffered OutputWriter."""
+    with OutputWriter(stream) as writer:
+        writer.write_lines(lines)
+
+
+def flush_output() -> None:
+    """Flush stdout; called before prompting so no output is held back."""
+    try:
+        sys.stdout.flush()
+    except (BrokenPipeError, ValueError):
+        pass
@@ -0,0 +1,513 @@
+"""
+Pager for the Python Command Terminal.
+This module implements 'less' (also 'view'), which pages through files and
+command output:
+
+    less [+LINE] FILE        view a file, optionally starting at LINE
+    ls -C /big | less        page through a command's output
+
+Files are memory-mapped, so opening one takes the same time whatever its
+size. The view is positioned by byte offset, which makes scrolling, 'G'
+(end of file) and searching independent of line numbers. Line numbers come
+from an index of line start offsets that is built lazily, in array('Q')
+chunks, only as far as the user has scrolled or jumped. Piped output is
+spooled to an anonymous temporary file and mapped the same way.
+
+Keys: space/f/PgDn and b/PgUp page, j/k/arrows scroll a line, g/G go to
+the start or end, NUMBER g goes to a line, /REGEX and ?REGEX search forward
+and backward, n/N repeat the search, q quits.
+"""
+
+import bisect
+import codecs
+import mmap
+import os
+import re
+import select
+import sys
+import tempfile
+from array import array
+from typing import Iterator, List, Optional, Tuple, Union
+
+from cancel import POLL_INTERVAL, check_cancelled
+from output import is_terminal
+from pipestatus import set_stage_status
+from session import current_session
+
+# Line starts per index chunk (512 KiB of offsets)
+INDEX_CHUNK = 1 << 16
+
+# Bytes scanned for newlines per step when extending the index
+SCAN_BLOCK = 1 << 20
+
+# Bytes searched per step, so long searches can be cancelled
+SEARCH_BLOCK = 1 << 24
+
+# Bytes copied per write when output is not a terminal
+COPY_BLOCK = 1 << 16
+
+ENTER_SCREEN = '\x1b[?1049h\x1b[H'   # switch to the alternate screen
+LEAVE_SCREEN = '\x1b[?1049l'         # and back
+CLEAR_SCREEN = '\x1b[H\x1b[J'
+REVERSE, NORMAL = '\x1b[7m', '\x1b[0m'
+
+# Escape sequences of the keys the pager understands
+KEY_NAMES = {
+    '\x1b[A': 'up', '\x1bOA': 'up', '\x1b[B': 'down', '\x1bOB': 'down',
+    '\x1b[5~': 'pageup', '\x1b[6~': 'pagedown',
+    '\x1b[H': 'home', '\x1b[1~': 'home', '\x1b[F': 'end', '\x1b[4~': 'end',
+    '\r': 'enter', '\n': 'enter',
+}
+
+Buffer = Union[mmap.mmap, bytes]
+
+
+class LineIndex:
+    """
+    Start offsets of lines in a buffer, discovered on demand.
+
+    Offsets are kept in fixed-size array('Q') chunks, so line n is found in
+    chunk n // INDEX_CHUNK without reallocating one huge array as it grows.
+    """
+
+    def __init__(self, data: Buffer):
+        self.data = data
+        self.size = len(data)
+        self.chunks: List[array] = [array('Q', [0])]
+        self.chunk_starts: List[int] = [0]
+        self.count = 1
+        self.scanned = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.scanned >= self.size
+
+    def _scan(self, limit: int) -> None:
+        """Index line starts in the next block, stopping at limit bytes."""
+        end = min(self.scanned + SCAN_BLOCK, limit, self.size)
+        find = self.data.find
+        chunk = self.chunks[-1]
+        position = self.scanned
+        while True:
+            newline = find(b'\n', position, end)
+            if newline < 0:
+                break
+            position = newline + 1
+            if position >= self.size:
+                break
+            if len(chunk) >= INDEX_CHUNK:
+                chunk = array('Q')
+                self.chunks.append(chunk)
+                self.chunk_starts.append(position)
+            chunk.append(position)
+            self.count += 1
+        self.scanned = end
+
+    def ensure_line(self, number: int) -> bool:
+        """
+        Extend the index until it includes line number (0-based).
+
+        Returns:
+            False if the buffer has fewer lines
+        """
+        while self.count <= number and not self.complete:
+            check_cancelled()
+            self._scan(self.size)
+        return number < self.count
+
+    def line_start(self, number: int) -> Optional[int]:
+        """Return the offset of line number, or None past the end."""
+        if not self.ensure_line(number):
+            return None
+        return self.chunks[number // INDEX_CHUNK][number % INDEX_CHUNK]
+
+    def line_number(self, offset: int, scan_limit: int = SCAN_BLOCK) -> Optional[int]:
+        """
+        Return the 0-based number of the line holding offset.
+
+        The index is only extended if offset is within scan_limit bytes of
+        what has been scanned, so a jump to the end of a huge file does not
+        trigger a full scan.
+
+        Returns:
+            The line number, or None if it is not known yet
+        """
+        if offset > self.scanned:
+            if offset - self.scanned > scan_limit:
+                return None
+            while self.scanned < offset and not self.complete:
+                self._scan(offset + 1)
+        chunk_number = bisect.bisect_right(self.chunk_starts, offset) - 1
+        chunk = self.chunks[chunk_number]
+        return chunk_number * INDEX_CHUNK + bisect.bisect_right(chunk, offset) - 1
+
+
+class Pager:
+    """
+    Interactive view of a buffer on the terminal.
+    """
+
+    def __init__(self, data: Buffer, title: str, stream=None, input_fd: Optional[int] = None):
+        self.data = data
+        self.size = len(data)
+        self.title = title
+        self.index = LineIndex(data)
+        self.stream = stream if stream is not None else sys.stdout
+        self.input_fd = input_fd if input_fd is not None else sys.stdin.fileno()
+        self.top = 0
+        self.pattern: Optional[Tuple["re.Pattern", "re.Pattern"]] = None
+        self.forward = True
+        self.message = ''
+        self.pending = ''
+        self.keys = ''
+
+    # Navigation by byte offset
+
+    def next_line(self, offset: int) -> int:
+        """Return the start of the line after the one at offset (or the size)."""
+        newline = self.data.find(b'\n', offset)
+        return self.size if newline < 0 else newline + 1
+
+    def previous_line(self, offset: int) -> int:
+        """Return the start of the line before the one starting at offset."""
+        if offset <= 0:
+            return 0
+        return self.data.rfind(b'\n', 0, offset - 1) + 1
+
+    def line_containing(self, offset: int) -> int:
+        return self.data.rfind(b'\n', 0, offset) + 1
+
+    def last_page_top(self, height: int) -> int:
+        top = self.size
+        for _ in range(height):
+            if top == 0:
+                break
+            top = self.previous_line(top)
+        return top
+
+    def scroll(self, lines: int, height: int) -> None:
+        if lines > 0:
+            limit = self.last_page_top(height)
+            for _ in range(lines):
+                if self.top >= limit:
+                    break
+                self.top = self.next_line(self.top)
+        else:
+            for _ in range(-lines):
+                self.top = self.previous_line(self.top)
+
+    def go_to_line(self, number: int) -> None:
+        """Go to a 1-based line number, extending the index as needed."""
+        start = self.index.line_start(max(number - 1, 0))
+        if start is None:
+            self.message = f"File has only {self.index.count} lines"
+            start = self.index.line_start(self.index.count - 1)
+        self.top = start
+
+    # Searching
+
+    def set_pattern(self, text: str) -> bool:
+        try:
+            self.pattern = (re.compile(text.encode('utf-8'), re.MULTILINE), re.compile(text))
+        except re.error as e:
+            self.message = f"Invalid pattern: {e}"
+            return False
+        return True
+
+    def search(self, forward: bool) -> None:
+        """Move to the next line matching the pattern after (or before) the top line."""
+        if self.pattern is None:
+            self.message = "No previous search"
+            return
+        pattern = self.pattern[0]
+        if forward:
+            start = self.next_line(self.top)
+            while start < self.size:
+                check_cancelled()
+                end = self.next_line(min(start + SEARCH_BLOCK, self.size))
+                match = pattern.search(self.data, start, end)
+                if match:
+                    self.top = self.line_containing(match.start())
+                    return
+                start = end
+        else:
+            end = self.top
+            while end > 0:
+                check_cancelled()
+                start = self.line_containing(max(end - SEARCH_BLOCK, 0))
+                last = None
+                for last in pattern.finditer(self.data, start, end):
+                    pass
+                if last is not None:
+                    self.top = self.line_containing(last.start())
+                    return
+                end = start
+        self.message = "Pattern not found"
+
+    # Drawing
+
+    def render_line(self, raw: bytes, width: int) -> str:
+        text = raw.decode('utf-8', 'replace').rstrip('\r').expandtabs()
+        text = ''.join(char if char.isprintable() else '?' for char in text)[:width]
+        if self.pattern is not None:
+            text = self.pattern[1].sub(
+                lambda match: f"{REVERSE}{match.group()}{NORMAL}" if match.group() else '', text)
+        return text
+
+    def status_line(self) -> str:
+        if self.message:
+            return self.message
+        number = self.index.line_number(self.top)
+        position = f"line {number + 1}" if number is not None else "byte " + str(self.top)
+        total = f"/{self.index.count}" if self.index.complete else ""
+        percent = 100 if self.size == 0 else self.next_line(self.top) * 100 // self.size
+        return f"{self.title}  {position}{total}  {percent}%  (q to quit, h for keys)"
+
+    def draw(self) -> Tuple[int, int]:
+        """Redraw the screen; return the page height and width."""
+        import shutil
+
+        columns, rows = shutil.get_terminal_size()
+        height = max(rows - 1, 1)
+        lines = []
+        offset = self.top
+        for _ in range(height):
+            if offset >= self.size:
+                lines.append('~')
+                continue
+            end = self.next_line(offset)
+            lines.append(self.render_line(self.data[offset:end].rstrip(b'\n'), columns))
+            offset = end
+        status = (self.pending or self.status_line())[:columns - 1]
+        self.stream.write(CLEAR_SCREEN + '\n'.join(lines) + f"\n{REVERSE}{status}{NORMAL}")
+        self.stream.flush()
+        self.message = ''
+        return height, columns
+
+    # Input
+
+    def read_key(self) -> str:
+        """Wait for a key press, checking for cancellation meanwhile."""
+        if not self.keys:
+            while not select.select([self.input_fd], [], [], POLL_INTERVAL)[0]:
+                check_cancelled()
+            self.keys = os.read(self.input_fd, 256).decode('utf-8', 'replace')
+
+        # Input may hold several keys (typed ahead or pasted)
+        key = self.keys[0]
+        if key == '\x1b':
+            for length in (4, 3):
+                if self.keys[:length] in KEY_NAMES:
+                    key = self.keys[:length]
+                    break
+        self.keys = self.keys[len(key):]
+        return KEY_NAMES.get(key, key)
+
+    def read_prompt(self, prefix: str) -> Optional[str]:
+        """Read a line of input on the status line; None if cancelled with Escape."""
+        text = ''
+        while True:
+            self.pending = prefix + text
+            self.draw()
+            key = self.read_key()
+            if key == 'enter':
+                self.pending = ''
+                return text
+            if key == '\x1b':
+                self.pending = ''
+                return None
+            if key in ('\x7f', '\b'):
+                text = text[:-1]
+            elif len(key) == 1 and key.isprintable():
+                text += key
+
+    def run(self) -> None:
+        """Show the pager until the user quits."""
+        import termios
+        import tty
+
+        saved = termios.tcgetattr(self.input_fd)
+        self.stream.write(ENTER_SCREEN)
+        try:
+            # cbreak rather than raw: Ctrl-C still interrupts the command
+            tty.setcbreak(self.input_fd)
+            self.interact()
+        finally:
+            termios.tcsetattr(self.input_fd, termios.TCSADRAIN, saved)
+            self.stream.write(LEAVE_SCREEN)
+            self.stream.flush()
+
+    def interact(self) -> None:
+        count = ''
+        while True:
+            height, _ = self.draw()
+            key = self.read_key()
+            if key.isdigit():
+                count += key
+                self.pending = f":{count}"
+                continue
+            self.pending = ''
+            repeat = int(count) if count else None
+            count = ''
+
+            if key in ('q', 'Q'):
+                return
+            if key in (' ', 'f', 'pagedown'):
+                self.scroll(height * (repeat or 1), height)
+            elif key in ('b', 'pageup'):
+                self.scroll(-height * (repeat or 1), height)
+            elif key in ('j', 'down', 'enter'):
+                self.scroll(repeat or 1, height)
+            elif key in ('k', 'up'):
+                self.scroll(-(repeat or 1), height)
+            elif key in ('g', '<', 'home'):
+                self.go_to_line(repeat or 1)
+            elif key in ('G', '>', 'end'):
+                if repeat:
+                    self.go_to_line(repeat)
+                else:
+                    self.top = self.last_page_top(height)
+            elif key in ('/', '?'):
+                text = self.read_prompt(key)
+                if text and self.set_pattern(text):
+                    self.search(forward=key == '/')
+                elif text == '' and self.pattern is not None:
+                    self.search(forward=key == '/')
+                self.forward = key == '/'
+            elif key == 'n':
+                self.search(forward=self.forward)
+            elif key == 'N':
+                self.search(forward=not self.forward)
+            elif key == 'h':
+                self.message = ("space/b page  j/k line  g/G start/end  NUMBER g line  "
+                                "/ ? search  n/N next/previous  q quit")
+
+
+def map_file(f) -> Buffer:
+    """Memory-map an open file for reading (empty files cannot be mapped)."""
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:
+        return b''
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def can_page() -> bool:
+    """Check whether both output and keyboard input are a terminal."""
+    try:
+        import termios  # noqa: F401
+    except ImportError:
+        return False
+    return is_terminal(sys.stdout) and is_terminal(sys.stdin)
+
+
+def page(data: Buffer, title: str, start_line: Optional[int] = None) -> None:
+    """Page through a buffer interactively."""
+    pager = Pager(data, title)
+    if start_line is not None:
+        pager.go_to_line(start_line)
+    pager.run()
+
+
+def handle_less(args: List[str]) -> int:
+    """
+    Handle the 'less' / 'view' command to page through a file.
+
+    When output is not a terminal the file is copied through, like 'cat'.
+
+    Args:
+        args: Optional +LINE, then the file to view
+
+    Returns:
+        0 on success, 1 if the file cannot be opened
+    """
+    start_line = None
+    if args and args[0].startswith('+') and args[0][1:].isdigit():
+        start_line, args = int(args[0][1:]), args[1:]
+    if len(args) != 1:
+        print("less: usage: less [+LINE] FILE   or   COMMAND | less")
+        return 2
+
+    path = args[0]
+    try:
+        with current_session().open(path, 'rb') as f:
+            if not can_page():
+                # Characters may straddle blocks, so decode incrementally
+                decoder = codecs.getincrementaldecoder('utf-8')('replace')
+                while True:
+                    check_cancelled()
+                    block = f.read(COPY_BLOCK)
+                    sys.stdout.write(decoder.decode(block, final=not block))
+                    if not block:
+                        return 0
+            data = map_file(f)
+            try:
+                page(data, path, start_line)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+    except FileNotFoundError:
+        print(f"less: {path}: No such file or directory")
+        return 1
+    except IsADirectoryError:
+        print(f"less: {path}: Is a directory")
+        return 1
+    except PermissionError:
+        print(f"less: {path}: Permission denied")
+        return 1
+    return 0
+
+
+def file_lines(args: List[str]) -> Iterator[str]:
+    """Yield the lines of the file named in [+LINE] FILE arguments."""
+    start_line = 1
+    if args and args[0].startswith('+') and args[0][1:].isdigit():
+        start_line, args = int(args[0][1:]), args[1:]
+    if len(args) != 1:
+        print("less: usage: less [+LINE] FILE   or   COMMAND | less")
+        set_stage_status(2)
+        return
+
+    path = args[0]
+    try:
+        with current_session().open(path, 'r', errors='replace') as f:
+            for number, line in enumerate(f, 1):
+                if number >= start_line:
+                    yield line.rstrip('\n')
+    except FileNotFoundError:
+        print(f"less: {path}: No such file or directory")
+        set_stage_status(1)
+    except IsADirectoryError:
+        print(f"less: {path}: Is a directory")
+        set_stage_status(1)
+    except PermissionError:
+        print(f"less: {path}: Permission denied")
+        set_stage_status(1)
+
+
+def stream_less(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """
+    Page through the output of the previous pipeline stages.
+
+    The lines are spooled to an anonymous temporary file, not kept in
+    memory. When output is not a terminal they are passed through. Given a
+    file, as in 'less big.log | head', the stage passes the file's lines on
+    like 'cat'.
+    """
+    if args:
+        yield from file_lines(args)
+        return
+
+    if not can_page():
+        yield from lines
+        return
+
+    with tempfile.TemporaryFile() as f:
+        for line in lines:
+            f.write(line.encode('utf-8', 'replace') + b'\n')
+        f.flush()
+        data = map_file(f)
+        try:
+            page(data, "(standard input)")
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
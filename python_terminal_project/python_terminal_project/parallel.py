@@ -0,0 +1,259 @@
+"""
+Parallel fan-out of built-in commands for the Python Command Terminal.
+This module implements 'parallel', which runs one command over many arguments.
+"""
+
+import contextvars
+import io
+import os
+import queue
+import sys
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+
+from cancel import POLL_INTERVAL, current_token, use_token
+from capture import redirect_thread_output
+from pipestatus import set_stage_status
+from registry import registry
+from session import current_session
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+USAGE = "parallel: usage: parallel [-j N] [-k | -u] [-a FILE] COMMAND [ARGS...] [::: ARG...]"
+
+
+class ParallelOptions:
+    """
+    Parsed options for a 'parallel' invocation.
+    """
+
+    def __init__(self):
+        self.jobs = os.cpu_count() or 4
+        self.keep_order = False
+        self.interleave = False
+        self.argument_file: Optional[str] = None
+        self.template: List[str] = []
+        self.arguments: Optional[List[str]] = None
+
+
+def parse_options(args: List[str]) -> ParallelOptions:
+    """
+    Parse 'parallel' arguments.
+
+    Raises:
+        ValueError: If the arguments are invalid
+    """
+    options = ParallelOptions()
+    i = 0
+    while i < len(args) and args[i].startswith('-'):
+        if args[i] == '-j' and i + 1 < len(args):
+            options.jobs = int(args[i + 1])
+            if options.jobs < 1:
+                raise ValueError("-j must be at least 1")
+            i += 2
+        elif args[i] == '-k':
+            options.keep_order = True
+            i += 1
+        elif args[i] == '-u':
+            options.interleave = True
+            i += 1
+        elif args[i] == '-a' and i + 1 < len(args):
+            options.argument_file = args[i + 1]
+            i += 2
+        else:
+            raise ValueError(f"unknown option {args[i]}")
+
+    rest = args[i:]
+    if ':::' in rest:
+        split_at = rest.index(':::')
+        options.template, options.arguments = rest[:split_at], rest[split_at + 1:]
+    else:
+        options.template = rest
+
+    if not options.template:
+        raise ValueError("missing command")
+    if options.keep_order and options.interleave:
+        raise ValueError("-k and -u cannot be combined")
+    return options
+
+
+def build_arguments(template: List[str], argument: str) -> List[str]:
+    """Substitute argument for '{}' in the template, or append it."""
+    if '{}' in template[1:]:
+        return [argument if word == '{}' else word for word in template[1:]]
+    return template[1:] + [argument]
+
+
+class LineQueueOutput(io.TextIOBase):
+    """
+    Output target that hands each complete line to a queue as it is written,
+    so lines from concurrent invocations can be interleaved.
+    """
+
+    def __init__(self, lines: "queue.SimpleQueue[str]"):
+        self.lines = lines
+        self.partial = ''
+
+    def write(self, text: str) -> int:
+        *complete, self.partial = (self.partial + text).split('\n')
+        for line in complete:
+            self.lines.put(line)
+        return len(text)
+
+    def getvalue(self) -> str:
+        """Queue an unterminated last line; everything else has been queued."""
+        if self.partial:
+            self.lines.put(self.partial)
+            self.partial = ''
+        return ''
+
+
+def invoke(command: str, args: List[str], token,
+           lines: Optional["queue.SimpleQueue[str]"] = None) -> Tuple[bool, str]:
+    """
+    Run one handler invocation, capturing its output.
+
+    An invocation fails if its exit status (per the command's registered
+    return semantics) is non-zero or the handler raises.
+
+    Args:
+        command: Command name
+        args: Command arguments
+        token: Cancellation token of the 'parallel' command
+        lines: Queue to stream output lines to, instead of returning them
+
+    Returns:
+        Tuple of (succeeded, output)
+    """
+    output = LineQueueOutput(lines) if lines is not None else io.StringIO()
+    with redirect_thread_output(output), use_token(token):
+        try:
+            succeeded = registry.run(command, args) == 0
+        except Exception as e:
+            print(f"{command}: {e}")
+            succeeded = False
+    return succeeded, output.getvalue()
+
+
+def read_arguments(options: ParallelOptions, lines: Iterator[str]) -> Iterable[str]:
+    """Yield arguments from ':::', an argument file, or upstream input."""
+    if options.arguments is not None:
+        yield from options.arguments
+    elif options.argument_file is not None:
+        if options.argument_file == '-':
+            stream = sys.stdin
+        else:
+            stream = current_session().open(options.argument_file, 'r')
+        try:
+            for line in stream:
+                if line.strip():
+                    yield line.rstrip('\n')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+    else:
+        for line in lines:
+            if line.strip():
+                yield line
+
+
+def stream_parallel(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """
+    Run a built-in command once per argument on a worker pool.
+
+    Usage: parallel [-j N] [-k | -u] [-a FILE] COMMAND [ARGS...] [::: ARG...]
+
+    Arguments come from ':::', from FILE ('-' for stdin), or from upstream
+    pipeline input. '{}' in ARGS is replaced by each argument; otherwise the
+    argument is appended. Output of each invocation is kept together and
+    emitted as invocations finish, or in input order with -k; with -u lines
+    are interleaved as each invocation prints them. Failures do not stop the
+    remaining invocations. A summary goes to stderr, so it stays out of
+    pipelines and redirected output.
+    """
+    try:
+        options = parse_options(args)
+    except ValueError as e:
+        print(f"parallel: {e}")
+        print(USAGE)
+        set_stage_status(2)
+        return
+
+    command = options.template[0].lower()
+    if command not in registry:
+        print(f"parallel: unknown command: {command}")
+        set_stage_status(1)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    token = current_token()
+    succeeded = failed = 0
+    started = time.perf_counter()
+    pending: "deque[Future]" = deque()
+    lines_out: Optional["queue.SimpleQueue[str]"] = queue.SimpleQueue() if options.interleave else None
+
+    def collect(future: "Future") -> Iterator[str]:
+        nonlocal succeeded, failed
+        ok, output = future.result()
+        if ok:
+            succeeded += 1
+        else:
+            failed += 1
+        yield from output.splitlines()
+
+    def interleaved() -> Iterator[str]:
+        # Lines already printed by running invocations
+        while True:
+            try:
+                yield lines_out.get_nowait()
+            except queue.Empty:
+                return
+
+    def drain(limit: int) -> Iterator[str]:
+        # Emit finished invocations until at most limit are outstanding
+        if lines_out is not None:
+            yield from interleaved()
+        while len(pending) > limit:
+            if lines_out is not None:
+                done, _ = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from collect(future)
+                # Finished invocations queued all their lines before returning
+                yield from interleaved()
+            elif options.keep_order:
+                yield from collect(pending.popleft())
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from collect(future)
+
+    try:
+        with ThreadPoolExecutor(options.jobs, thread_name_prefix="parallel") as pool:
+            for argument in read_arguments(options, lines):
+                token.check()
+                pending.append(pool.submit(
+                    contextvars.copy_context().run,
+                    invoke, command, build_arguments(options.template, argument), token, lines_out
+                ))
+                # Bound queued invocations so huge argument lists stream through
+                yield from drain(options.jobs * 2)
+            yield from drain(0)
+    except OSError as e:
+        print(f"parallel: {e.filename}: {e.strerror}")
+        set_stage_status(1)
+    finally:
+        for future in pending:
+            future.cancel()
+
+    elapsed = time.perf_counter() - started
+    total = succeeded + failed
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"parallel: {succeeded} succeeded, {failed} failed, "
+          f"{total} jobs in {elapsed:.2f}s ({rate:.1f} jobs/s)", file=sys.stderr)
+    if failed:
+        set_stage_status(1)
@@ -0,0 +1,312 @@
+"""
+Command pipelines for the Python Command Terminal.
+This module connects built-in commands with '|' and handles '>'/'>>' redirection.
+
+Each pipeline stage is a generator function taking (args, lines) and yielding
+output lines. Stages pull from the stage before them, so nothing is
+materialized between stages and a stage like 'head' stops upstream work early.
+"""
+
+import importlib
+import itertools
+import re
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from capture import capture_output
+from cmdline import APPEND, PIPE, REDIRECT, Operator
+from commands_final import (
+    COMMAND_HANDLERS, RECORD_HANDLERS, stream_find, stream_history, stream_ls, stream_pwd
+)
+from external import path_cache, stream_external
+from output import write_lines
+from pipestatus import StageStatus, in_stage, set_stage_status, track_stage
+from records import iter_json_lines, parse_output_format
+from session import current_session
+
+StreamHandler = Callable[[List[str], Iterator[str]], Iterator[str]]
+
+# Buffer size for files opened by '>' and '>>'
+REDIRECT_BUFFER_SIZE = 1 << 20
+
+# Operators that make a command line a pipeline
+PIPELINE_OPERATORS = (PIPE, REDIRECT, APPEND)
+
+
+class PipelineError(Exception):
+    """Raised for malformed pipelines or bad stage arguments."""
+
+
+def has_pipeline_operators(tokens: List[str]) -> bool:
+    """Check whether tokens contain unquoted '|', '>' or '>>'."""
+    return any(isinstance(token, Operator) and token in PIPELINE_OPERATORS for token in tokens)
+
+
+def parse_pipeline(tokens: List[str]) -> Tuple[List[List[str]], Optional[Tuple[str, str]]]:
+    """
+    Split tokens into pipeline stages and an optional output redirection.
+
+    Args:
+        tokens: Tokens from cmdline.tokenize()
+
+    Returns:
+        Tuple of (stages, redirect) where each stage is [command, *args] and
+        redirect is (mode, path) with mode 'w' or 'a', or None
+
+    Raises:
+        PipelineError: If the pipeline is malformed
+    """
+    redirect = None
+    if len(tokens) >= 2 and tokens[-2] in (REDIRECT, APPEND) and isinstance(tokens[-2], Operator):
+        if isinstance(tokens[-1], Operator):
+            raise PipelineError(f"expected a file name after '{tokens[-2]}'")
+        redirect = ('a' if tokens[-2] == APPEND else 'w', tokens[-1])
+        tokens = tokens[:-2]
+
+    stages: List[List[str]] = [[]]
+    for token in tokens:
+        if not isinstance(token, Operator):
+            stages[-1].append(token)
+        elif token == PIPE:
+            stages.append([])
+        elif token in (REDIRECT, APPEND):
+            raise PipelineError(f"expected a single file name after '{token}', at the end of the command")
+        else:
+            raise PipelineError(f"unexpected '{token}'")
+
+    if any(not stage for stage in stages):
+        raise PipelineError("empty command in pipeline")
+    return stages, redirect
+
+
+def _parse_count(args: List[str], default: int = 10) -> int:
+    """Parse the line count for head/tail: 'N', '-N' or '-n N'."""
+    if not args:
+        return default
+    if args[0] == '-n' and len(args) > 1:
+        value = args[1]
+    else:
+        value = args[0].lstrip('-')
+    try:
+        return int(value)
+    except ValueError:
+        raise PipelineError(f"invalid line count: {value}")
+
+
+def stream_grep(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """Yield lines matching a regex. Options: -i (ignore case), -v (invert)."""
+    flags = [arg for arg in args if arg in ('-i', '-v')]
+    patterns = [arg for arg in args if arg not in ('-i', '-v')]
+    if not patterns:
+        raise PipelineError("grep: missing pattern")
+    try:
+        regex = re.compile(patterns[0], re.IGNORECASE if '-i' in flags else 0)
+    except re.error as e:
+        raise PipelineError(f"grep: invalid pattern: {e}")
+    invert = '-v' in flags
+    search = regex.search
+    return (line for line in lines if (search(line) is None) == invert)
+
+
+def stream_head(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """Yield the first N lines (default 10), then stop pulling input."""
+    return itertools.islice(lines, _parse_count(args))
+
+
+def stream_tail(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """Yield the last N lines (default 10), keeping only N lines in memory."""
+    count = _parse_count(args)
+    yield from deque(lines, maxlen=count)
+
+
+def stream_sort(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """Yield lines in sorted order. Options: -r (reverse)."""
+    yield from sorted(lines, reverse='-r' in args)
+
+
+def stream_uniq(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """Yield lines, collapsing adjacent duplicates."""
+    previous = None
+    for line in lines:
+        if line != previous:
+            yield line
+            previous = line
+
+
+def stream_cat(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """Yield lines of the named files, or pass upstream input through."""
+    if not args:
+        yield from lines
+        return
+
+    for path in args:
+        try:
+            with current_session().open(path, 'r', errors='replace') as f:
+                for line in f:
+                    yield line.rstrip('\n')
+        except FileNotFoundError:
+            print(f"cat: {path}: No such file or directory")
+            set_stage_status(1)
+        except IsADirectoryError:
+            print(f"cat: {path}: Is a directory")
+            set_stage_status(1)
+        except PermissionError:
+            print(f"cat: {path}: Permission denied")
+            set_stage_status(1)
+
+
+def stream_count(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """Yield the number of input lines."""
+    yield str(sum(1 for _ in lines))
+
+
+# Commands that produce or transform line streams natively. A 'module:function'
+# string names a handler whose module is imported the first time it is used.
+STREAM_HANDLERS: Dict[str, Union[StreamHandler, str]] = {
+    'ls': stream_ls,
+    'find': stream_find,
+    'pwd': stream_pwd,
+    'history': stream_history,
+    'cat': stream_cat,
+    'grep': stream_grep,
+    'head': stream_head,
+    'tail': stream_tail,
+    'sort': stream_sort,
+    'uniq': stream_uniq,
+    'count': stream_count,
+    'wc': 'wordcount:stream_wc',
+    'parallel': 'parallel:stream_parallel',
+    'less': 'pager:stream_less',
+    'view': 'pager:stream_less'
+}
+
+
+def stream_handler(command: str) -> StreamHandler:
+    """Return a command's stream handler, importing its module on first use."""
+    handler = STREAM_HANDLERS[command]
+    if isinstance(handler, str):
+        module_name, _, attribute = handler.partition(':')
+        handler = getattr(importlib.import_module(module_name), attribute)
+        STREAM_HANDLERS[command] = handler
+    return handler
+
+
+def _is_count(value: str) -> bool:
+    return value.lstrip('-').isdigit()
+
+
+def builtin_accepts(command: str, args: List[str]) -> bool:
+    """
+    Check whether a built-in filter understands its arguments.
+
+    The filters take only input lines and a few options. Given anything
+    else, such as file operands or other options, the stage runs the
+    program of the same name from PATH instead.
+    """
+    if command == 'grep':
+        options = [arg for arg in args if arg.startswith('-')]
+        return set(options) <= {'-i', '-v'} and len(args) - len(options) == 1
+    if command in ('head', 'tail'):
+        return (not args or (len(args) == 1 and _is_count(args[0]))
+                or (len(args) == 2 and args[0] == '-n' and args[1].isdigit()))
+    if command == 'sort':
+        return set(args) <= {'-r'}
+    if command == 'uniq':
+        return not args
+    if command == 'cat':
+        return not any(arg.startswith('-') for arg in args)
+    return True
+
+
+def captured_output(command: str, args: List[str]) -> Iterator[str]:
+    """
+    Run a printing command and yield its output lines.
+
+    This is the fallback for commands without a stream form; their output
+    is collected in memory before being passed on.
+    """
+    def run(run_args: List[str]) -> None:
+        set_stage_status(COMMAND_HANDLERS.run(command, run_args))
+
+    yield from capture_output(run, args).splitlines()
+
+
+def build_stage(stage: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """
+    Create the iterator for one pipeline stage.
+
+    Raises:
+        PipelineError: If the command is unknown, or a built-in filter gets
+            arguments it does not understand and there is no such program
+    """
+    command, args = stage[0].lower(), stage[1:]
+    if command in RECORD_HANDLERS:
+        try:
+            output_format, args = parse_output_format(args)
+        except ValueError as e:
+            raise PipelineError(f"{command}: {e}")
+        if output_format == 'jsonl':
+            return iter_json_lines(RECORD_HANDLERS[command](args))
+    if command in STREAM_HANDLERS:
+        if builtin_accepts(command, args):
+            return iter(stream_handler(command)(args, lines))
+        if path_cache.lookup(stage[0]) is not None:
+            return stream_external(stage, lines)
+        raise PipelineError(f"{command}: unsupported arguments: {' '.join(args)}")
+    if command in COMMAND_HANDLERS:
+        return captured_output(command, args)
+    if path_cache.lookup(stage[0]) is not None:
+        return stream_external(stage, lines)
+    raise PipelineError(f"Unknown command: {command}")
+
+
+def run_pipeline(tokens: List[str]) -> int:
+    """
+    Run a pipeline of built-in commands and programs.
+
+    As with a shell's 'pipefail' option, the pipeline fails with the status
+    of the last stage that failed. A stage that is stopped early because a
+    later one has finished (as in 'find / | head') does not fail.
+
+    Args:
+        tokens: Tokens from tokenize()
+
+    Returns:
+        0 on success, otherwise the failing stage's status
+    """
+    try:
+        stages, redirect = parse_pipeline(tokens)
+
+        lines: Iterator[str] = iter(())
+        iterators = []
+        statuses = []
+        for stage in stages:
+            status = StageStatus()
+            with in_stage(status):
+                lines = build_stage(stage, lines)
+            iterators.append(lines)
+            statuses.append(status)
+            lines = track_stage(status, lines)
+
+        try:
+            if redirect:
+                mode, path = redirect
+                with current_session().open(path, mode, buffering=REDIRECT_BUFFER_SIZE) as f:
+                    write_lines(lines, f)
+            else:
+                write_lines(lines)
+        finally:
+            # Release upstream resources (open directories, files) promptly
+            for iterator in reversed(iterators):
+                close = getattr(iterator, 'close', None)
+                if close:
+                    close()
+        failed = [status.status for status in statuses if status.status]
+        return failed[-1] if failed else 0
+
+    except PipelineError as e:
+        print(e)
+        return 1
+    except OSError as e:
+        print(f"{e.filename}: {e.strerror}" if e.filename else str(e))
+        return 1
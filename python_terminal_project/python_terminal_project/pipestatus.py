@@ -0,0 +1,58 @@
+"""
+Pipeline stage statuses for the Python Command Terminal.
+This module lets stream handlers report the exit status of the pipeline
+stage they run in, so a pipeline can fail the way a shell pipeline does.
+
+Stage code runs lazily, whenever the next stage pulls a line, so the stage
+is made current around each pull rather than once when it is built.
+"""
+
+import contextlib
+import contextvars
+from typing import Iterator, Optional
+
+
+class StageStatus:
+    """Exit status of one pipeline stage; the first failure reported is kept."""
+
+    def __init__(self):
+        self.status = 0
+
+
+_current_stage: "contextvars.ContextVar[Optional[StageStatus]]" = contextvars.ContextVar(
+    'current_stage', default=None
+)
+
+
+def set_stage_status(status: int) -> None:
+    """
+    Report the exit status of the pipeline stage running in this context.
+
+    Does nothing outside a pipeline, or once the stage has already failed.
+    """
+    stage = _current_stage.get()
+    if stage is not None and status and not stage.status:
+        stage.status = status
+
+
+@contextlib.contextmanager
+def in_stage(stage: StageStatus) -> Iterator[StageStatus]:
+    """Make stage the current stage for the enclosed code."""
+    reset_token = _current_stage.set(stage)
+    try:
+        yield stage
+    finally:
+        _current_stage.reset(reset_token)
+
+
+def track_stage(stage: StageStatus, lines: Iterator[str]) -> Iterator[str]:
+    """Yield a stage's lines, with the stage current while its code runs."""
+    while True:
+        reset_token = _current_stage.set(stage)
+        try:
+            line = next(lines)
+        except StopIteration:
+            return
+        finally:
+            _current_stage.reset(reset_token)
+        yield line
@@ -0,0 +1,243 @@
+"""
+Command profiling for the Python Command Terminal.
+This module implements the 'profile' command, which runs a built-in command
+under cProfile or a sampling profiler and prints its hottest functions.
+
+cProfile traces every call, so it gives exact call counts but slows the
+command down. The sampler instead wakes a helper thread every few
+milliseconds to record the command thread's stack from sys._current_frames(),
+which keeps the overhead low enough for long runs. Samples can be written in
+the collapsed-stack format read by flamegraph.pl and speedscope.
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Callable, Dict, List, Optional, Tuple
+
+from registry import registry
+from session import current_session
+
+# Number of functions listed by default
+DEFAULT_TOP = 20
+
+# Default interval between stack samples, in milliseconds
+DEFAULT_SAMPLE_INTERVAL_MS = 5.0
+
+USAGE = "profile: usage: profile [-s] [-i MS] [-n N] [-o FILE] COMMAND [ARGS...]"
+
+
+def code_label(code: CodeType) -> str:
+    """Describe a function as pstats does: file:line(function)."""
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+class StackSampler:
+    """
+    Samples another thread's Python stack at a fixed interval.
+
+    Only frames below stop_frame (the profiler's own frame) are kept, so the
+    terminal's dispatch code does not appear in the results.
+    """
+
+    def __init__(self, thread_id: int, stop_frame: Optional[FrameType], interval: float):
+        self.thread_id = thread_id
+        self.stop_frame = stop_frame
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.stop_frame:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                # Outermost call first, as in collapsed-stack files
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def top(self, count: int) -> List[Tuple[int, int, CodeType]]:
+        """
+        Return the functions seen most often at the top of the stack.
+
+        Returns:
+            (self samples, total samples, code) tuples, hottest first
+        """
+        own: Dict[CodeType, int] = Counter()
+        total: Dict[CodeType, int] = Counter()
+        for stack, samples in self.stacks.items():
+            own[stack[-1]] += samples
+            for code in set(stack):
+                total[code] += samples
+        ranked = sorted(total, key=lambda code: (-own.get(code, 0), -total[code]))
+        return [(own.get(code, 0), total[code], code) for code in ranked[:count]]
+
+    def write_collapsed(self, path: str) -> None:
+        """Write samples as 'outer;inner;leaf count' lines."""
+        with open(path, 'w') as f:
+            for stack, samples in self.stacks.most_common():
+                f.write(';'.join(code_label(code) for code in stack) + f" {samples}\n")
+
+
+def parse_profile_args(args: List[str]) -> Optional[dict]:
+    """
+    Parse the options that precede the profiled command.
+
+    Returns:
+        Options dictionary, or None after printing a usage error
+    """
+    options = {'sample': False, 'interval': DEFAULT_SAMPLE_INTERVAL_MS,
+               'top': DEFAULT_TOP, 'output': None, 'command': []}
+    index = 0
+    option = ''
+    try:
+        while index < len(args) and args[index].startswith('-'):
+            option = args[index]
+            if option in ('-s', '--sample'):
+                options['sample'] = True
+            elif option in ('-i', '--interval'):
+                index += 1
+                options['interval'] = float(args[index])
+                if options['interval'] <= 0:
+                    raise ValueError(option)
+            elif option in ('-n', '--top'):
+                index += 1
+                options['top'] = int(args[index])
+            elif option in ('-o', '--output'):
+                index += 1
+                options['output'] = args[index]
+            elif option == '--':
+                index += 1
+                break
+            else:
+                print(f"profile: unknown option {option}")
+                print(USAGE)
+                return None
+            index += 1
+    except (IndexError, ValueError):
+        print(f"profile: {option}: invalid or missing value")
+        print(USAGE)
+        return None
+
+    options['command'] = args[index:]
+    if not options['command']:
+        print(USAGE)
+        return None
+    return options
+
+
+def handle_profile(args: List[str]) -> int:
+    """
+    Handle the 'profile' command to find where a command spends its time.
+
+    Args:
+        args: Options (-s to sample instead of tracing, -i sampling interval
+              in ms, -n number of functions, -o output file), then the
+              command and its arguments
+
+    Returns:
+        Exit status of the profiled command
+    """
+    options = parse_profile_args(args)
+    if options is None:
+        return 2
+
+    command, command_args = options['command'][0].lower(), options['command'][1:]
+    run = command_runner(command, command_args)
+    if run is None:
+        print(f"profile: {command}: command not found")
+        return 1
+    output = current_session().resolve(options['output']) if options['output'] else None
+
+    if options['sample']:
+        return profile_sampled(command, run, options['interval'] / 1000, options['top'], output)
+    return profile_traced(command, run, options['top'], output)
+
+
+def command_runner(command: str, args: List[str]) -> Optional[Callable[[], int]]:
+    """
+    Return a function running a command and returning its exit status.
+
+    Stream-only commands (grep, find, ...) have no handler of their own, so
+    they run as a one-stage pipeline printing to the terminal.
+
+    Returns:
+        The runner, or None if there is no such command
+    """
+    from pipeline import STREAM_HANDLERS, run_pipeline
+
+    if command in STREAM_HANDLERS and registry.spec(command, discover=False) is None:
+        return lambda: run_pipeline([command] + args)
+    if command in registry:
+        return lambda: registry.run(command, args)
+    return None
+
+
+def profile_traced(command: str, run: Callable[[], int], top: int, output: Optional[str]) -> int:
+    """Run a command under cProfile and report the functions with the most own time."""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        status = run()
+    finally:
+        profiler.disable()
+
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])
+    print(f"\nProfile of '{command}': {stats.total_calls} calls in {stats.total_tt * 1000:.2f} ms")
+    print(f"{'CALLS':>9} {'SELF ms':>10} {'CUM ms':>10}  FUNCTION")
+    for (filename, line, name), (_, calls, own, cumulative, _) in rows[:top]:
+        # Built-in functions have no file; pstats reports them as '~'
+        label = name if filename == '~' else f"{os.path.basename(filename)}:{line}({name})"
+        print(f"{calls:>9} {own * 1000:>10.3f} {cumulative * 1000:>10.3f}  {label}")
+
+    if output:
+        try:
+            profiler.dump_stats(output)
+            print(f"pstats data written to {output}")
+        except OSError as e:
+            print(f"profile: {output}: {e.strerror}")
+    return status
+
+
+def profile_sampled(command: str, run: Callable[[], int], interval: float, top: int,
+                    output: Optional[str]) -> int:
+    """Run a command under the stack sampler and report the hottest functions."""
+    sampler = StackSampler(threading.get_ident(), sys._getframe(), interval)
+    sampler.start()
+    try:
+        status = run()
+    finally:
+        sampler.stop()
+
+    print(f"\nProfile of '{command}': {sampler.samples} samples every {interval * 1000:g} ms")
+    if sampler.samples:
+        print(f"{'SELF %':>7} {'TOTAL %':>8}  FUNCTION")
+        for own, total, code in sampler.top(top):
+            print(f"{100 * own / sampler.samples:>7.1f} {100 * total / sampler.samples:>8.1f}  "
+                  f"{code_label(code)}")
+
+    if output:
+        try:
+            sampler.write_collapsed(output)
+            print(f"Collapsed stacks written to {output}")
+        except OSError as e:
+            print(f"profile: {output}: {e.strerror}")
+    return status
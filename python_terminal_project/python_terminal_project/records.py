@@ -0,0 +1,209 @@
+"""
+Structured records for the Python Command Terminal.
+This module provides typed results with raw numeric fields, plus JSON Lines
+encoding, so machine consumers skip human formatting and re-parsing.
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from cancel import cancellable_sleep, check_cancelled
+from metrics import count_op
+from pipestatus import set_stage_status
+
+# Output formats accepted by --format
+OUTPUT_FORMATS = ('text', 'jsonl')
+
+# Format used when a command is not given --json/--format (set by pct --format)
+default_format = 'text'
+
+
+class FileRecord(NamedTuple):
+    """A directory entry. Times are POSIX timestamps, sizes are bytes."""
+    name: str
+    path: str
+    type: str
+    size: int
+    mtime: float
+
+
+class PathRecord(NamedTuple):
+    """A path found while walking a tree."""
+    path: str
+    type: str
+
+
+class SysInfoRecord(NamedTuple):
+    """Host information; resource fields are None if unavailable."""
+    system: str
+    release: str
+    machine: str
+    cpu_percent: Optional[float]
+    memory_used: Optional[int]
+    memory_total: Optional[int]
+    memory_percent: Optional[float]
+
+
+class HistoryRecord(NamedTuple):
+    """A command history entry."""
+    index: int
+    command: str
+
+
+class DirectoryRecord(NamedTuple):
+    """A working directory."""
+    cwd: str
+
+
+class JobRecord(NamedTuple):
+    """A background job. Status is None while the job is running."""
+    job_id: int
+    state: str
+    elapsed: float
+    executor: str
+    command: str
+    status: Optional[int]
+
+
+class StatsRecord(NamedTuple):
+    """Latency summary for one command name; times are nanoseconds."""
+    command: str
+    calls: int
+    total_ns: int
+    p50_ns: int
+    p95_ns: int
+    p99_ns: int
+    max_ns: int
+    ops: Dict[str, int]
+
+
+class ErrorRecord(NamedTuple):
+    """
+    An error reported in place of a record; the command keeps going.
+
+    For errors about a path, 'path' and 'reason' hold the path as the user
+    wrote it and the bare message, so callers need not parse 'error'.
+    """
+    error: str
+    path: Optional[str] = None
+    reason: Optional[str] = None
+
+
+def path_error(command: str, path: str, reason: str) -> ErrorRecord:
+    """Build the ErrorRecord for 'command: path: reason'."""
+    return ErrorRecord(f"{command}: {path}: {reason}", path, reason)
+
+
+class CommandResult(NamedTuple):
+    """Envelope for commands without a record form: status plus raw output."""
+    command: str
+    status: int
+    output: str
+
+
+def set_default_format(output_format: str) -> None:
+    """Set the output format used when commands do not specify one."""
+    global default_format
+    if output_format == 'json':
+        output_format = 'jsonl'
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown output format: {output_format}")
+    default_format = output_format
+
+
+def parse_output_format(args: List[str], has_records: bool = True) -> Tuple[str, List[str]]:
+    """
+    Strip --json / --format=FORMAT from command arguments.
+
+    Args:
+        args: Command arguments
+        has_records: Whether the command has a record form; other commands
+            get their arguments back untouched, in the default format
+
+    Returns:
+        Tuple of (output_format, remaining_args)
+    """
+    output_format = default_format
+    if not has_records:
+        return output_format, args
+    remaining = []
+    for arg in args:
+        if arg == '--json':
+            output_format = 'jsonl'
+        elif arg.startswith('--format='):
+            value = arg.split('=', 1)[1]
+            output_format = 'jsonl' if value == 'json' else value
+        else:
+            remaining.append(arg)
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown output format: {output_format}")
+    return output_format, remaining
+
+
+def to_json(record: NamedTuple) -> str:
+    """Encode a record as a single JSON object line."""
+    import json
+    return json.dumps(record._asdict())
+
+
+def iter_json_lines(records: Iterable[NamedTuple]) -> Iterator[str]:
+    """Encode records as JSON Lines, one object per record."""
+    for record in records:
+        if isinstance(record, ErrorRecord):
+            set_stage_status(1)
+        yield to_json(record)
+
+
+def iter_file_records(path: str = ".") -> Iterator[FileRecord]:
+    """
+    Lazily yield a record per directory entry, in scandir order.
+
+    Raises:
+        OSError: If the directory cannot be read
+    """
+    count_op('scandir')
+    stats = 0
+    try:
+        with os.scandir(path) as items:
+            for item in items:
+                check_cancelled()
+                stat = item.stat()
+                stats += 1
+                yield FileRecord(
+                    item.name,
+                    item.path,
+                    "dir" if item.is_dir() else "file",
+                    stat.st_size,
+                    stat.st_mtime
+                )
+    finally:
+        count_op('stat', stats)
+
+
+def sysinfo_record(sample_seconds: float = 1.0) -> SysInfoRecord:
+    """
+    Gather host information, sampling CPU usage over sample_seconds.
+
+    The sample is an interruptible sleep, so cancelling the command stops it.
+    psutil and platform are imported here so startup does not pay for them.
+    """
+    import platform
+    import psutil
+
+    try:
+        psutil.cpu_percent(interval=None)
+        cancellable_sleep(sample_seconds)
+        cpu_percent = psutil.cpu_percent(interval=None)
+    except Exception:
+        cpu_percent = None
+
+    try:
+        memory = psutil.virtual_memory()
+        memory_used, memory_total, memory_percent = memory.used, memory.total, memory.percent
+    except Exception:
+        memory_used = memory_total = memory_percent = None
+
+    return SysInfoRecord(
+        platform.system(), platform.release(), platform.machine(),
+        cpu_percent, memory_used, memory_total, memory_percent
+    )
@@ -0,0 +1,296 @@
+"""
+Command registry for the Python Command Terminal.
+This module lets commands register with metadata (how their return value maps
+to an exit status, which executor suits them, completion hints and help text)
+and imports plugin commands only when they are first used.
+
+Built-in commands register with the @registry.command decorator. Commands in
+other modules register with registry.lazy("name", "module:function", ...),
+and installed packages can provide commands through the 'pct.commands' entry
+point group, e.g. in setup.py:
+
+    entry_points={"pct.commands": ["deploy = mypack.deploy:handle_deploy"]}
+
+A plugin module may use @registry.command itself to declare metadata; it
+takes effect when the module is imported on first use.
+"""
+
+import importlib
+import os
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+# How a handler's return value becomes an exit status
+RETURNS_NONE = 'none'      # return value is ignored; the command succeeds
+RETURNS_BOOL = 'bool'      # True on success, False on failure
+RETURNS_STATUS = 'status'  # an exit status; None means 0
+
+# Executors for background jobs: threads for I/O-bound commands, worker
+# processes for CPU-bound ones
+KIND_IO = 'io'
+KIND_CPU = 'cpu'
+
+# Completion hints for a command's arguments. A sequence of words may be
+# given instead to complete from a fixed set.
+COMPLETE_PATH = 'path'
+COMPLETE_DIR = 'dir'
+COMPLETE_JOB = 'job'
+
+# Entry point group scanned for plugin commands
+PLUGIN_GROUP = 'pct.commands'
+
+Handler = Callable[[List[str]], object]
+Completion = Union[None, str, Sequence[str]]
+
+
+class CommandSpec:
+    """
+    A registered command and its metadata.
+
+    Either handler is set, or target names it as 'module:function' to be
+    imported on first use.
+    """
+
+    def __init__(self, name: str, handler: Optional[Handler] = None, target: Optional[str] = None,
+                 returns: str = RETURNS_NONE, kind: str = KIND_IO,
+                 completion: Completion = None, help: str = ""):
+        self.name = name
+        self.handler = handler
+        self.target = target
+        self.returns = returns
+        self.kind = kind
+        self.completion = completion
+        self.help = help
+
+    @property
+    def loaded(self) -> bool:
+        return self.handler is not None
+
+    def exit_status(self, result: object) -> int:
+        """Translate the handler's return value into an exit status."""
+        if self.returns == RETURNS_BOOL:
+            return 0 if result else 1
+        if self.returns == RETURNS_STATUS:
+            return int(result or 0)
+        return 0
+
+
+class CommandRegistry(Mapping):
+    """
+    Commands by name. As a mapping it yields loaded handlers, so existing
+    'name in registry' / 'registry[name](args)' callers keep working.
+    """
+
+    def __init__(self, plugin_group: str = PLUGIN_GROUP):
+        self.plugin_group = plugin_group
+        self._specs: Dict[str, CommandSpec] = {}
+        self._discovered = False
+
+    def register(self, name: str, handler: Optional[Handler] = None, *,
+                 target: Optional[str] = None, aliases: Sequence[str] = (), **metadata) -> CommandSpec:
+        """
+        Register a command, or fill in a lazily registered one.
+
+        Args:
+            name: Command name
+            handler: Function taking the argument list
+            target: 'module:function' to import on first use instead of handler
+            aliases: Other names for the same command
+            **metadata: returns, kind, completion and help (see CommandSpec)
+
+        Returns:
+            The command's spec
+        """
+        spec = self._specs.get(name)
+        if spec is not None and not spec.loaded:
+            # A plugin module declaring the command it was loaded for
+            spec.handler = handler
+            for key, value in metadata.items():
+                setattr(spec, key, value)
+        else:
+            spec = CommandSpec(name, handler, target, **metadata)
+            self._specs[name] = spec
+        for alias in aliases:
+            self._specs[alias] = spec
+        return spec
+
+    def command(self, name: str, **metadata) -> Callable[[Handler], Handler]:
+        """Decorator form of register()."""
+        def decorator(handler: Handler) -> Handler:
+            self.register(name, handler, **metadata)
+            return handler
+        return decorator
+
+    def lazy(self, name: str, target: str, **metadata) -> CommandSpec:
+        """Register a command whose module is imported on first use."""
+        return self.register(name, target=target, **metadata)
+
+    def discover_plugins(self) -> None:
+        """Register commands from installed packages' entry points, once."""
+        if self._discovered:
+            return
+        self._discovered = True
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:
+            return
+
+        found = entry_points()
+        if hasattr(found, 'select'):
+            group = found.select(group=self.plugin_group)
+        else:
+            group = found.get(self.plugin_group, [])
+        for entry_point in group:
+            if entry_point.name not in self._specs:
+                self.lazy(entry_point.name, entry_point.value,
+                          help=f"Plugin command ({entry_point.value})")
+
+    def spec(self, name: str, discover: bool = True) -> Optional[CommandSpec]:
+        """
+        Look up a command, scanning plugins the first time a name is unknown.
+
+        Args:
+            name: Command name
+            discover: Scan installed plugins if the name is not registered yet
+
+        Returns:
+            The command's spec, or None if there is no such command
+        """
+        spec = self._specs.get(name)
+        if spec is None and discover and not self._discovered:
+            self.discover_plugins()
+            spec = self._specs.get(name)
+        return spec
+
+    def load(self, spec: CommandSpec) -> Handler:
+        """
+        Return a command's handler, importing its module if needed.
+
+        Raises:
+            ImportError: If the module cannot be imported or lacks the handler
+        """
+        if not spec.loaded:
+            module_name, _, attribute = spec.target.partition(':')
+            module = importlib.import_module(module_name)
+            # Importing may have registered the handler through the decorator
+            if not spec.loaded:
+                handler = getattr(module, attribute, None) if attribute else None
+                if not callable(handler):
+                    raise ImportError(f"{spec.target} does not provide command '{spec.name}'")
+                spec.handler = handler
+        return spec.handler
+
+    def run(self, name: str, args: List[str]) -> int:
+        """
+        Run a registered command.
+
+        Args:
+            name: Command name
+            args: Command arguments
+
+        Returns:
+            Exit status per the command's return semantics
+
+        Raises:
+            KeyError: If there is no such command
+        """
+        spec = self.spec(name)
+        if spec is None:
+            raise KeyError(name)
+        try:
+            handler = self.load(spec)
+        except ImportError as e:
+            print(f"{name}: cannot load command: {e}")
+            return 1
+        return spec.exit_status(handler(args))
+
+    def is_cpu_bound(self, name: str) -> bool:
+        """Check whether a command should run in a worker process."""
+        spec = self.spec(name)
+        return spec is not None and spec.kind == KIND_CPU
+
+    def names(self) -> List[str]:
+        """Return all command names, including plugins."""
+        self.discover_plugins()
+        return list(self._specs)
+
+    def help_lines(self) -> Iterator[str]:
+        """Yield a help line per command, in registration order."""
+        for name in self.names():
+            spec = self._specs[name]
+            yield f"  {name:<8} - {spec.help}" if spec.help else f"  {name}"
+
+    def complete_argument(self, name: str, text: str) -> List[str]:
+        """
+        Complete an argument of a command using its completion hint.
+
+        Commands that are not registered (such as pipeline filters) complete
+        paths.
+
+        Args:
+            name: Command name
+            text: Partial argument
+
+        Returns:
+            Candidate completions
+        """
+        spec = self._specs.get(name)
+        hint = spec.completion if spec is not None else COMPLETE_PATH
+        if hint in (COMPLETE_PATH, COMPLETE_DIR):
+            return complete_path(text, directories_only=hint == COMPLETE_DIR)
+        if hint == COMPLETE_JOB:
+            from jobs import current_jobs
+            return [f"%{job_id}" for job_id in current_jobs().jobs if f"%{job_id}".startswith(text)]
+        if hint:
+            return [word for word in hint if word.startswith(text)]
+        return []
+
+    # Mapping protocol: name -> handler
+
+    def __getitem__(self, name: str) -> Handler:
+        spec = self.spec(name)
+        if spec is None:
+            raise KeyError(name)
+        return self.load(spec)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.spec(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names())
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+
+def complete_path(text: str, directories_only: bool = False) -> List[str]:
+    """
+    Complete a path relative to the session's working directory.
+
+    Args:
+        text: Partial path
+        directories_only: Only offer directories
+
+    Returns:
+        Matching paths, with a trailing separator on directories
+    """
+    from session import current_session
+
+    directory, prefix = os.path.split(text)
+    matches = []
+    try:
+        with os.scandir(current_session().resolve(directory or ".")) as items:
+            for item in items:
+                if not item.name.startswith(prefix) or (item.name.startswith('.') and not prefix):
+                    continue
+                is_dir = item.is_dir()
+                if directories_only and not is_dir:
+                    continue
+                matches.append(os.path.join(directory, item.name) + (os.sep if is_dir else ""))
+    except OSError:
+        return []
+    return sorted(matches)
+
+
+# Commands available to the terminal
+registry = CommandRegistry()
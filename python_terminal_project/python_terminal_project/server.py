@@ -0,0 +1,267 @@
+"""
+Terminal daemon for the Python Command Terminal.
+This module keeps a warm process serving many clients over a Unix domain socket.
+
+Each client gets its own Session, so its working directory, background jobs,
+history and AI confirmations are not seen by other clients.
+
+Protocol: newline-delimited JSON. A client may first send {"cwd": path} to
+start its session there, then sends {"line": command_line} per command. The
+server answers each command with any number of {"out": text} frames followed
+by {"status": exit_status}.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from cancel import CancellationToken, CommandCancelled, use_token
+from capture import redirect_thread_output
+from history_windows import CommandHistory
+from session import Session, use_session
+
+# Upper bound on commands executing at once across all clients
+SERVER_WORKERS = 16
+
+# Output is forwarded to the client in chunks of about this size, or sooner
+# if a command has been quiet for OUTPUT_FLUSH_INTERVAL seconds
+OUTPUT_CHUNK_SIZE = 1 << 14
+OUTPUT_FLUSH_INTERVAL = 0.05
+
+Runner = Callable[[str], int]
+
+
+def default_socket_path() -> str:
+    """Return the per-user default socket path."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return os.path.join(runtime_dir, f"pct-{os.getuid()}.sock")
+
+
+class ServerError(Exception):
+    """Raised when the server cannot take over its socket path."""
+
+
+def remove_stale_socket(path: str) -> None:
+    """
+    Remove a socket left behind by a server that is no longer running.
+
+    Raises:
+        ServerError: If the path is not a socket, or a server answers on it
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ServerError(f"{path}: exists and is not a socket")
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    except FileNotFoundError:
+        return
+    finally:
+        probe.close()
+    raise ServerError(f"{path}: another server is already listening")
+
+
+class _StreamingOutput:
+    """
+    Output target for a command run on behalf of a client.
+
+    Writes are collected and handed to the event loop in chunks, so a
+    command printing line by line does not produce one frame per line. A
+    timer on the loop flushes output left pending when the command goes quiet.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self.loop = loop
+        self.queue = queue
+        self.chunks = []
+        self.size = 0
+        self.last_flush = time.monotonic()
+        self.timer_pending = False
+        self.lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        with self.lock:
+            self.chunks.append(text)
+            self.size += len(text)
+            if self.size >= OUTPUT_CHUNK_SIZE or time.monotonic() - self.last_flush >= OUTPUT_FLUSH_INTERVAL:
+                self._flush()
+            elif not self.timer_pending:
+                self.timer_pending = True
+                self.loop.call_soon_threadsafe(self.loop.call_later, OUTPUT_FLUSH_INTERVAL, self._flush_on_timer)
+        return len(text)
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        # Called with the lock held
+        if self.chunks:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, "".join(self.chunks))
+            self.chunks = []
+            self.size = 0
+        self.last_flush = time.monotonic()
+
+    def _flush_on_timer(self) -> None:
+        with self.lock:
+            self.timer_pending = False
+            self._flush()
+
+    def isatty(self) -> bool:
+        return False
+
+
+class TerminalServer:
+    """
+    Serves terminal sessions to clients connected over a Unix socket.
+    """
+
+    def __init__(self, runner: Runner, socket_path: Optional[str] = None,
+                 workers: int = SERVER_WORKERS):
+        self.runner = runner
+        self.socket_path = socket_path or default_socket_path()
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="server")
+
+    def _execute(self, line: str, session: Session, token: CancellationToken,
+                 output: _StreamingOutput) -> int:
+        """Run one command line in a worker thread."""
+        with redirect_thread_output(output), use_session(session), use_token(token):
+            try:
+                return self.runner(line)
+            except CommandCancelled as e:
+                return e.status
+            except Exception as e:
+                print(f"An error occurred: {e}")
+                return 1
+            finally:
+                output.flush()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one client connection until it disconnects."""
+        loop = asyncio.get_running_loop()
+        session = Session()
+        session.history = CommandHistory(None)
+        token = CancellationToken()
+
+        async def send(frame: dict) -> None:
+            writer.write(json.dumps(frame).encode() + b"\n")
+            await writer.drain()
+
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                try:
+                    request = json.loads(raw)
+                except ValueError:
+                    await send({"out": "pct: malformed request\n"})
+                    await send({"status": 2})
+                    continue
+
+                if 'cwd' in request:
+                    try:
+                        session.chdir(request['cwd'])
+                    except OSError as e:
+                        await send({"out": f"pct: {request['cwd']}: {e.strerror}\n"})
+                    continue
+
+                line = str(request.get('line', '')).strip()
+                if not line:
+                    await send({"status": 0})
+                    continue
+                if line.split()[0].lower() in ('exit', 'quit'):
+                    await send({"status": 0})
+                    break
+                session.history.add_command(line)
+
+                queue: asyncio.Queue = asyncio.Queue()
+                output = _StreamingOutput(loop, queue)
+                future = loop.run_in_executor(
+                    self.executor, self._execute, line, session, token, output
+                )
+
+                # Forward output as it arrives until the command finishes
+                while True:
+                    getter = asyncio.ensure_future(queue.get())
+                    done, _ = await asyncio.wait({getter, future}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter in done:
+                        await send({"out": getter.result()})
+                        continue
+                    getter.cancel()
+                    break
+
+                # Output flushed just before completion may still be queued
+                await asyncio.sleep(0)
+                while not queue.empty():
+                    await send({"out": queue.get_nowait()})
+                await send({"status": future.result()})
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # Stop anything the client left running, then release its session
+            token.cancel("client disconnected")
+            writer.close()
+            session.close()
+
+    async def serve(self) -> None:
+        """Listen on the socket until cancelled."""
+        remove_stale_socket(self.socket_path)
+
+        # Create the socket private to this user, so there is no window in
+        # which others could connect before its permissions are tightened
+        old_umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+        finally:
+            os.umask(old_umask)
+        # Shut down cleanly (removing the socket) when asked to terminate
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        print(f"pct server listening on {self.socket_path}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def run_server(runner: Runner, socket_path: Optional[str] = None) -> int:
+    """
+    Run the terminal daemon in the foreground.
+
+    Args:
+        runner: Function that runs a command line and returns its status
+        socket_path: Unix socket to listen on (defaults to a per-user path)
+
+    Returns:
+        Process exit status
+    """
+    if not hasattr(asyncio, 'start_unix_server'):
+        print("pct: --server requires Unix domain socket support")
+        return 1
+
+    server = TerminalServer(runner, socket_path)
+    try:
+        asyncio.run(server.serve())
+    except ServerError as e:
+        print(f"pct: {e}")
+        return 1
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\npct server stopped")
+    return 0
@@ -0,0 +1,235 @@
+"""
+Terminal sessions for the Python Command Terminal.
+This module gives each session its own working directory, so commands resolve
+paths without os.chdir and several sessions can run in one process.
+"""
+
+import contextlib
+import contextvars
+import os
+import stat
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
+
+from cancel import check_cancelled
+from metrics import count_op
+
+if TYPE_CHECKING:
+    from history_windows import CommandHistory
+    from jobs import JobManager
+
+# Whether directory file descriptors can be opened on this platform
+_HAS_DIR_FD = hasattr(os, 'O_DIRECTORY') and os.open in os.supports_dir_fd
+
+# Opening a symlink with this flag fails instead of following the link
+_O_NOFOLLOW = getattr(os, 'O_NOFOLLOW', 0)
+
+
+class Session:
+    """
+    Per-session state: the virtual working directory and an open fd for it,
+    plus the session's background jobs, history and last AI phrase.
+
+    Single-component paths are handled with dir_fd-relative syscalls where
+    the platform supports them, which also avoids re-walking the cwd path.
+    """
+
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = os.path.abspath(cwd or os.getcwd())
+        self.dir_fd: Optional[int] = self._open_dir(self.cwd)
+        # None uses the terminal's saved history
+        self.history: Optional["CommandHistory"] = None
+        self.last_phrase: Optional[str] = None
+        self._jobs: Optional["JobManager"] = None
+
+    @property
+    def jobs(self) -> "JobManager":
+        """The session's background jobs, created on first use."""
+        if self._jobs is None:
+            from jobs import JobManager
+            self._jobs = JobManager()
+        return self._jobs
+
+    @staticmethod
+    def _open_dir(path: str) -> Optional[int]:
+        """Open a directory fd, raising the usual OSErrors for bad paths."""
+        if not _HAS_DIR_FD:
+            if not os.path.isdir(path):
+                raise NotADirectoryError(path) if os.path.exists(path) else FileNotFoundError(path)
+            return None
+        return os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+
+    def resolve(self, path: str) -> str:
+        """
+        Turn a path typed by the user into an absolute path.
+
+        Args:
+            path: Absolute or cwd-relative path ('~' is expanded)
+
+        Returns:
+            Normalized absolute path
+        """
+        return os.path.normpath(os.path.join(self.cwd, os.path.expanduser(path)))
+
+    def relative(self, path: str) -> Tuple[str, Optional[int]]:
+        """
+        Return (path, dir_fd) arguments for a dir_fd-aware syscall.
+
+        Plain names in the cwd are passed relative to the session's directory
+        fd; anything else is resolved to an absolute path with no dir_fd.
+        """
+        if self.dir_fd is not None and path not in ('.', '..') and os.sep not in path \
+                and not (os.altsep and os.altsep in path) and not path.startswith('~'):
+            return path, self.dir_fd
+        return self.resolve(path), None
+
+    def chdir(self, path: str) -> None:
+        """
+        Change the session's working directory.
+
+        Raises:
+            FileNotFoundError, NotADirectoryError, PermissionError: As os.chdir would
+        """
+        new_cwd = self.resolve(path)
+        count_op('open')
+        new_fd = self._open_dir(new_cwd)
+        old_fd, self.dir_fd = self.dir_fd, new_fd
+        self.cwd = new_cwd
+        if old_fd is not None:
+            os.close(old_fd)
+
+    def close(self) -> None:
+        """Release the session's directory fd."""
+        if self.dir_fd is not None:
+            os.close(self.dir_fd)
+            self.dir_fd = None
+
+    # Filesystem operations resolved against the session's cwd
+
+    def stat(self, path: str, follow_symlinks: bool = True) -> os.stat_result:
+        name, dir_fd = self.relative(path)
+        count_op('stat')
+        return os.stat(name, dir_fd=dir_fd, follow_symlinks=follow_symlinks)
+
+    def isdir(self, path: str, follow_symlinks: bool = True) -> bool:
+        try:
+            return stat.S_ISDIR(self.stat(path, follow_symlinks=follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+    def mkdir(self, path: str) -> None:
+        """Create a directory and any missing parents; existing ones are fine."""
+        name, dir_fd = self.relative(path)
+        count_op('mkdir')
+        if dir_fd is None:
+            os.makedirs(name, exist_ok=True)
+            return
+        try:
+            os.mkdir(name, dir_fd=dir_fd)
+        except FileExistsError:
+            if not self.isdir(path):
+                raise
+
+    def unlink(self, path: str) -> None:
+        name, dir_fd = self.relative(path)
+        count_op('unlink')
+        os.unlink(name, dir_fd=dir_fd)
+
+    def rmdir(self, path: str) -> None:
+        name, dir_fd = self.relative(path)
+        count_op('rmdir')
+        os.rmdir(name, dir_fd=dir_fd)
+
+    def remove_tree(self, path: str) -> None:
+        """
+        Recursively remove a directory, checking for cancellation between entries.
+
+        Entries are removed relative to their parent's directory fd where the
+        platform allows, so deep trees are not re-resolved from the root.
+        Symlinks, including path itself, are unlinked and never followed.
+        """
+        if not self.isdir(path, follow_symlinks=False):
+            self.unlink(path)
+            return
+        name, dir_fd = self.relative(path)
+        if _HAS_DIR_FD:
+            _remove_tree_fd(name, dir_fd)
+        else:
+            _remove_tree_path(name)
+
+    def open(self, path: str, mode: str = 'r', **kwargs):
+        """Open a file relative to the session's cwd."""
+        count_op('open')
+        return open(self.resolve(path), mode, **kwargs)
+
+
+def _remove_tree_fd(name: str, dir_fd: Optional[int]) -> None:
+    """Remove a directory tree using fd-relative syscalls."""
+    fd = os.open(name, os.O_RDONLY | os.O_DIRECTORY | _O_NOFOLLOW, dir_fd=dir_fd)
+    unlinked = 0
+    try:
+        with os.scandir(fd) as items:
+            entries = list(items)
+        for item in entries:
+            check_cancelled()
+            if item.is_dir(follow_symlinks=False):
+                _remove_tree_fd(item.name, fd)
+            else:
+                os.unlink(item.name, dir_fd=fd)
+                unlinked += 1
+    finally:
+        os.close(fd)
+        count_op('open')
+        count_op('scandir')
+        count_op('unlink', unlinked)
+    os.rmdir(name, dir_fd=dir_fd)
+    count_op('rmdir')
+
+
+def _remove_tree_path(path: str) -> None:
+    """Remove a directory tree using full paths."""
+    if os.path.islink(path):
+        raise NotADirectoryError(path)
+    with os.scandir(path) as items:
+        entries = list(items)
+    count_op('scandir')
+    for item in entries:
+        check_cancelled()
+        if item.is_dir(follow_symlinks=False):
+            _remove_tree_path(item.path)
+        else:
+            os.unlink(item.path)
+            count_op('unlink')
+    os.rmdir(path)
+    count_op('rmdir')
+
+
+_current_session: "contextvars.ContextVar[Optional[Session]]" = contextvars.ContextVar(
+    'current_session', default=None
+)
+_process_session: Optional[Session] = None
+
+
+def current_session() -> Session:
+    """
+    Return the session commands in this context run in.
+
+    Outside of use_session() this is a process-wide default session that
+    starts in the process's working directory.
+    """
+    global _process_session
+    session = _current_session.get()
+    if session is not None:
+        return session
+    if _process_session is None:
+        _process_session = Session()
+    return _process_session
+
+
+@contextlib.contextmanager
+def use_session(session: Session) -> Iterator[Session]:
+    """Run the enclosed commands in session."""
+    reset_token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(reset_token)
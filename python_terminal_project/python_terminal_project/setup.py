@@ -27,7 +27,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/anshikaxaa/python-terminal-project",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*", "tests", "tests.*"]),
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Intended Audience :: Developers",
@@ -52,6 +52,7 @@ setup(
         "console_scripts": [
             "pct=terminal_final:main",
             "python-terminal=terminal_final:main",
+            "pct-client=client:main",
         ],
     },
     include_package_data=True,
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Startup profiling for the Python Command Terminal.
+This module implements pct --startup-profile, which times every module import
+and initialization step between interpreter start and the first prompt.
+"""
+
+import builtins
+import os
+import subprocess
+import sys
+import time
+from typing import List, Optional, TextIO, Tuple
+
+# Number of imports listed in the report
+REPORT_IMPORTS = 20
+
+
+class StartupProfile:
+    """
+    Records import and initialization times while enabled.
+
+    Imports are timed by wrapping builtins.__import__. Each import's own time
+    excludes the imports it triggers, which are listed separately.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.imports: List[Tuple[str, float, float]] = []
+        self.phases: List[Tuple[str, float]] = []
+        self._child_time: List[float] = []
+        self._original_import = builtins.__import__
+
+    def enable(self) -> None:
+        """Start timing imports."""
+        self.enabled = True
+        self.started = time.perf_counter()
+        builtins.__import__ = self._import
+
+    def disable(self) -> None:
+        """Stop timing imports."""
+        self.enabled = False
+        builtins.__import__ = self._original_import
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only first-time absolute imports cost anything worth reporting
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._child_time.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._child_time.pop()
+            if self._child_time:
+                self._child_time[-1] += elapsed
+            self.imports.append((name, elapsed - children, elapsed))
+
+    def phase(self, name: str, start: float) -> None:
+        """Record an initialization step that began at start (perf_counter)."""
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self, out: Optional[TextIO] = None) -> None:
+        """Print the import and initialization breakdown."""
+        out = out or sys.stdout
+        total = time.perf_counter() - self.started
+        imports_total = sum(own for _, own, _ in self.imports)
+
+        print(f"Startup profile: {total * 1000:.1f} ms from first import to prompt", file=out)
+        print(f"\nImports: {len(self.imports)} modules, {imports_total * 1000:.1f} ms "
+              f"(slowest {REPORT_IMPORTS}, self / cumulative ms):", file=out)
+        for name, own, cumulative in sorted(self.imports, key=lambda entry: -entry[1])[:REPORT_IMPORTS]:
+            print(f"  {own * 1000:7.2f} {cumulative * 1000:8.2f}  {name}", file=out)
+
+        print("\nInitialization (ms):", file=out)
+        for name, elapsed in self.phases:
+            print(f"  {elapsed * 1000:7.2f}  {name}", file=out)
+
+
+# Shared profile; a no-op unless enabled
+profile = StartupProfile()
+
+
+def profile_startup() -> int:
+    """
+    Import the terminal and run its start-up steps up to the first prompt
+    with profiling enabled, then print the report.
+
+    Returns:
+        Process exit status
+    """
+    profile.enable()
+    start = time.perf_counter()
+    import terminal_final
+    profile.phase("import terminal_final", start)
+
+    start = time.perf_counter()
+    terminal_final.parse_arguments([])
+    profile.phase("parse arguments", start)
+
+    start = time.perf_counter()
+    terminal_final.prompt_text()
+    profile.phase("first prompt", start)
+
+    profile.disable()
+    profile.report()
+    return 0
+
+
+def run_startup_profile() -> int:
+    """
+    Profile start-up in a fresh interpreter, so every import is cold.
+
+    Returns:
+        Process exit status
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.abspath(__file__)], stdin=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    print(f"\nWall time including interpreter start-up and exit: {elapsed * 1000:.1f} ms")
+    return result.returncode
+
+
+if __name__ == "__main__":
+    sys.exit(profile_startup())
@@ -5,30 +5,506 @@ A fully functional command-line terminal with AI capabilities, command history,
 and comprehensive file system operations (Windows-compatible).
 """
 
+import argparse
+import io
 import os
 import sys
-from commands_final import COMMAND_HANDLERS
+import time
+from typing import Iterable, Iterator, List, Optional
+from commands_final import COMMAND_HANDLERS, RECORD_HANDLERS, handle_wait, report_finished_jobs
 from history_windows import add_to_history
+from cancel import INTERRUPTED_STATUS, CommandCancelled, run_cancellable
+from jobs import current_jobs
+from session import current_session
+from pipeline import STREAM_HANDLERS, has_pipeline_operators, run_pipeline
+from cmdline import BACKGROUND, Operator, ParseError, split_statements, tokenize
+from capture import capture_output
+from external import run_external
+import metrics
+from output import flush_output
+from registry import registry
+from records import CommandResult, ErrorRecord, parse_output_format, set_default_format, to_json
 
+# Exit status used when a command name is not recognized (matches POSIX shells)
+UNKNOWN_COMMAND_STATUS = 127
 
-def main():
+# Size of the stdout buffer used in batch mode
+BATCH_OUTPUT_BUFFER_SIZE = 1 << 16
+
+
+def run_command(command: str, args: List[str]) -> int:
+    """
+    Run a single command in the requested output format.
+
+    Args:
+        command: Command name (lowercased)
+        args: Command arguments, possibly including --json or --format=FORMAT
+            for commands with a record form
+
+    Returns:
+        0 on success, 1 on failure, UNKNOWN_COMMAND_STATUS for unknown commands
+    """
+    try:
+        output_format, args = parse_output_format(args, command in RECORD_HANDLERS)
+    except ValueError as e:
+        print(f"{command}: {e}")
+        return 2
+
+    if output_format == 'jsonl':
+        return run_structured(command, args)
+    return dispatch_command(command, args)
+
+
+def run_structured(command: str, args: List[str]) -> int:
+    """
+    Run a command with JSON Lines output.
+
+    Commands with a record form emit one object per record. Others run
+    normally and emit a single CommandResult object holding their status
+    and captured output.
+
+    Args:
+        command: Command name (lowercased)
+        args: Command arguments
+
+    Returns:
+        Exit status of the command
+    """
+    if command in RECORD_HANDLERS:
+        status = 0
+        for record in RECORD_HANDLERS[command](args):
+            if isinstance(record, ErrorRecord):
+                status = 1
+            print(to_json(record))
+        return status
+
+    status = 0
+
+    def run(run_args: List[str]) -> None:
+        nonlocal status
+        status = dispatch_command(command, run_args)
+
+    output = capture_output(run, args)
+    print(to_json(CommandResult(" ".join([command] + args), status, output)))
+    return status
+
+
+def dispatch_command(command: str, args: List[str]) -> int:
+    """
+    Run a single command and translate its result into an exit status.
+
+    Args:
+        command: Command name (lowercased)
+        args: Command arguments
+
+    Returns:
+        0 on success, 1 on failure, UNKNOWN_COMMAND_STATUS for unknown commands
+    """
+    if command not in COMMAND_HANDLERS:
+        print(f"Unknown command: {command}")
+        print("Type 'help' for available commands.")
+        print("Or try natural language: 'create folder test'")
+        return UNKNOWN_COMMAND_STATUS
+
+    return registry.run(command, args)
+
+
+def run_line(command_line: str) -> int:
+    """
+    Run one command line: statements separated by ';', '&' or newlines.
+
+    Args:
+        command_line: Stripped, non-empty command line
+
+    Returns:
+        Exit status of the last statement
+    """
+    try:
+        statements = split_statements(command_line)
+    except ParseError as e:
+        print(f"Syntax error: {e}")
+        return 1
+
+    status = 0
+    for statement in statements:
+        status = run_statement(statement)
+    return status
+
+
+def run_statement(statement: str) -> int:
+    """
+    Run one statement, which may be a pipeline, use redirection or end in '&'.
+
+    Args:
+        statement: Statement from split_statements()
+
+    Returns:
+        Exit status of the command or pipeline
+    """
+    try:
+        tokens = tokenize(statement)
+    except ParseError as e:
+        print(f"Syntax error: {e}")
+        return 1
+    if not tokens:
+        return 0
+
+    if tokens[-1] == BACKGROUND and isinstance(tokens[-1], Operator):
+        return start_background_job(statement[:-1].strip())
+
+    command = tokens[0].lower()
+    if command == 'timeout':
+        return run_with_timeout(tokens[1:], statement)
+    if command == 'time':
+        return run_timed(tokens[1:], statement)
+
+    with metrics.measure(command):
+        # Stream-only built-ins (grep, head, ...) run without scanning plugins
+        if has_pipeline_operators(tokens) or (
+                command in STREAM_HANDLERS and registry.spec(command, discover=False) is None):
+            return run_pipeline(tokens)
+
+        if command not in COMMAND_HANDLERS:
+            status = run_external(tokens)
+            if status is not None:
+                return status
+        return run_command(command, tokens[1:])
+
+
+def run_foreground(command_line: str, timeout: Optional[float] = None) -> int:
+    """
+    Run a command line in a cancellable worker, so Ctrl-C stops the command
+    rather than the terminal.
+
+    Args:
+        command_line: Command line to run
+        timeout: Optional time limit in seconds
+
+    Returns:
+        Exit status of the command, or a cancellation status
+    """
+    try:
+        return run_cancellable(run_line, command_line, timeout=timeout)
+    except CommandCancelled as e:
+        print(f"\nCommand {e.reason}: {command_line}")
+        if e.abandoned:
+            print("The command did not stop in time and was left running in the background.")
+        return e.status
+
+
+def run_with_timeout(args: List[str], command_line: str) -> int:
+    """
+    Handle the 'timeout' prefix: timeout SECONDS COMMAND [ARGS...]
+
+    Args:
+        args: Tokens following 'timeout'
+        command_line: Full command line (used to recover the inner command)
+
+    Returns:
+        Exit status of the inner command, or TIMED_OUT_STATUS
+    """
+    if len(args) < 2:
+        print("timeout: usage: timeout SECONDS COMMAND [ARGS...]")
+        return 1
+    try:
+        seconds = float(args[0])
+    except ValueError:
+        print(f"timeout: invalid time interval '{args[0]}'")
+        return 1
+
+    inner = command_line.split(None, 2)[2]
+    return run_foreground(inner, timeout=seconds)
+
+
+def run_timed(args: List[str], command_line: str) -> int:
+    """
+    Handle the 'time' prefix: time COMMAND [ARGS...]
+
+    Runs the command and reports its wall-clock time, the user and system
+    CPU time the terminal process spent on it, and memory use afterwards.
+
+    Args:
+        args: Tokens following 'time'
+        command_line: Full command line (used to recover the inner command)
+
+    Returns:
+        Exit status of the inner command
+    """
+    if not args:
+        print("time: usage: time COMMAND [ARGS...]")
+        return 1
+
+    inner = command_line.split(None, 1)[1]
+    times_before = os.times()
+    start = time.perf_counter()
+    try:
+        return run_statement(inner)
+    finally:
+        wall = time.perf_counter() - start
+        times_after = os.times()
+        user = times_after.user - times_before.user
+        system = times_after.system - times_before.system
+        flush_output()
+        print(f"\nreal {wall:.3f}s  user {user:.3f}s  sys {system:.3f}s  {memory_summary()}")
+
+
+def memory_summary() -> str:
+    """Describe the terminal's current and peak resident memory."""
+    parts = []
+    try:
+        import psutil
+        parts.append(f"rss {psutil.Process().memory_info().rss / (1 << 20):.1f}MB")
+    except ImportError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        parts.append(f"peak {peak * scale / (1 << 20):.1f}MB")
+    return '  '.join(parts)
+
+
+def start_background_job(command_line: str) -> int:
+    """
+    Submit a command line to run in the background.
+
+    Args:
+        command_line: Command line without the trailing '&'
+
+    Returns:
+        0 if the job was started, 1 otherwise
+    """
+    tokens = tokenize(command_line)
+    if not tokens:
+        print("Syntax error: '&' needs a command")
+        return 1
+
+    cpu_bound = registry.is_cpu_bound(tokens[0].lower())
+    job = current_jobs().submit(command_line, run_line, cpu_bound)
+    print(f"[{job.job_id}] started: {command_line}")
+    return 0
+
+
+def run_script(lines: Iterable[str], stop_on_error: bool = False) -> int:
+    """
+    Run commands non-interactively, without prompts, banner or history.
+
+    Blank lines and lines starting with '#' are skipped. Execution stops at
+    'exit'/'quit', or at the first failing command when stop_on_error is set.
+
+    Args:
+        lines: Command lines to run
+        stop_on_error: Stop at the first command with a non-zero status
+
+    Returns:
+        Exit status of the last command run
+    """
+    status = 0
+    for statement in iter_statements(lines):
+        if statement.split()[0].lower() in ('exit', 'quit'):
+            break
+
+        try:
+            status = run_foreground(statement)
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            status = 1
+
+        if status == INTERRUPTED_STATUS or (status and stop_on_error):
+            break
+
+    # Let background jobs finish before the script ends
+    handle_wait([])
+    return status
+
+
+def iter_statements(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Yield the statements of script lines, skipping blank and comment lines.
+
+    A line that cannot be parsed is yielded whole, so running it reports the
+    syntax error and fails.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            statements = split_statements(line)
+        except ParseError:
+            statements = [line]
+        yield from statements
+
+
+def use_buffered_stdout() -> None:
+    """Replace stdout with a block-buffered stream for batch output."""
+    sys.stdout.flush()
+    raw = io.FileIO(sys.stdout.fileno(), 'w', closefd=False)
+    sys.stdout = io.TextIOWrapper(
+        io.BufferedWriter(raw, buffer_size=BATCH_OUTPUT_BUFFER_SIZE),
+        encoding=sys.stdout.encoding,
+        errors=sys.stdout.errors,
+        line_buffering=False
+    )
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command-line options for the terminal.
+
+    Args:
+        argv: Argument list (defaults to sys.argv[1:])
+
+    Returns:
+        Parsed options
+    """
+    parser = argparse.ArgumentParser(
+        prog="pct",
+        description="Python Command Terminal. Runs interactively unless given "
+                    "commands with -c, a script file, or piped input."
+    )
+    parser.add_argument("-c", dest="command",
+                        help="run the given commands (separated by ';' or newlines) and exit")
+    parser.add_argument("-e", "--errexit", action="store_true",
+                        help="stop at the first command that fails")
+    parser.add_argument("--format", choices=("text", "jsonl", "json"), default="text",
+                        help="default output format for commands (json is an alias for jsonl)")
+    parser.add_argument("--server", action="store_true",
+                        help="serve sessions to pct-client over a Unix socket")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="socket path for --server (default: per-user path)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve OpenMetrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="report per-module import and initialization times, then exit")
+    parser.add_argument("script", nargs="?",
+                        help="script file to run ('-' reads from stdin)")
+    return parser.parse_args(argv)
+
+
+def run_batch(options: argparse.Namespace) -> int:
+    """
+    Run the terminal in non-interactive mode.
+
+    Args:
+        options: Parsed command-line options
+
+    Returns:
+        Process exit status
+    """
+    use_buffered_stdout()
+    try:
+        if options.command is not None:
+            return run_script(options.command.splitlines(), options.errexit)
+        if options.script and options.script != '-':
+            try:
+                with open(options.script, 'r') as f:
+                    return run_script(f, options.errexit)
+            except OSError as e:
+                print(f"pct: {options.script}: {e.strerror}", file=sys.stderr)
+                return 1
+        return run_script(sys.stdin, options.errexit)
+    except BrokenPipeError:
+        # The reader went away; nothing more to do
+        sys.stdout = sys.__stdout__
+        return 1
+    finally:
+        try:
+            sys.stdout.flush()
+        except BrokenPipeError:
+            pass
+
+
+def prompt_text() -> str:
+    """
+    Get ready to prompt: report finished jobs, flush output and build the prompt.
+
+    Returns:
+        Prompt showing the current working directory
+    """
+    report_finished_jobs()
+    flush_output()
+    return f"[{current_session().cwd}]> "
+
+
+def complete_line(text: str, preceding: str) -> List[str]:
+    """
+    Tab completion: command names at the start of a pipeline stage,
+    otherwise whatever the command's completion hint offers.
+
+    Args:
+        text: Word being completed
+        preceding: Line contents before that word
+
+    Returns:
+        Candidate completions
+    """
+    stage = preceding.rsplit('|', 1)[-1].split()
+    if not stage:
+        names = set(registry.names()) | set(STREAM_HANDLERS)
+        return sorted(name for name in names if name.startswith(text))
+    return registry.complete_argument(stage[0].lower(), text)
+
+
+def install_completion() -> None:
+    """Enable tab completion at the prompt where readline is available."""
+    try:
+        import readline
+    except ImportError:
+        return
+
+    matches: List[str] = []
+
+    def completer(text: str, state: int) -> Optional[str]:
+        nonlocal matches
+        if state == 0:
+            matches = complete_line(text, readline.get_line_buffer()[:readline.get_begidx()])
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer(completer)
+    readline.set_completer_delims(' \t|')
+    readline.parse_and_bind('tab: complete')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """
     Main function that runs the enhanced command terminal loop.
+
+    Args:
+        argv: Command-line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        Process exit status
     """
+    options = parse_arguments(argv)
+    if options.startup_profile:
+        from startup import run_startup_profile
+        return run_startup_profile()
+    set_default_format(options.format)
+    if options.metrics_port is not None:
+        from exporter import start_exporter
+        start_exporter(options.metrics_port)
+    if options.server:
+        from server import run_server
+        return run_server(run_line, options.socket)
+    if options.command is not None or options.script or not sys.stdin.isatty():
+        return run_batch(options)
+
     print("Python Command Terminal - Enhanced Version")
     print("Features: AI commands, command history, auto-completion")
     print("Type 'help' for available commands, 'exit' to quit.")
     print("-" * 60)
+    install_completion()
 
     # Main command loop
     while True:
         try:
-            # Get current working directory for prompt
-            current_dir = os.getcwd()
-            prompt = f"[{current_dir}]> "
-
             # Get user input
-            user_input = input(prompt).strip()
+            user_input = input(prompt_text()).strip()
 
             if not user_input:
                 continue
@@ -39,26 +515,12 @@ def main():
             # Parse command and arguments
             parts = user_input.split()
             command = parts[0].lower()
-            args = parts[1:]
-
-            # Handle the command
-            if command in COMMAND_HANDLERS:
-                handler = COMMAND_HANDLERS[command]
-
-                # Special handling for commands that return boolean values
-                if command in ['cd', 'mkdir', 'rm', 'exit']:
-                    result = handler(args)
-                    if command == 'exit' and result:
-                        break
-                    elif command in ['cd', 'mkdir', 'rm'] and not result:
-                        continue
-                else:
-                    # Other commands don't return values
-                    handler(args)
-            else:
-                print(f"Unknown command: {command}")
-                print("Type 'help' for available commands.")
-                print("Or try natural language: 'create folder test'")
+
+            if command in ('exit', 'quit'):
+                COMMAND_HANDLERS[command](parts[1:])
+                break
+
+            run_foreground(user_input)
 
         except KeyboardInterrupt:
             print("\nUse 'exit' to quit the terminal.")
@@ -68,6 +530,8 @@ def main():
         except Exception as e:
             print(f"An error occurred: {e}")
 
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
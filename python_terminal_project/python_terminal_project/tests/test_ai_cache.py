@@ -0,0 +1,69 @@
+"""
+Tests for the AI interpretation cache file.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai_commands  # noqa: E402
+from ai_cache import InterpretationCache  # noqa: E402
+
+
+class CacheFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cache')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def session(self) -> InterpretationCache:
+        return InterpretationCache(self.path)
+
+    def test_learning_keeps_earlier_sessions_entries(self):
+        first = self.session()
+        first.learn('show stuff', 'ls', [])
+        first.save()
+
+        second = self.session()
+        second.learn('make it', 'mkdir', ['x'])
+        second.put('where am i', ('pwd', []))
+        second.save()
+
+        third = self.session()
+        self.assertEqual(third.get('show stuff'), ('ls', []))
+        self.assertEqual(third.get('make it'), ('mkdir', ['x']))
+        self.assertEqual(third.get('where am i'), ('pwd', []))
+
+    def test_save_replaces_the_file_atomically(self):
+        cache = self.session()
+        cache.put('where am i', ('pwd', []))
+        cache.save()
+        self.assertEqual(os.listdir(self.tmp.name), ['cache'])
+
+    def test_unrecognized_entries_from_older_files_are_dropped(self):
+        with open(self.path, 'w') as f:
+            json.dump({'entries': [['gibberish', [None, []]], ['where am i', ['pwd', []]]]}, f)
+        cache = self.session()
+        self.assertIsNone(cache.get('gibberish'))
+        self.assertEqual(cache.get('where am i'), ('pwd', []))
+
+
+class InterpretTest(unittest.TestCase):
+    def test_only_understood_phrases_are_cached(self):
+        cache = InterpretationCache(None)
+        with mock.patch.object(ai_commands, 'interpretation_cache', cache):
+            self.assertEqual(ai_commands.interpret_natural_command('zzz qqq')[0], None)
+            self.assertIsNotNone(ai_commands.interpret_natural_command('list files')[0])
+        self.assertEqual(list(cache.entries), ['list files'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for the zip writer and its worker pool.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+from unittest import mock
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import archive  # noqa: E402
+from capture import capture_output  # noqa: E402
+from session import Session, use_session  # noqa: E402
+
+
+class ZipTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = {
+            'small.txt': b'small file\n' * 10,
+            'large.bin': bytes(range(256)) * 200 + os.urandom(20000),
+        }
+        os.mkdir(os.path.join(self.tmp.name, 'src'))
+        for name, data in self.files.items():
+            with open(os.path.join(self.tmp.name, 'src', name), 'wb') as f:
+                f.write(data)
+        self.session = Session(self.tmp.name)
+        # Small limits so both the whole-file and the block paths are used
+        self.limits = mock.patch.multiple(archive, SMALL_FILE_LIMIT=1 << 10,
+                                          BLOCK_SIZE=1 << 12, COPY_SIZE=1 << 12)
+        self.limits.start()
+
+    def tearDown(self):
+        self.limits.stop()
+        self.session.close()
+        self.tmp.cleanup()
+
+    def zip_and_check(self):
+        with use_session(self.session):
+            capture_output(archive.handle_zip, ['-r', 'out.zip', 'src'])
+        with zipfile.ZipFile(os.path.join(self.tmp.name, 'out.zip')) as zf:
+            self.assertIsNone(zf.testzip())
+            for name, data in self.files.items():
+                self.assertEqual(zf.read(f'src/{name}'), data)
+
+    def test_members_deflated_on_the_pool_are_valid(self):
+        flush = archive.Precompressed.flush
+        with mock.patch.object(archive.Precompressed, 'flush', autospec=True, side_effect=flush) as used:
+            self.zip_and_check()
+        # This zipfile version still lets the pool's output be written
+        self.assertTrue(used.called)
+
+    def test_members_are_valid_when_zipfile_cannot_take_a_compressor(self):
+        with mock.patch.object(archive, '_ZLIB_COMPRESSOR', type(None)):
+            self.zip_and_check()
+
+
+class OpenPoolTest(unittest.TestCase):
+    def test_queued_work_is_cancelled_when_the_command_fails(self):
+        release = threading.Event()
+        with mock.patch.object(archive, 'WORKERS', 1), self.assertRaises(RuntimeError):
+            with archive.open_pool() as executor:
+                executor.submit(release.wait, 5)
+                queued = [executor.submit(int) for _ in range(3)]
+                # Free the worker only once the failure has cancelled the rest
+                threading.Timer(0.1, release.set).start()
+                raise RuntimeError("failed")
+        self.assertTrue(all(future.cancelled() for future in queued))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Tests for command-line lexing.
+"""
+
+import os
+import sys
+import unittest
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cmdline import BACKGROUND, MAX_EXPANDED_WORDS, PIPE, ParseError, parse, tokenize  # noqa: E402
+
+
+class ListOperatorTest(unittest.TestCase):
+    def test_and_and_or_are_rejected(self):
+        for line in ('ls && pwd', 'ls&&pwd', 'ls || pwd'):
+            with self.subTest(line=line), self.assertRaises(ParseError):
+                parse(line)
+
+    def test_single_operators_still_lex(self):
+        tokens, spans = parse('ls & pwd | count')
+        self.assertEqual(list(tokens), ['ls', BACKGROUND, 'pwd', PIPE, 'count'])
+        self.assertEqual(len(spans), 2)
+
+    def test_quoted_operators_are_words(self):
+        tokens, _ = parse("grep 'a && b'")
+        self.assertEqual(list(tokens), ['grep', 'a && b'])
+
+
+class ExpansionLimitTest(unittest.TestCase):
+    def test_expansion_within_the_limit(self):
+        words = tokenize(f'mkdir d{{1..{MAX_EXPANDED_WORDS - 1}}}')
+        self.assertEqual(len(words), MAX_EXPANDED_WORDS)
+        self.assertEqual(words[-1], f'd{MAX_EXPANDED_WORDS - 1}')
+
+    def test_expansion_over_the_limit_is_rejected(self):
+        with self.assertRaises(ParseError):
+            tokenize('mkdir d{1..100000000}')
+
+
+if __name__ == '__main__':
+    unittest.main()
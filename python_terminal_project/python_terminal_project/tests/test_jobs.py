@@ -0,0 +1,71 @@
+"""
+Tests for background jobs and the executor each command runs on.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jobs  # noqa: E402
+from capture import capture_output  # noqa: E402
+from terminal_final import run_line, start_background_job  # noqa: E402
+
+
+class ProcessJobTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, 'n.txt'), 'w') as f:
+            f.write(''.join(f"line {n}\n" for n in range(20)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_job(self, start_method: str) -> jobs.Job:
+        manager = jobs.JobManager()
+        with mock.patch.object(jobs, 'PROCESS_START_METHOD', start_method), \
+                mock.patch.object(jobs, '_process_pool', None), \
+                mock.patch('jobs.current_session', return_value=jobs.Session(self.tmp.name)):
+            job = manager.submit('wc -l n.txt', run_line, cpu_bound=True)
+            manager.wait([job], timeout=60)
+            pool = jobs._processes()
+            self.assertEqual(pool._mp_context.get_start_method(), start_method)
+            pool.shutdown()
+        return job
+
+    def test_cpu_job_runs_under_spawn(self):
+        job = self.run_job('spawn')
+        output = job.unread_output()
+        self.assertEqual(job.status, 0, output)
+        self.assertEqual(output.split(), ['20', 'n.txt'])
+
+    @unittest.skipUnless(sys.platform != 'win32', "fork is POSIX-only")
+    def test_cpu_job_runs_under_fork(self):
+        job = self.run_job('fork')
+        output = job.unread_output()
+        self.assertEqual(job.status, 0, output)
+        self.assertEqual(output.split(), ['20', 'n.txt'])
+
+
+class ExecutorChoiceTest(unittest.TestCase):
+    def submitted_cpu_bound(self, command_line: str) -> bool:
+        manager = mock.Mock()
+        manager.submit.return_value = mock.Mock(job_id=1)
+        with mock.patch('terminal_final.current_jobs', return_value=manager):
+            capture_output(lambda args: start_background_job(command_line), [])
+        (_, _, cpu_bound), _ = manager.submit.call_args
+        return cpu_bound
+
+    def test_cpu_bound_commands_run_in_processes(self):
+        self.assertTrue(self.submitted_cpu_bound('wc -l n.txt'))
+
+    def test_other_commands_run_in_threads(self):
+        self.assertFalse(self.submitted_cpu_bound('ls'))
+
+
+if __name__ == '__main__':
+    unittest.main()
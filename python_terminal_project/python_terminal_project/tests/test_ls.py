@@ -0,0 +1,42 @@
+"""
+Regression tests for 'ls'.
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import unittest
+import warnings
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture import capture_output  # noqa: E402
+from commands_final import handle_ls  # noqa: E402
+from session import Session, use_session  # noqa: E402
+
+
+class ColumnsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for name in ('b', 'a', 'c'):
+            open(os.path.join(self.tmp.name, name), 'w').close()
+        self.session = Session(self.tmp.name)
+
+    def tearDown(self):
+        self.session.close()
+        self.tmp.cleanup()
+
+    def test_columns_close_the_directory(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            with use_session(self.session):
+                output = capture_output(handle_ls, ['-C'])
+            gc.collect()
+        self.assertEqual(output.splitlines()[-1].split(), ['a', 'b', 'c'])
+        self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
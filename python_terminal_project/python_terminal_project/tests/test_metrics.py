@@ -0,0 +1,74 @@
+"""
+Tests for command instrumentation.
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import unittest
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+
+
+class OpCountTest(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.switch_interval = sys.getswitchinterval()
+        # Switch threads often to give unsynchronized counting a chance to lose updates
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+        metrics.reset()
+
+    def test_worker_thread_counts_are_not_lost(self):
+        threads, per_thread = 8, 20000
+
+        def work():
+            for _ in range(per_thread):
+                metrics.count_op('stat')
+
+        with metrics.measure('test'):
+            workers = [threading.Thread(target=contextvars.copy_context().run, args=(work,))
+                       for _ in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        [row] = metrics.snapshot()
+        self.assertEqual(row.ops, {'stat': threads * per_thread})
+
+
+class HistogramTest(unittest.TestCase):
+    def percentile_of(self, value):
+        histogram = metrics.Histogram()
+        histogram.record(value)
+        # A larger value keeps the result from being clamped to the maximum
+        histogram.record(metrics.HISTOGRAM_MAX_NS)
+        return histogram.percentile(50)
+
+    def test_small_values_are_exact(self):
+        for value in range(1 << metrics.HISTOGRAM_BITS):
+            self.assertEqual(self.percentile_of(value), value)
+
+    def test_known_bucket_middles(self):
+        # 1000 falls in [992, 1023]; 1_000_000 in [983_040, 1_015_807]
+        self.assertEqual(self.percentile_of(1000), 1007)
+        self.assertEqual(self.percentile_of(1_000_000), 999_423)
+
+    def test_relative_error_is_bounded(self):
+        bound = 2 ** -metrics.HISTOGRAM_BITS
+        value = 1
+        while value < metrics.HISTOGRAM_MAX_NS:
+            with self.subTest(value=value):
+                self.assertLessEqual(abs(self.percentile_of(value) - value), value * bound)
+            value = value * 3 // 2 + 1
+
+
+if __name__ == '__main__':
+    unittest.main()
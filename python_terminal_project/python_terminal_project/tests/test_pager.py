@@ -0,0 +1,39 @@
+"""
+Tests for 'less' when output is not a terminal.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pager  # noqa: E402
+from capture import capture_output  # noqa: E402
+from session import Session, use_session  # noqa: E402
+
+
+class PassthroughTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.session = Session(self.tmp.name)
+
+    def tearDown(self):
+        self.session.close()
+        self.tmp.cleanup()
+
+    def test_characters_split_across_blocks_survive(self):
+        text = "é" * 1000 + "\n"
+        with open(os.path.join(self.tmp.name, 'u.txt'), 'w', encoding='utf-8') as f:
+            f.write(text)
+        # An odd block size splits every other two-byte character
+        with use_session(self.session), mock.patch.object(pager, 'COPY_BLOCK', 7):
+            output = capture_output(pager.handle_less, ['u.txt'])
+        self.assertEqual(output, text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Tests for 'parallel' output modes.
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import commands_final  # noqa: E402,F401  (registers the built-in commands)
+from parallel import stream_parallel  # noqa: E402
+from session import Session, use_session  # noqa: E402
+
+
+class ParallelOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for name in ('a', 'b', 'c'):
+            os.makedirs(os.path.join(self.tmp.name, name, f"in_{name}"))
+        self.session = Session(self.tmp.name)
+
+    def tearDown(self):
+        self.session.close()
+        self.tmp.cleanup()
+
+    def parallel(self, *args):
+        stderr = io.StringIO()
+        with use_session(self.session), redirect_stderr(stderr):
+            lines = list(stream_parallel(list(args), iter([])))
+        # 'ls' prints a heading, then one entry per line ending in its name
+        entries = [line.split()[-1] for line in lines if not line.startswith('Contents of')]
+        return lines, entries, stderr.getvalue()
+
+    def test_summary_stays_out_of_output(self):
+        lines, entries, stderr = self.parallel('-k', 'ls', ':::', 'a', 'b', 'c')
+        self.assertEqual(entries, ['in_a', 'in_b', 'in_c'])
+        self.assertFalse(any(line.startswith('parallel:') for line in lines))
+        self.assertIn('3 succeeded, 0 failed', stderr)
+
+    def test_interleaved_output_keeps_every_line(self):
+        lines, entries, _ = self.parallel('-u', '-j', '3', 'ls', ':::', 'a', 'b', 'c')
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(sorted(entries), ['in_a', 'in_b', 'in_c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
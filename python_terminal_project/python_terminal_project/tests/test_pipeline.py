@@ -0,0 +1,95 @@
+"""
+Tests for pipelines: built-in filters and exit statuses.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture import capture_output  # noqa: E402
+from session import Session, use_session  # noqa: E402
+from terminal_final import run_line  # noqa: E402
+
+
+class PipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, 'n.txt'), 'w') as f:
+            f.write(''.join(f"{n}\n" for n in range(20, 0, -1)))
+        self.session = Session(self.tmp.name)
+
+    def tearDown(self):
+        self.session.close()
+        self.tmp.cleanup()
+
+    def run_line(self, line):
+        with use_session(self.session):
+            return capture_output(lambda args: run_line(line), []).splitlines()
+
+    def status(self, line):
+        statuses = []
+        with use_session(self.session):
+            capture_output(lambda args: statuses.append(run_line(line)), [])
+        return statuses[0]
+
+
+class FilterArgumentsTest(PipelineTestCase):
+    def test_builtin_filters_take_their_own_arguments(self):
+        self.assertEqual(self.run_line('cat n.txt | sort -r | head 2'), ['9', '8'])
+        self.assertEqual(self.run_line('cat n.txt | grep -v 1 | tail -n 1'), ['2'])
+
+    @unittest.skipUnless(shutil.which('sort') and shutil.which('grep'), "needs sort and grep on PATH")
+    def test_other_arguments_run_the_program_from_path(self):
+        self.assertEqual(self.run_line('cat n.txt | sort -n | head 3'), ['1', '2', '3'])
+        self.assertEqual(self.run_line('grep -x 7 n.txt'), ['7'])
+
+    def test_less_with_a_file_feeds_the_pipeline(self):
+        self.assertEqual(self.run_line('less n.txt | head 2'), ['20', '19'])
+
+    def test_wc_with_paths_counts_the_files(self):
+        self.assertEqual(self.run_line('wc -l n.txt | cat'), ['20 n.txt'])
+        self.run_line('wc -l n.txt > wc.out')
+        with open(os.path.join(self.tmp.name, 'wc.out')) as f:
+            self.assertEqual(f.read(), '20 n.txt\n')
+        self.assertEqual(self.run_line('cat n.txt | wc -l'), ['20'])
+
+
+class PipelineStatusTest(PipelineTestCase):
+    def test_failed_stage_fails_the_pipeline(self):
+        self.assertEqual(self.status('cat missing | head'), 1)
+        self.assertEqual(self.status('ls missing | grep x'), 1)
+
+    def test_successful_pipeline_exits_zero(self):
+        self.assertEqual(self.status('cat n.txt | head 1'), 0)
+
+    @unittest.skipUnless(shutil.which('sh'), "needs sh on PATH")
+    def test_program_status_is_returned(self):
+        self.assertEqual(self.status("cat n.txt | sh -c 'exit 3' | head 1"), 3)
+
+    def test_stage_stopped_early_does_not_fail(self):
+        self.assertEqual(self.status('find . | head 1'), 0)
+
+
+class LazyStreamHandlerTest(PipelineTestCase):
+    # Modules whose stream handlers are imported only when a stage uses them
+    LAZY_MODULES = ('pager', 'parallel', 'wordcount')
+
+    def test_startup_does_not_import_lazy_handlers(self):
+        code = ("import sys, terminal_final; "
+                f"print(sorted(m for m in {self.LAZY_MODULES!r} if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.strip(), '[]', result.stderr)
+
+    def test_lazy_handler_runs(self):
+        self.assertEqual(self.run_line('cat n.txt | head 2 | less'), ['20', '19'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Tests for the 'profile' command.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import commands_final  # noqa: E402,F401  (registers the built-in commands)
+from capture import capture_output  # noqa: E402
+from profiler import handle_profile  # noqa: E402
+from session import Session, use_session  # noqa: E402
+
+
+class ProfileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, 'found.txt'), 'w') as f:
+            f.write('x\n')
+        self.session = Session(self.tmp.name)
+
+    def tearDown(self):
+        self.session.close()
+        self.tmp.cleanup()
+
+    def profile(self, *args):
+        with use_session(self.session):
+            return capture_output(handle_profile, list(args))
+
+    def test_stream_only_command_is_profiled(self):
+        output = self.profile('-n', '3', 'find', '.')
+        self.assertIn('found.txt', output)
+        self.assertIn("Profile of 'find'", output)
+
+    def test_unknown_command_is_reported(self):
+        self.assertIn("command not found", self.profile('no-such-command'))
+
+
+if __name__ == '__main__':
+    unittest.main()
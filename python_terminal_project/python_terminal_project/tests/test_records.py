@@ -0,0 +1,50 @@
+"""
+Tests for --json / --format=FORMAT handling.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture import capture_output  # noqa: E402
+from session import Session, use_session  # noqa: E402
+from terminal_final import run_command  # noqa: E402
+
+
+class OutputFormatTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.session = Session(self.tmp.name)
+
+    def tearDown(self):
+        self.session.close()
+        self.tmp.cleanup()
+
+    def run_command(self, command, *args):
+        with use_session(self.session):
+            return capture_output(lambda run_args: run_command(command, run_args), list(args))
+
+    def test_record_command_takes_json_option(self):
+        output = self.run_command('pwd', '--json')
+        self.assertEqual(json.loads(output), {"cwd": self.session.cwd})
+
+    def test_other_commands_keep_json_as_an_argument(self):
+        self.run_command('mkdir', '--json')
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp.name, '--json')))
+
+    def test_path_errors_carry_path_and_reason(self):
+        output = self.run_command('find', 'missing', '--json')
+        self.assertEqual(json.loads(output), {
+            "error": "find: missing: No such file or directory",
+            "path": "missing",
+            "reason": "No such file or directory",
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+"""
+Tests for the command registry.
+"""
+
+import os
+import re
+import sys
+import unittest
+from unittest import mock
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import commands_final  # noqa: E402,F401  (registers the built-in commands)
+from capture import capture_output  # noqa: E402
+from registry import CommandRegistry, registry  # noqa: E402
+from terminal_final import run_statement  # noqa: E402
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LazyCommandTest(unittest.TestCase):
+    def test_lazy_modules_are_bundled_by_pyinstaller(self):
+        with open(os.path.join(PACKAGE_DIR, '.github', 'workflows', 'deploy.yml')) as f:
+            hidden = set(re.findall(r'--hidden-import (\w+)', f.read()))
+        lazy = {spec.target.split(':')[0] for spec in registry._specs.values() if spec.target}
+        self.assertTrue(lazy)
+        self.assertEqual(lazy - hidden, set())
+
+    def test_stream_only_command_does_not_scan_plugins(self):
+        with mock.patch.object(CommandRegistry, 'discover_plugins') as discover:
+            capture_output(lambda args: run_statement('grep x'), [])
+        discover.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Regression tests for 'rm'.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture import capture_output  # noqa: E402
+from commands_final import handle_rm  # noqa: E402
+from session import Session, use_session  # noqa: E402
+
+
+@unittest.skipUnless(hasattr(os, 'symlink'), "needs symlinks")
+class RemoveSymlinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.target = os.path.join(self.root, 'target')
+        os.makedirs(os.path.join(self.target, 'sub'))
+        for name in ('a', os.path.join('sub', 'b')):
+            with open(os.path.join(self.target, name), 'w') as f:
+                f.write('keep')
+        os.symlink(self.target, os.path.join(self.root, 'link'))
+        self.session = Session(self.root)
+
+    def tearDown(self):
+        self.session.close()
+        self.tmp.cleanup()
+
+    def rm(self, *args):
+        with use_session(self.session):
+            return capture_output(handle_rm, list(args))
+
+    def assert_target_intact(self):
+        self.assertTrue(os.path.isfile(os.path.join(self.target, 'a')))
+        self.assertTrue(os.path.isfile(os.path.join(self.target, 'sub', 'b')))
+
+    def test_recursive_rm_of_symlink_removes_only_the_link(self):
+        self.rm('-r', 'link')
+        self.assertFalse(os.path.lexists(os.path.join(self.root, 'link')))
+        self.assert_target_intact()
+
+    def test_rm_of_symlink_removes_only_the_link(self):
+        self.rm('link')
+        self.assertFalse(os.path.lexists(os.path.join(self.root, 'link')))
+        self.assert_target_intact()
+
+    def test_symlink_inside_tree_is_not_followed(self):
+        tree = os.path.join(self.root, 'tree')
+        os.mkdir(tree)
+        os.symlink(self.target, os.path.join(tree, 'inner'))
+        self.rm('-r', 'tree')
+        self.assertFalse(os.path.lexists(tree))
+        self.assert_target_intact()
+
+    def test_tree_removal_by_path_does_not_follow_symlink(self):
+        self.session.remove_tree(os.path.join(self.root, 'link'))
+        self.assertFalse(os.path.lexists(os.path.join(self.root, 'link')))
+        self.assert_target_intact()
+
+
+if __name__ == '__main__':
+    unittest.main()
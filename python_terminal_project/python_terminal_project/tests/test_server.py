@@ -0,0 +1,138 @@
+"""
+Tests for the terminal daemon.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+import time
+import unittest
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import OUTPUT_FLUSH_INTERVAL, ServerError, TerminalServer, remove_stale_socket  # noqa: E402
+from terminal_final import run_line  # noqa: E402
+
+
+def slow_runner(line: str) -> int:
+    """Print one line, then go quiet for a while before printing another."""
+    print("first")
+    time.sleep(OUTPUT_FLUSH_INTERVAL * 10)
+    print("second")
+    return 0
+
+
+@unittest.skipUnless(hasattr(asyncio, 'start_unix_server'), "needs Unix domain sockets")
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, 'pct.sock')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def serve(self, runner, *clients):
+        """Run each client's lines in turn, returning (seconds, text) frames per client."""
+        async def client(lines):
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            started = time.monotonic()
+            frames = []
+            for line in lines:
+                writer.write(json.dumps({"line": line}).encode() + b"\n")
+                while True:
+                    frame = json.loads(await reader.readline())
+                    if 'status' in frame:
+                        break
+                    frames.append((time.monotonic() - started, frame['out']))
+            # Let the server end the session before it stops listening
+            writer.write(json.dumps({"line": "exit"}).encode() + b"\n")
+            await reader.read()
+            writer.close()
+            return frames
+
+        async def main():
+            server = TerminalServer(runner, self.socket_path)
+            listening = await asyncio.start_unix_server(server.handle_client, path=self.socket_path)
+            async with listening:
+                return [await client(lines) for lines in clients]
+
+        return asyncio.run(main())
+
+    def test_quiet_command_output_is_flushed_by_timer(self):
+        [frames] = self.serve(slow_runner, ['slow'])
+        first_at, text = frames[0]
+        self.assertEqual(text, "first\n")
+        self.assertLess(first_at, OUTPUT_FLUSH_INTERVAL * 5)
+
+    def test_clients_do_not_share_jobs_or_history(self):
+        first, second = self.serve(
+            run_line,
+            [f'cd {self.tmp.name}', 'pwd &', 'wait'],
+            ['jobs', 'history'],
+        )
+        output = "".join(text for _, text in second)
+        self.assertIn("No background jobs.", output)
+        self.assertNotIn("pwd", output)
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "needs Unix domain sockets")
+class SocketPathTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'pct.sock')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def bound_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        return sock
+
+    def test_regular_file_is_left_alone(self):
+        with open(self.path, 'w') as f:
+            f.write('notes')
+        with self.assertRaises(ServerError):
+            remove_stale_socket(self.path)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), 'notes')
+
+    def test_live_server_is_not_taken_over(self):
+        with self.bound_socket() as sock:
+            sock.listen()
+            with self.assertRaises(ServerError):
+                remove_stale_socket(self.path)
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_stale_socket_is_removed(self):
+        # Bound but not listening: connecting is refused, as after a crash
+        with self.bound_socket():
+            remove_stale_socket(self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_socket_is_private_from_the_start(self):
+        modes = []
+
+        async def main():
+            server = TerminalServer(run_line, self.path)
+            task = asyncio.ensure_future(server.serve())
+            while not os.path.exists(self.path):
+                await asyncio.sleep(0.01)
+            modes.append(os.stat(self.path).st_mode)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(main())
+        self.assertEqual(stat.S_IMODE(modes[0]) & 0o077, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
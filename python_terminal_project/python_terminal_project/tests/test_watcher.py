@@ -0,0 +1,55 @@
+"""
+Tests for the polling fallback of 'watch'.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# The terminal's modules live next to this package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watcher import PollingWatcher  # noqa: E402
+
+
+class PollingWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.tmp.name, 'watched')
+        with open(self.file, 'w') as f:
+            f.write('one')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_new_entry_in_directory_is_a_change(self):
+        watcher = PollingWatcher(self.tmp.name, 0.01)
+        open(os.path.join(self.tmp.name, 'added'), 'w').close()
+        watcher.wait()
+        self.assertIn('added', {entry[0] for entry in watcher.signature})
+
+    def test_rewritten_file_is_a_change(self):
+        watcher = PollingWatcher(self.file, 0.01)
+        before = watcher.signature
+        with open(self.file, 'w') as f:
+            f.write('three')
+        watcher.wait()
+        self.assertNotEqual(watcher.signature, before)
+
+    def test_removed_file_is_a_change(self):
+        watcher = PollingWatcher(self.file, 0.01)
+        os.unlink(self.file)
+        watcher.wait()
+        self.assertIsNone(watcher.signature)
+
+    def test_file_removed_between_scandir_and_stat(self):
+        watcher = PollingWatcher(self.file, 0.01)
+        os.unlink(self.file)
+        with mock.patch('watcher.os.scandir', side_effect=NotADirectoryError):
+            self.assertIsNone(watcher._signature())
+
+
+if __name__ == '__main__':
+    unittest.main()
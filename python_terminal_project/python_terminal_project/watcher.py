@@ -0,0 +1,304 @@
+"""
+Watching commands for the Python Command Terminal.
+This module implements the 'watch' command, which re-runs a command and
+redraws its output in place:
+
+    watch [-n SECS] [--count N] COMMAND [ARGS...]     re-run every SECS seconds
+    watch --on-change PATH [-n SECS] COMMAND [ARGS...] re-run when PATH changes
+
+In change mode the command only runs again when PATH changes. On Linux the
+terminal blocks on inotify (through ctypes, so nothing needs installing);
+elsewhere, or if inotify is unavailable, it compares directory listings
+every SECS seconds. Bursts of events, such as an unpacked archive, are
+coalesced into one re-run.
+"""
+
+import io
+import os
+import select
+import struct
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from cancel import POLL_INTERVAL, cancellable_sleep, check_cancelled
+from capture import redirect_thread_output
+from output import is_terminal
+from registry import registry
+
+# Seconds between runs (interval mode) or directory comparisons (polling)
+DEFAULT_INTERVAL = 2.0
+
+# Events closer together than this are treated as one change
+COALESCE_DELAY = 0.1
+
+# ... but a steady stream of events still triggers a re-run this often
+COALESCE_LIMIT = 1.0
+
+# ANSI sequence moving the cursor home and clearing the screen
+CLEAR_SCREEN = '\x1b[H\x1b[J'
+
+USAGE = "watch: usage: watch [-n SECS] [--count N] [--on-change PATH] COMMAND [ARGS...]"
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_IGNORED = 0x8000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """
+    Waits for changes to a file or directory using Linux inotify.
+
+    Raises:
+        OSError: If inotify is unavailable or the path cannot be watched
+    """
+
+    def __init__(self, path: str):
+        import ctypes
+
+        self.path = path
+        # The process's own symbols include libc's inotify functions
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watching = False
+        try:
+            self._add_watch()
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _add_watch(self) -> None:
+        import ctypes
+
+        if self._libc.inotify_add_watch(self.fd, os.fsencode(self.path), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), self.path)
+        self.watching = True
+
+    def _drain(self) -> None:
+        """Read all pending events, noticing if the watched path went away."""
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                if mask & IN_IGNORED:
+                    self.watching = False
+                offset += _EVENT_HEADER.size + length
+
+    def wait(self) -> None:
+        """Block until the path changes, then let the burst of events settle."""
+        while True:
+            check_cancelled()
+            if not self.watching:
+                # The path was removed or moved away; watch for it to return
+                try:
+                    self._add_watch()
+                    return
+                except OSError:
+                    cancellable_sleep(DEFAULT_INTERVAL)
+                    continue
+            if select.select([self.fd], [], [], POLL_INTERVAL)[0]:
+                break
+
+        self._drain()
+        deadline = time.monotonic() + COALESCE_LIMIT
+        while time.monotonic() < deadline and select.select([self.fd], [], [], COALESCE_DELAY)[0]:
+            self._drain()
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Waits for changes by comparing a path's listing every interval seconds.
+
+    Directories are compared by each entry's name, inode, size and mtime, so
+    rewritten files count as changes as well as added and removed ones.
+    """
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self.signature = self._signature()
+
+    def _signature(self) -> Optional[frozenset]:
+        try:
+            with os.scandir(self.path) as items:
+                entries = []
+                for item in items:
+                    stat = item.stat(follow_symlinks=False)
+                    entries.append((item.name, stat.st_ino, stat.st_size, stat.st_mtime_ns))
+                return frozenset(entries)
+        except NotADirectoryError:
+            pass
+        except OSError:
+            return None
+        # A file: it may have been removed since scandir looked at it
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return frozenset([(stat.st_ino, stat.st_size, stat.st_mtime_ns)])
+
+    def wait(self) -> None:
+        while True:
+            cancellable_sleep(self.interval)
+            signature = self._signature()
+            if signature != self.signature:
+                self.signature = signature
+                return
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(path: str, interval: float):
+    """Return an inotify watcher for path where possible, else a polling one."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(path)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(path, interval)
+
+
+def parse_watch_args(args: List[str]) -> Optional[Tuple[float, Optional[int], Optional[str], List[str]]]:
+    """
+    Parse the options that precede the watched command.
+
+    Returns:
+        (interval, count, watched path, command) or None after printing an error
+    """
+    interval, count, path = DEFAULT_INTERVAL, None, None
+    index = 0
+    option = ''
+    try:
+        while index < len(args) and args[index].startswith('-'):
+            option = args[index]
+            if option in ('-n', '--interval'):
+                index += 1
+                interval = float(args[index])
+                if interval <= 0:
+                    raise ValueError(option)
+            elif option == '--count':
+                index += 1
+                count = int(args[index])
+            elif option == '--on-change':
+                index += 1
+                path = args[index]
+            elif option == '--':
+                index += 1
+                break
+            else:
+                print(f"watch: unknown option {option}")
+                print(USAGE)
+                return None
+            index += 1
+    except (IndexError, ValueError):
+        print(f"watch: {option}: invalid or missing value")
+        print(USAGE)
+        return None
+
+    if index >= len(args):
+        print(USAGE)
+        return None
+    return interval, count, path, args[index:]
+
+
+def run_captured(argv: List[str]) -> Tuple[int, str]:
+    """
+    Run a built-in or external command and capture its output.
+
+    Returns:
+        (exit status, output text)
+    """
+    buffer = io.StringIO()
+    with redirect_thread_output(buffer):
+        command = argv[0].lower()
+        if command in registry:
+            status = registry.run(command, argv[1:])
+        else:
+            from external import run_external
+            status = run_external(argv)
+            if status is None:
+                print(f"watch: {argv[0]}: command not found")
+                status = 127
+    return status, buffer.getvalue()
+
+
+def handle_watch(args: List[str]) -> int:
+    """
+    Handle the 'watch' command (see the module docstring for usage).
+
+    Runs until interrupted with Ctrl-C, or --count times.
+
+    Args:
+        args: Options, then the command and its arguments
+
+    Returns:
+        Exit status of the last run
+    """
+    parsed = parse_watch_args(args)
+    if parsed is None:
+        return 2
+    interval, count, path, argv = parsed
+
+    watcher = None
+    if path is not None:
+        from session import current_session
+        path = current_session().resolve(path)
+        if not os.path.exists(path):
+            print(f"watch: {path}: No such file or directory")
+            return 1
+        watcher = open_watcher(path, interval)
+        trigger = f"On change of {path}"
+    else:
+        trigger = f"Every {interval:g}s"
+
+    stdout = sys.stdout
+    redraw = is_terminal(stdout)
+    command_line = ' '.join(argv)
+    runs = 0
+    try:
+        while True:
+            status, output = run_captured(argv)
+            runs += 1
+            header = f"{trigger}: {command_line}    {time.strftime('%Y-%m-%d %H:%M:%S')}"
+            if redraw:
+                stdout.write(f"{CLEAR_SCREEN}{header}\n\n{output}")
+            else:
+                stdout.write(f"{header}\n{output}\n")
+            stdout.flush()
+
+            if count is not None and runs >= count:
+                return status
+            if watcher is not None:
+                watcher.wait()
+            else:
+                cancellable_sleep(interval)
+    finally:
+        if watcher is not None:
+            watcher.close()
@@ -0,0 +1,408 @@
+"""
+Line, word and byte counts for the Python Command Terminal.
+This module implements the 'wc' command:
+
+    wc [-l] [-w] [-c] [-r] PATH...     counts per file and a total (-r: walk directories)
+
+Files are memory-mapped and counted in CHUNK_SIZE chunks with bytes.count,
+so no Python code runs per line. Words are counted by translating each
+chunk to a mask of spaces and non-spaces and counting where a word starts.
+When there is more than PARALLEL_THRESHOLD bytes to read, files larger
+than RANGE_SIZE are split into byte ranges, and ranges and small files
+are spread across a process pool. Each range looks at the byte before it,
+so a word cut by a range boundary is only counted once.
+"""
+
+import mmap
+import os
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from cancel import POLL_INTERVAL, check_cancelled
+from metrics import count_op
+from pipestatus import set_stage_status
+from session import current_session
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# Bytes counted per bytes.count call
+CHUNK_SIZE = 16 << 20
+
+# Most bytes counted by one worker task; larger files are split
+RANGE_SIZE = 64 << 20
+
+# Below this many bytes in total, counting is done in-process, since
+# handing work to the pool costs more than it saves
+PARALLEL_THRESHOLD = 128 << 20
+
+# Worker processes (None: one per CPU)
+MAX_WORKERS = None
+
+# Bytes that separate words
+WHITESPACE = b' \t\n\r\v\f'
+
+# Maps whitespace to ' ' and every other byte to 'x', so words start at ' x'
+_WORD_MASK = bytes(0x20 if byte in WHITESPACE else 0x78 for byte in range(256))
+
+USAGE = "wc: usage: wc [-l] [-w] [-c] [-r] PATH..."
+
+Counts = Tuple[int, int, int]
+
+# A file or part of one: (path, start, end); end is None to read the whole
+# file as a stream, for files that cannot be mapped
+Range = Tuple[str, int, Optional[int]]
+
+_pool: Optional["ProcessPoolExecutor"] = None
+
+
+def count_chunk(data: bytes, after_space: bool, words: bool = True) -> Tuple[int, int]:
+    """
+    Count the newlines and word starts in a chunk.
+
+    Args:
+        data: Chunk contents
+        after_space: Whether the byte before the chunk was whitespace (or
+            the chunk starts the file)
+        words: Count words too; counting only newlines is much cheaper
+
+    Returns:
+        (lines, words)
+    """
+    if not words:
+        return data.count(b'\n'), 0
+    mask = data.translate(_WORD_MASK)
+    starts = mask.count(b' x')
+    if after_space and mask[:1] == b'x':
+        starts += 1
+    return data.count(b'\n'), starts
+
+
+def count_stream(f, words: bool = True) -> Counts:
+    """Count a file by reading it, for files such as /proc entries that cannot be mapped."""
+    lines = word_count = size = 0
+    after_space = True
+    while True:
+        data = f.read(CHUNK_SIZE)
+        if not data:
+            return lines, word_count, size
+        chunk_lines, chunk_words = count_chunk(data, after_space, words)
+        lines += chunk_lines
+        word_count += chunk_words
+        size += len(data)
+        after_space = data[-1] in WHITESPACE
+
+
+def count_range(path: str, start: int, end: Optional[int], words: bool = True) -> Counts:
+    """
+    Count lines, words and bytes in part of a file.
+
+    Args:
+        path: File path
+        start: First byte offset
+        end: Offset after the last byte, or None for the whole file
+        words: Count words as well as lines
+
+    Returns:
+        (lines, words, bytes)
+    """
+    with open(path, 'rb') as f:
+        if end is None:
+            return count_stream(f, words)
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty or special files are read whole, by their first range
+            return count_stream(f, words) if start == 0 else (0, 0, 0)
+        with mapped:
+            if hasattr(mapped, 'madvise'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            end = min(end, len(mapped))
+            lines = word_count = 0
+            after_space = start == 0 or mapped[start - 1] in WHITESPACE
+            for offset in range(start, end, CHUNK_SIZE):
+                data = mapped[offset:min(offset + CHUNK_SIZE, end)]
+                chunk_lines, chunk_words = count_chunk(data, after_space, words)
+                lines += chunk_lines
+                word_count += chunk_words
+                after_space = data[-1] in WHITESPACE
+            return lines, word_count, max(end - start, 0)
+
+
+def count_ranges(ranges: List[Range], words: bool = True) -> List[object]:
+    """
+    Count a batch of ranges (run in a worker process).
+
+    Returns:
+        Counts for each range, or an error message in its place
+    """
+    results: List[object] = []
+    for path, start, end in ranges:
+        try:
+            results.append(count_range(path, start, end, words))
+        except OSError as e:
+            results.append(e.strerror)
+    return results
+
+
+def plan_ranges(files: List[Tuple[str, int]]) -> Iterator[Tuple[int, Range]]:
+    """
+    Split files into ranges of at most RANGE_SIZE bytes.
+
+    Args:
+        files: (full path, size) pairs; a size of 0 means unknown
+
+    Yields:
+        (file index, range)
+    """
+    for index, (path, size) in enumerate(files):
+        if size == 0:
+            yield index, (path, 0, None)
+            continue
+        for start in range(0, size, RANGE_SIZE):
+            yield index, (path, start, min(start + RANGE_SIZE, size))
+
+
+def batch_ranges(planned: List[Tuple[int, Range]]) -> Iterator[List[Tuple[int, Range]]]:
+    """Group ranges into batches of about RANGE_SIZE bytes, so small files share a task."""
+    batch: List[Tuple[int, Range]] = []
+    batch_size = 0
+    for item in planned:
+        _, (_, start, end) = item
+        batch.append(item)
+        batch_size += (end - start) if end is not None else CHUNK_SIZE
+        if batch_size >= RANGE_SIZE:
+            yield batch
+            batch, batch_size = [], 0
+    if batch:
+        yield batch
+
+
+def _processes() -> "ProcessPoolExecutor":
+    global _pool
+    if _pool is None:
+        import atexit
+        from concurrent.futures import ProcessPoolExecutor
+        _pool = ProcessPoolExecutor(MAX_WORKERS)
+        atexit.register(_pool.shutdown)
+    return _pool
+
+
+def count_files(files: List[Tuple[str, int]], words: bool = True) -> List[object]:
+    """
+    Count files, in parallel when there is enough data to be worth it.
+
+    Args:
+        files: (full path, size) pairs
+        words: Count words as well as lines
+
+    Returns:
+        Counts for each file, or an error message in its place
+    """
+    results: List[object] = [(0, 0, 0)] * len(files)
+
+    def merge(index: int, result: object) -> None:
+        current = results[index]
+        if isinstance(result, str) or isinstance(current, str):
+            results[index] = current if isinstance(current, str) else result
+        else:
+            results[index] = tuple(a + b for a, b in zip(current, result))
+
+    planned = list(plan_ranges(files))
+    total = sum(size for _, size in files)
+    if total < PARALLEL_THRESHOLD or (os.cpu_count() or 1) == 1:
+        for index, item in planned:
+            check_cancelled()
+            merge(index, count_ranges([item], words)[0])
+        return results
+
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    pool = _processes()
+    pending = {}
+    for batch in batch_ranges(planned):
+        future = pool.submit(count_ranges, [item for _, item in batch], words)
+        pending[future] = [index for index, _ in batch]
+    try:
+        while pending:
+            check_cancelled()
+            done, _ = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                for index, result in zip(pending.pop(future), future.result()):
+                    merge(index, result)
+    finally:
+        # Batches already running are bounded by RANGE_SIZE, so they finish quickly
+        for future in pending:
+            future.cancel()
+    return results
+
+
+def collect_files(paths: List[str], recursive: bool) -> Iterator[Tuple[str, str, Optional[int]]]:
+    """
+    Yield (shown name, full path, size) for each file to count.
+
+    Directories are walked with -r. Paths that cannot be counted are yielded
+    with an error message in place of the full path and a size of None.
+    """
+    from commands_final import find_records
+    from records import ErrorRecord
+
+    session = current_session()
+    for path in paths:
+        full = session.resolve(path)
+        try:
+            info = os.stat(full)
+            count_op('stat')
+        except FileNotFoundError:
+            yield path, "No such file or directory", None
+            continue
+        except PermissionError:
+            yield path, "Permission denied", None
+            continue
+
+        if not os.path.isdir(full):
+            yield path, full, info.st_size
+            continue
+        if not recursive:
+            yield path, "Is a directory", None
+            continue
+
+        shown_root = path.rstrip(os.sep) or path
+        for record in find_records([path, '-type', 'f']):
+            if isinstance(record, ErrorRecord):
+                yield record.path, record.reason, None
+                continue
+            file_path = full + record.path[len(shown_root):]
+            try:
+                size = os.stat(file_path).st_size
+                count_op('stat')
+            except OSError as e:
+                yield record.path, e.strerror, None
+                continue
+            yield record.path, file_path, size
+
+
+def format_counts(counts: Counts, fields: str, width: int, name: str) -> str:
+    """Format the selected counts (a subset of 'lwc') as right-aligned columns."""
+    lines, words, size = counts
+    values = {'l': lines, 'w': words, 'c': size}
+    columns = ' '.join(f"{values[field]:>{width}}" for field in fields)
+    return f"{columns} {name}" if name else columns
+
+
+def parse_fields(args: List[str]) -> Optional[Tuple[str, bool, List[str]]]:
+    """
+    Split arguments into the selected fields, the -r flag and paths.
+
+    Returns:
+        (fields in 'lwc' order, recursive, paths) or None after printing an error
+    """
+    selected = set()
+    recursive = False
+    paths = []
+    for arg in args:
+        if arg.startswith('-') and len(arg) > 1:
+            for letter in arg[1:]:
+                if letter in 'lwc':
+                    selected.add(letter)
+                elif letter == 'r':
+                    recursive = True
+                else:
+                    print(f"wc: unknown option -{letter}")
+                    print(USAGE)
+                    return None
+        else:
+            paths.append(arg)
+    fields = ''.join(field for field in 'lwc' if field in selected) or 'lwc'
+    return fields, recursive, paths
+
+
+def handle_wc(args: List[str]) -> int:
+    """
+    Handle the 'wc' command (see the module docstring for usage).
+
+    Args:
+        args: Options and paths
+
+    Returns:
+        Exit status: 0, or 1 if any path could not be counted
+    """
+    parsed = parse_fields(args)
+    if parsed is None:
+        return 2
+    fields, recursive, paths = parsed
+    if not paths:
+        print(USAGE)
+        return 2
+
+    status = 0
+    for counted, line in report_paths(paths, fields, recursive):
+        print(line)
+        if not counted:
+            status = 1
+    return status
+
+
+def report_paths(paths: List[str], fields: str, recursive: bool) -> Iterator[Tuple[bool, str]]:
+    """
+    Count files and format a line per path, plus a total for several.
+
+    Returns:
+        (counted, line) pairs; counted is False for 'wc: PATH: error' lines
+    """
+    entries = list(collect_files(paths, recursive))
+    files = [(full, size) for _, full, size in entries if size is not None]
+    counted = iter(count_files(files, words='w' in fields))
+
+    rows: List[Tuple[str, object]] = []
+    for shown, full, size in entries:
+        rows.append((shown, next(counted) if size is not None else full))
+
+    totals = [0, 0, 0]
+    for _, result in rows:
+        if not isinstance(result, str):
+            totals = [a + b for a, b in zip(totals, result)]
+    values: Dict[str, int] = dict(zip('lwc', totals))
+    width = max(len(str(values[field])) for field in fields)
+
+    for shown, result in rows:
+        if isinstance(result, str):
+            yield False, f"wc: {shown}: {result}"
+        else:
+            yield True, format_counts(result, fields, width, shown)
+    if len(rows) > 1:
+        yield True, format_counts(tuple(totals), fields, width, "total")
+
+
+def stream_wc(args: List[str], lines: Iterator[str]) -> Iterator[str]:
+    """
+    Count the lines, words and bytes (UTF-8) of upstream input, or of the
+    named files as the command does.
+
+    Args:
+        args: -l, -w and -c select counts as for the command; paths (and -r)
+              count files instead of the input
+        lines: Input lines from the previous stage
+    """
+    parsed = parse_fields(args)
+    if parsed is None:
+        set_stage_status(2)
+        return
+    fields, recursive, paths = parsed
+    if paths:
+        for counted, line in report_paths(paths, fields, recursive):
+            if counted:
+                yield line
+            else:
+                # Errors go to the terminal, not down the pipeline
+                print(line)
+                set_stage_status(1)
+        return
+
+    line_count = words = size = 0
+    for line in lines:
+        line_count += 1
+        words += len(line.split())
+        size += len(line.encode('utf-8', 'surrogateescape')) + 1
+    counts = (line_count, words, size)
+    width = max(len(str(value)) for value in counts)
+    yield format_counts(counts, fields, width, '')